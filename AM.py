@@ -1,6 +1,12 @@
+import json
+import math
+import os
+from fractions import Fraction
+from functools import lru_cache
+
 import numpy as np
 import matplotlib.pyplot as plt
-import sympy as sp
+from problems import as_inplace
 
 # --- CẤU HÌNH HIỂN THỊ SỐ (QUAN TRỌNG) ---
 # suppress=True: Tắt chế độ in khoa học (e-05)
@@ -8,36 +14,69 @@ import sympy as sp
 # formatter: Đảm bảo mọi số float đều được format dạng thập phân
 np.set_printoptions(suppress=True, precision=6, floatmode='fixed')
 
-def get_adams_coefficients(order, method='AB'):
+# --- BẢNG HỆ SỐ ADAMS CHÍNH XÁC (PHÂN SỐ) ---
+# Hệ số AB/AM bậc 1..12 được sinh sẵn bằng công thức truy hồi và lưu ở adams_coefficients.json
+# (dạng chuỗi "p/q"); bậc chưa có trong bảng được tính lại rồi ghi bổ sung vào file.
+ADAMS_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'adams_coefficients.json')
+_adams_table = None
+
+def _adams_gammas(order, method='AB'):
     """
-    Tính hệ số cho phương pháp Adams-Bashforth (AB) hoặc Adams-Moulton (AM)
-    dựa trên tích phân đa thức Lagrange.
+    Hệ số dạng sai phân lùi gamma_0..gamma_{order-1} theo truy hồi:
+      AB: sum_{j=0}^{k} gamma_j / (k+1-j) = 1
+      AM: gamma*_0 = 1, sum_{j=0}^{k} gamma*_j / (k+1-j) = 0 (k >= 1)
     """
-    t = sp.symbols('t')
-    # Chuẩn hóa bước nhảy h=1. Đoạn tích phân từ 0 đến 1
-    
-    if method == 'AB':
-        points = [-i for i in range(order)]
-        target_range = (0, 1) 
-    else: # AM
-        points = [1] + [-i for i in range(order - 1)]
-        target_range = (0, 1)
-
-    t_sym = sp.symbols('t')
-    coeffs = []
-    
-    # Xây dựng đa thức Lagrange và tích phân
-    for i in range(len(points)):
-        L = 1
-        for j in range(len(points)):
-            if i != j:
-                L *= (t_sym - points[j]) / (points[i] - points[j])
-        
-        integral = sp.integrate(L, (t_sym, target_range[0], target_range[1]))
-        coeffs.append(float(integral))
-        
+    gammas = []
+    for k in range(order):
+        rhs = Fraction(1) if (method == 'AB' or k == 0) else Fraction(0)
+        gammas.append(rhs - sum(g / (k + 1 - j) for j, g in enumerate(gammas)))
+    return gammas
+
+def _adams_from_recurrence(order, method='AB'):
+    """Đổi hệ số sai phân lùi sang dạng Lagrange: beta_j = (-1)^j sum_{i>=j} C(i, j) gamma_i."""
+    gammas = _adams_gammas(order, method)
+    return [(-1) ** j * sum(math.comb(i, j) * gammas[i] for i in range(j, order)) for j in range(order)]
+
+def _load_adams_table():
+    global _adams_table
+    if _adams_table is None:
+        try:
+            with open(ADAMS_TABLE_FILE, encoding='utf-8') as fh:
+                _adams_table = json.load(fh)
+        except (OSError, ValueError):
+            _adams_table = {'AB': {}, 'AM': {}}
+    return _adams_table
+
+@lru_cache(maxsize=None)
+def get_adams_coefficients_exact(order, method='AB'):
+    """
+    Hệ số Adams chính xác (tuple Fraction), thứ tự:
+      AB: [f_n, f_{n-1}, ..., f_{n-order+1}]
+      AM: [f_{n+1}, f_n, ..., f_{n-order+2}]
+    Đọc từ bảng trên đĩa; nếu thiếu thì tính bằng truy hồi và lưu bổ sung (bỏ qua nếu không ghi được).
+    """
+    method = 'AB' if method == 'AB' else 'AM'
+    table = _load_adams_table()
+    entry = table.setdefault(method, {}).get(str(order))
+    if entry is not None:
+        return tuple(Fraction(v) for v in entry)
+
+    coeffs = tuple(_adams_from_recurrence(order, method))
+    table[method][str(order)] = [str(v) for v in coeffs]
+    try:
+        with open(ADAMS_TABLE_FILE, 'w', encoding='utf-8') as fh:
+            json.dump(table, fh, indent=1)
+    except OSError:
+        pass
     return coeffs
 
+def get_adams_coefficients(order, method='AB'):
+    """
+    Tính hệ số cho phương pháp Adams-Bashforth (AB) hoặc Adams-Moulton (AM),
+    tương đương tích phân đa thức Lagrange trên [0, 1] (bước chuẩn hóa h = 1).
+    """
+    return [float(v) for v in get_adams_coefficients_exact(order, method)]
+
 def rk4_step(f, t, y, h):
     """Giải một bước bằng RK4 để khởi tạo giá trị."""
     k1 = h * f(t, y)
@@ -46,55 +85,319 @@ def rk4_step(f, t, y, h):
     k4 = h * f(t + h, y + k3)
     return y + (k1 + 2*k2 + 2*k3 + k4) / 6.0
 
-def solve_adams_predictor_corrector(funcs, y0, t_span, h, order):
+PC_MODES = ('PEC', 'PECE', 'P(EC)mE', 'converge')
+
+def _parse_pc_mode(mode, m, max_iter):
+    """Đổi tên chế độ thành (số lần hiệu chỉnh tối đa, có đánh giá cuối E, lặp tới hội tụ)."""
+    key = mode.upper().replace('^', '').replace(' ', '')
+    if key == 'PEC': return 1, False, False
+    if key == 'PECE': return 1, True, False
+    if key == 'P(EC)ME': return max(1, int(m)), True, False
+    if key == 'CONVERGE': return max(1, int(max_iter)), True, True
+    raise ValueError(f"Chế độ không hợp lệ: '{mode}' (chọn một trong {', '.join(PC_MODES)})")
+
+def solve_adams_predictor_corrector(funcs, y0, t_span, h, order, save_every=1, mode='PECE', m=2,
+                                    tol=1e-10, max_iter=20, return_stats=False):
     """
     Giải hệ PTVP bằng phương pháp AB-AM (Dự báo - Hiệu chỉnh).
+    Lịch sử f chỉ giữ `order` giá trị gần nhất trong bộ đệm vòng (order, dim), tổng AB/AM
+    là một tích vô hướng với vector hệ số -> bộ nhớ O(order*dim) thay vì O(n_steps*dim).
+    - save_every: chỉ lưu 1 điểm sau mỗi save_every bước (luôn lưu điểm cuối).
+    - mode: cách lặp hiệu chỉnh mỗi bước (P: dự báo, E: tính f, C: hiệu chỉnh)
+        'PEC'      : 1 lần gọi f/bước, lịch sử dùng f tại điểm dự báo
+        'PECE'     : 2 lần gọi f/bước (mặc định)
+        'P(EC)mE'  : m lần hiệu chỉnh, m+1 lần gọi f/bước
+        'converge' : hiệu chỉnh tới khi |y^(k+1) - y^(k)| <= tol*(1 + |y|) (tối đa max_iter lần)
+    - return_stats=True: trả về thêm dict thống kê (số lần gọi f, số bước chưa hội tụ, ...).
     """
+    n_corr, final_eval, to_convergence = _parse_pc_mode(mode, m, max_iter)
     t0, tf = t_span
     n_steps = int((tf - t0) / h) + 1
-    t_vals = np.linspace(t0, tf, n_steps)
+    dt = (tf - t0) / (n_steps - 1) if n_steps > 1 else 0.0
+    save_every = max(1, int(save_every))
     
     dim = len(y0)
-    y_vals = np.zeros((n_steps, dim))
-    y_vals[0] = y0
+    n_saved = (n_steps - 1) // save_every + 1 + (1 if (n_steps - 1) % save_every else 0)
+    t_vals = np.empty(n_saved)
+    y_vals = np.empty((n_saved, dim))
+    y = np.array(y0, dtype=float)
+    t_vals[0] = t0; y_vals[0] = y
+    n_out = 1
+    
+    # Bộ đệm vòng: f(t_i, y_i) nằm ở ô i % order
+    F = as_inplace(funcs)
+    f_buf = np.zeros((order, dim))
+    F(t0, y, f_buf[0])
+    nfev = 1
     
     # 1. Khởi tạo (Initialization) bằng RK4
     print(f"--- Đang khởi tạo {order-1} bước đầu bằng RK4 ---")
-    for i in range(order - 1):
-        y_vals[i+1] = rk4_step(funcs, t_vals[i], y_vals[i], h)
+    for i in range(min(order - 1, n_steps - 1)):
+        y = rk4_step(funcs, t0 + i*dt, y, h)
+        F(t0 + (i+1)*dt, y, f_buf[(i+1) % order])
+        nfev += 5
+        if (i + 1) % save_every == 0 or i + 1 == n_steps - 1:
+            t_vals[n_out] = t0 + (i+1)*dt; y_vals[n_out] = y
+            n_out += 1
         
-    ab_coeffs = get_adams_coefficients(order, 'AB') 
-    am_coeffs = get_adams_coefficients(order, 'AM')
+    ab_coeffs = np.array(get_adams_coefficients(order, 'AB'))
+    am_coeffs = np.array(get_adams_coefficients(order, 'AM'))
+    
+    # Hệ số xoay theo vị trí ô mới nhất p: ab_roll[p] @ f_buf = sum_j ab_j * f_{n-j}
+    lag = (np.arange(order)[:, None] - np.arange(order)[None, :]) % order
+    ab_roll = ab_coeffs[lag]
+    am_roll = np.append(am_coeffs[1:], 0.0)[lag]   # f_{n-order+1} không dùng trong AM
+    
+    nfev_startup = nfev
+    f_cur = np.empty(dim)
+    n_not_converged = 0
     
     # 2. Vòng lặp chính (Predictor - Corrector)
-    print(f"--- Bắt đầu vòng lặp AB{order}-AM{order} ---")
+    print(f"--- Bắt đầu vòng lặp AB{order}-AM{order} ({mode}) ---")
     
-    f_history = np.zeros((n_steps, dim))
-    for i in range(order):
-        f_history[i] = funcs(t_vals[i], y_vals[i])
-        
     for i in range(order - 1, n_steps - 1):
-        # --- PREDICTOR (Dự báo) ---
-        y_pred = y_vals[i].copy()
-        for j in range(order):
-            y_pred += h * ab_coeffs[j] * f_history[i-j]
-            
-        f_next_pred = funcs(t_vals[i+1], y_pred)
+        p = i % order
+        t_next = t0 + (i+1)*dt
         
-        # --- CORRECTOR (Hiệu chỉnh) ---
-        y_corr = y_vals[i].copy()
+        # --- PREDICTOR (Dự báo) ---
+        y_pred = y + h * (ab_roll[p] @ f_buf)
+        F(t_next, y_pred, f_cur)
+        nfev += 1
         
-        term_future = am_coeffs[0] * f_next_pred
-        term_past = np.zeros(dim)
-        for j in range(1, order): 
-            term_past += am_coeffs[j] * f_history[i - (j-1)]
-            
-        y_corr += h * (term_future + term_past)
+        # --- CORRECTOR (Hiệu chỉnh), lặp (EC) n_corr lần ---
+        past = am_roll[p] @ f_buf
+        y_prev = y_pred
+        y_corr = y + h * (am_coeffs[0] * f_cur + past)
+        for it in range(1, n_corr + 1):
+            if to_convergence and np.abs(y_corr - y_prev).max() <= tol * (1 + np.abs(y_corr).max()):
+                break
+            if it == n_corr:
+                if to_convergence: n_not_converged += 1
+                break
+            F(t_next, y_corr, f_cur)
+            nfev += 1
+            y_prev = y_corr
+            y_corr = y + h * (am_coeffs[0] * f_cur + past)
         
-        y_vals[i+1] = y_corr
-        f_history[i+1] = funcs(t_vals[i+1], y_corr)
+        # --- E cuối: PEC giữ f tại điểm đánh giá gần nhất ---
+        y = y_corr
+        if final_eval:
+            F(t_next, y, f_buf[(i+1) % order])
+            nfev += 1
+        else:
+            f_buf[(i+1) % order] = f_cur
         
-    return t_vals, y_vals
+        if (i + 1) % save_every == 0 or i + 1 == n_steps - 1:
+            t_vals[n_out] = t_next; y_vals[n_out] = y
+            n_out += 1
+    
+    n_pc = max(0, n_steps - order)
+    stats = {'mode': mode, 'nfev': nfev, 'nfev_startup': nfev_startup, 'n_steps': n_pc,
+             'nfev_per_step': (nfev - nfev_startup) / n_pc if n_pc else 0.0,
+             'n_not_converged': n_not_converged}
+    print(f"Số lần gọi f: {nfev} (khởi tạo {nfev_startup}, trung bình {stats['nfev_per_step']:.2f}/bước)")
+    if return_stats:
+        return t_vals[:n_out], y_vals[:n_out], stats
+    return t_vals[:n_out], y_vals[:n_out]
+
+# --- ADAMS BIẾN BƯỚC / BIẾN BẬC (DẠNG NORDSIECK) ---
+
+ETA_MAX = 5.0
+
+@lru_cache(maxsize=None)
+def _nordsieck_l(q):
+    """
+    Vector l (q+1 phần tử) của Adams-Moulton bậc q dạng Nordsieck: hệ số của
+    Lambda(x) = tích phân từ -1 đến x của prod_{i=1}^{q-1} (1 + u/i) du (l_1 = 1).
+    """
+    poly = [Fraction(1)]
+    for i in range(1, q):
+        poly = [a + b / i for a, b in zip(poly + [Fraction(0)], [Fraction(0)] + poly)]
+    integ = [Fraction(0)] + [a / (k + 1) for k, a in enumerate(poly)]
+    integ[0] = -sum(a * (-1) ** k for k, a in enumerate(integ))
+    return np.array([float(v) for v in integ])
+
+@lru_cache(maxsize=None)
+def _pascal(q):
+    """Ma trận dự báo Nordsieck (q+1, q+1): P[i, j] = C(j, i), tức z_pred = P @ z."""
+    return np.array([[math.comb(j, i) for j in range(q + 1)] for i in range(q + 1)], dtype=float)
+
+@lru_cache(maxsize=None)
+def _nordsieck_drop(q):
+    """
+    Hệ số c (q+1 phần tử) để hạ bậc q -> q-1 (như CVODE, bước đều): z[j] -= c_j * z[q],
+    c là hệ số của q * tích phân từ 0 đến x của u * prod_{i=1}^{q-2} (u + i) du (c_q = 1).
+    Cắt bỏ z[q] mà không điều chỉnh làm sai các cột thấp hơn.
+    """
+    poly = [Fraction(0), Fraction(1)]
+    for i in range(1, q - 1):
+        poly = [a * i + b for a, b in zip(poly + [Fraction(0)], [Fraction(0)] + poly)]
+    c = [Fraction(0)] + [q * a / (k + 1) for k, a in enumerate(poly)]
+    return np.array([float(v) for v in c[:q + 1]])
+
+def _wrms(v, scale):
+    """Chuẩn RMS có trọng số theo dung sai."""
+    return np.sqrt(np.mean((v / scale) ** 2))
+
+def solve_adams_adaptive(funcs, y0, t_span, rtol=1e-6, atol=1e-9, h0=None, max_order=12,
+                         max_steps=100000, max_iter=3, return_stats=False):
+    """
+    Adams-Moulton biến bước, biến bậc (1..max_order) lưu lịch sử dạng Nordsieck
+    z[j] = h^j y^(j) / j!, đổi bước chỉ cần nhân z[j] với eta^j.
+    Mỗi bước: dự báo z_pred = P z, hiệu chỉnh bằng lặp đơn (tối đa max_iter lần gọi f),
+    e = y_corr - y_pred là hiệu dự báo - hiệu chỉnh. Sai số cục bộ theo Milne:
+        err_q = |gamma*_q / gamma_{q-1}| * ||e||
+    h và bậc chỉ đổi sau q+1 bước liên tiếp cùng h (như LSODE), hoặc khi bước bị từ chối.
+    Khi đó so sánh với ước lượng bậc q-1 (từ z[q]) và q+1 (từ hiệu e của hai bước
+    liên tiếp) rồi chọn bậc cho bước lớn nhất.
+    Trả về (t_vals, y_vals) hoặc thêm stats nếu return_stats=True.
+    """
+    t0, tf = t_span
+    t = t0
+    y = np.array(y0, dtype=float)
+    dim = len(y)
+    max_order = max(1, min(int(max_order), 12))
+    gam = [float(g) for g in _adams_gammas(max_order + 2, 'AB')]
+    gam_s = [float(g) for g in _adams_gammas(max_order + 2, 'AM')]
+
+    f0 = funcs(t, y)
+    nfev = 1
+    if h0 is None:
+        scale = atol + rtol * np.abs(y)
+        d0, d1 = _wrms(y, scale), _wrms(f0, scale)
+        h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+    h = min(h0, tf - t0)
+
+    z = np.zeros((max_order + 2, dim))
+    z[0] = y; z[1] = h * f0
+    q = 1
+    q_wait = q + 1            # số bước còn lại trước khi được xét đổi bậc
+    e_prev = None             # hiệu e của bước được chấp nhận trước (cùng bước h)
+    n_accept = n_reject = n_fail_conv = n_fail_step = 0
+    t_vals = [t]; y_vals = [y.copy()]
+    orders = []
+
+    def drop_order():
+        nonlocal q
+        z[:q + 1] -= _nordsieck_drop(q)[:, None] * z[q]
+        q -= 1
+
+    def rescale(eta):
+        nonlocal h
+        z[:q + 1] *= (eta ** np.arange(q + 1))[:, None]
+        h *= eta
+
+    print(f"--- Adams biến bước/biến bậc (Nordsieck), rtol={rtol}, atol={atol} ---")
+    while t < tf:
+        if n_accept + n_reject >= max_steps:
+            print(f"[DỪNG SỚM] Vượt quá {max_steps} bước tại t={t:.6f}.")
+            break
+        if h < 1e-14 * max(1.0, abs(t)):
+            print(f"[DỪNG SỚM] Bước nhảy quá nhỏ tại t={t:.6f}.")
+            break
+        if t + h > tf:
+            rescale((tf - t) / h)
+
+        l = _nordsieck_l(q)
+        zp = _pascal(q) @ z[:q + 1]
+        scale = atol + rtol * np.abs(zp[0])
+
+        # Hiệu chỉnh bằng lặp đơn: y = y_pred + l_0 * (h f(t+h, y) - z_pred[1])
+        # Lần lặp đầu cho cả phần hiệu chỉnh; từ lần thứ hai, độ thay đổi là sai số lặp.
+        y_new = zp[0]
+        converged = False
+        err_const = abs(gam_s[q] / gam[q - 1])
+        dcor_old = None
+        with np.errstate(all='ignore'):
+            for m in range(max_iter):
+                delta = h * funcs(t + h, y_new) - zp[1]
+                nfev += 1
+                y_next = zp[0] + l[0] * delta
+                dcor = _wrms(y_next - y_new, scale)
+                y_new = y_next
+                # Sai số lặp được đo theo phần đóng góp vào ước lượng sai số err_q
+                if m == 0:
+                    converged = err_const * dcor <= 0.1
+                else:
+                    rate = dcor / dcor_old if dcor_old > 0 else 0.0
+                    if rate > 2: break                    # phân kỳ
+                    converged = err_const * dcor * min(1.0, rate) <= 0.1
+                dcor_old = dcor
+                if converged: break
+        if not (converged and np.all(np.isfinite(y_new))):
+            n_reject += 1; n_fail_conv += 1
+            rescale(0.25)
+            q_wait = q + 1
+            continue
+
+        e = y_new - zp[0]
+        scale = atol + rtol * np.maximum(np.abs(z[0]), np.abs(y_new))
+        err = err_const * _wrms(e, scale)
+        if err > 1.0:
+            n_reject += 1; n_fail_step += 1
+            e_prev = None
+            if n_fail_step >= 3:
+                # Thất bại liên tiếp: giảm một bậc (như CVODE); ở bậc 1 thì tính lại đạo hàm
+                if q > 1:
+                    drop_order()
+                else:
+                    z[1] = h * funcs(t, z[0]); nfev += 1
+                rescale(0.1)
+            else:
+                if n_fail_step == 2 and q > 1:
+                    drop_order()
+                rescale(max(0.2, 0.9 * err ** (-1.0 / (q + 1))))
+            q_wait = q + 1
+            continue
+        # Ngay sau bước bị từ chối không tăng bước (như CVODE)
+        eta_max = 1.0 if n_fail_step else ETA_MAX
+        n_fail_step = 0
+
+        # Chấp nhận bước: z = z_pred + l * delta
+        z[:q + 1] = zp + l[:, None] * delta
+        t = tf if abs(tf - (t + h)) < 1e-12 * max(1.0, abs(tf)) else t + h
+        n_accept += 1
+        t_vals.append(t); y_vals.append(z[0].copy()); orders.append(q)
+        if t >= tf: break
+
+        # Chọn bậc và bước tiếp theo. Như LSODE, h và bậc giữ nguyên trong q+1 bước sau mỗi
+        # lần đổi: hệ số l cố định chỉ ổn định khi bước ít đổi, và e của hai bước liên tiếp
+        # cùng h mới cho ước lượng bậc q+1 đúng.
+        q_wait -= 1
+        if q_wait > 0:
+            if q_wait == 1: e_prev = e
+            continue
+        eta = 0.9 * err ** (-1.0 / (q + 1)) if err > 0 else eta_max
+        q_new = q
+        if q > 1:
+            err_dn = abs(gam_s[q - 1]) * math.factorial(q) * _wrms(z[q], scale)
+            eta_dn = 0.9 * err_dn ** (-1.0 / q) / 1.2 if err_dn > 0 else eta_max
+            if eta_dn > eta: eta, q_new = eta_dn, q - 1
+        if q < max_order and e_prev is not None:
+            err_up = abs(gam_s[q + 1] / gam[q - 1]) * _wrms(e - e_prev, scale)
+            eta_up = 0.9 * err_up ** (-1.0 / (q + 2)) / 1.4 if err_up > 0 else eta_max
+            if eta_up > eta: eta, q_new = eta_up, q + 1
+        eta = min(eta_max, eta)
+        # Lợi ích nhỏ: giữ nguyên h và bậc, xét lại sau vài bước
+        if eta < 1.2:
+            q_wait = 3
+            continue
+        if q_new == q + 1:
+            # Cột mới h^(q+1) y^(q+1) / (q+1)!: hiệu chỉnh của z[q] trong bước vừa rồi là
+            # l_q * delta ~ h^(q+1) y^(q+1) / q!, với delta = e / l_0
+            z[q + 1] = l[q] * e / (l[0] * (q + 1))
+            q += 1
+        elif q_new == q - 1:
+            drop_order()
+        rescale(eta)
+        q_wait = q + 1; e_prev = None
+
+    stats = {'nfev': nfev, 'n_accept': n_accept, 'n_reject': n_reject,
+             'n_fail_conv': n_fail_conv, 'max_order_used': max(orders, default=q)}
+    print(f"Số bước nhận: {n_accept} | Số bước từ chối: {n_reject} | Số lần gọi f: {nfev} | Bậc cao nhất: {stats['max_order_used']}")
+    if return_stats:
+        return np.array(t_vals), np.array(y_vals), stats
+    return np.array(t_vals), np.array(y_vals)
 
 # --- CÁC HÀM XỬ LÝ NHẬP LIỆU ---
 
@@ -185,7 +488,20 @@ def main():
         return
 
     # GIẢI
-    t_res, y_res = solve_adams_predictor_corrector(funcs, y0, t_span, h, order)
+    mode = input("Chế độ giải: [Enter] AB-AM bước cố định, [a] biến bước/biến bậc (Nordsieck): ").strip().lower()
+    if mode == 'a':
+        rtol_in = input("Nhập rtol (Enter = 1e-6): ").strip()
+        rtol = float(rtol_in) if rtol_in else 1e-6
+        t_res, y_res, stats = solve_adams_adaptive(funcs, y0, t_span, rtol=rtol, atol=rtol * 1e-3,
+                                                   return_stats=True)
+        order = f"{stats['max_order_used']}(thay đổi)"
+    else:
+        pc_mode = input("Chế độ hiệu chỉnh [Enter = PECE | PEC | P(EC)mE | converge]: ").strip() or 'PECE'
+        m_corr = 2
+        if pc_mode.upper().replace('^', '') == 'P(EC)ME':
+            m_in = input("Số lần hiệu chỉnh m (Enter = 2): ").strip()
+            m_corr = int(m_in) if m_in else 2
+        t_res, y_res = solve_adams_predictor_corrector(funcs, y0, t_span, h, order, mode=pc_mode, m=m_corr)
     
     # KẾT QUẢ
     print(f"\n--- KẾT QUẢ (In toàn bộ hoặc 20 dòng cuối) ---")
@@ -227,4 +543,4 @@ def main():
     plt.show()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -1,7 +1,9 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.optimize import fsolve
-from scipy.integrate import solve_ivp
+from bdf import solve_bdf
+from newton import NewtonSolver
+from problems import ExpressionRHS, as_inplace
+from convergence import convergence_study
 
 # --- CẤU HÌNH HIỂN THỊ SỐ ---
 # suppress=True: Tắt chế độ in khoa học (e-05)
@@ -88,8 +90,12 @@ def plot_stability_regions():
 def solve_ode_core(method, f_func, t_span, y0, h):
     """
     Hàm giải chính (Kernel).
+    method: 'euler_hien', 'euler_an', 'hinh_thang' hoặc 'bdf1'..'bdf6' (công thức lùi BDF bậc k).
     Trả về (ts, ys)
     """
+    if method.startswith('bdf'):
+        return solve_bdf(f_func, t_span, y0, h, order=int(method[3:]))
+    
     t0, t_end = t_span
     N = int(np.ceil((t_end - t0) / h))
     ts = np.linspace(t0, t0 + N*h, N+1)
@@ -97,71 +103,74 @@ def solve_ode_core(method, f_func, t_span, y0, h):
     ys = np.zeros((N+1, dim))
     ys[0] = y0
     
+    # Newton đơn giản hóa dùng chung cho mọi bước: J và LU của (I - gh*J) được giữ lại,
+    # chỉ tính lại khi hội tụ chậm/thất bại (h cố định nên thường chỉ phân rã một lần);
+    # NewtonSolver tự chuyển sang Newton đầy đủ khi J cũ không đủ.
+    # Phương trình bước: y_next - gh * f(t_next, y_next) - psi = 0
+    newton = NewtonSolver(f_func, tol=1e-12) if method in ('euler_an', 'hinh_thang') else None
+    n_split = 0
+    f_curr = None
+    F = as_inplace(f_func)
+    f_tmp = np.empty(dim)
+
+    def implicit_step(t, y, f_y, dt, y_guess, depth=0):
+        """
+        Một bước ẩn cỡ dt từ (t, y). Trả về (y_next, f_next, ok); f_next = f(t+dt, y_next)
+        lấy từ chính phương trình bước (không tốn lần gọi f).
+        Phương trình bước có thể vô nghiệm thực khi dt lớn (ví dụ hình thang trên Robertson):
+        khi đó (sau khi thử lại từ điểm đoán y) chia đôi bước (tối đa 10 lần) thay vì ghi điểm lặp chưa hội tụ vào nghiệm.
+        """
+        nonlocal n_split
+        gh = dt if method == 'euler_an' else dt/2
+        psi = y if method == 'euler_an' else y + gh * f_y
+        y_next, ok = newton.solve(t + dt, psi, gh, y_guess)
+        if not ok and y_guess is not y:
+            # Điểm đoán ngoại suy có thể rơi sang nhánh nghiệm khác: thử lại từ y
+            y_next, ok = newton.solve(t + dt, psi, gh, y)
+        if ok:
+            return y_next, (y_next - psi) / gh, True
+        if depth >= 10:
+            return y, f_y, False
+        n_split += 1
+        y_half, f_half, ok = implicit_step(t, y, f_y, dt/2, y, depth + 1)
+        if not ok:
+            return y, f_y, False
+        return implicit_step(t + dt/2, y_half, f_half, dt/2, 2*y_half - y, depth + 1)
+    
     for i in range(N):
         t_curr = ts[i]
         y_curr = ys[i]
-        t_next = ts[i+1]
         
         if method == 'euler_hien':
-            ys[i+1] = y_curr + h * f_func(t_curr, y_curr)
-            
-        elif method == 'euler_an':
-            def equation(y_next):
-                return y_next - y_curr - h * f_func(t_next, y_next)
-            ys[i+1] = fsolve(equation, y_curr)
-            
-        elif method == 'hinh_thang':
-            def equation(y_next):
-                return y_next - y_curr - (h/2) * (f_func(t_curr, y_curr) + f_func(t_next, y_next))
-            ys[i+1] = fsolve(equation, y_curr)
-            
+            F(t_curr, y_curr, f_tmp)
+            np.multiply(f_tmp, h, out=ys[i+1]); ys[i+1] += y_curr
+            continue
+
+        # Điểm đoán: ngoại suy tuyến tính từ 2 điểm trước (không tốn lần gọi f)
+        if f_curr is None: f_curr = f_func(t_curr, y_curr)
+        if i > 0:
+            y_guess = 2*y_curr - ys[i-1]
+        else:
+            y_guess = y_curr if method == 'euler_an' else y_curr + h * f_curr
+        y_next, f_curr, ok = implicit_step(t_curr, y_curr, f_curr, h, y_guess)
+        if not ok:
+            print(f"[DỪNG SỚM] Newton không hội tụ tại t={ts[i+1]:.6f} ({method}). Hãy giảm bước h.")
+            return ts[:i+1], ys[:i+1]
+        ys[i+1] = y_next
+    
+    if n_split:
+        print(f"[{method}] Phương trình bước không giải được với h = {h}: đã chia nhỏ bước {n_split} lần.")
     return ts, ys
 
 # --- KHỐI 3: PHÂN TÍCH SAI SỐ VÀ CẤP HỘI TỤ ---
 
-def analyze_convergence(method, f_func, t_span, y0, h_base):
+def analyze_convergence(method, f_func, t_span, y0, h_base, levels=3):
     """
-    Phân tích sai số và cấp hội tụ bằng cách chạy với h, h/2, h/4.
+    Phân tích sai số và cấp hội tụ bằng cách chạy với h, h/2, h/4, ...
+    method có thể là một tên hoặc danh sách tên phương pháp: mọi lần chạy được phân phối
+    song song (convergence.convergence_study), nghiệm tham chiếu cache theo bài toán.
     """
-    print(f"\n>> PHÂN TÍCH HỘI TỤ: {method.upper()}")
-    
-    # 1. Tạo nghiệm tham chiếu (Exact Reference)
-    sol_ref = solve_ivp(f_func, t_span, y0, method='RK45', rtol=1e-10, atol=1e-10)
-    
-    # Hàm nội suy nghiệm chính xác
-    def get_exact(t):
-        from scipy.interpolate import interp1d
-        if not hasattr(analyze_convergence, "interpolator"):
-            analyze_convergence.interpolator = interp1d(sol_ref.t, sol_ref.y, kind='cubic', fill_value="extrapolate")
-        return analyze_convergence.interpolator(t).T
-
-    steps = [h_base, h_base/2, h_base/4]
-    
-    # Căn chỉnh tiêu đề bảng
-    print(f"{'h':<12} | {'Sai số Max (Global)':<25} | {'Cấp hội tụ (p)':<20}")
-    print("-" * 65)
-    
-    prev_error = None
-    
-    for h in steps:
-        ts, ys = solve_ode_core(method, f_func, t_span, y0, h)
-        
-        # Tính sai số
-        y_exact_vals = np.array([get_exact(t) for t in ts]).reshape(len(ts), len(y0))
-        max_err = np.max(np.abs(y_exact_vals - ys))
-        
-        order_str = "N/A"
-        if prev_error is not None and max_err > 0:
-            p = np.log2(prev_error / max_err)
-            order_str = f"{p:.4f}"
-            
-        # --- SỬA ĐỔI QUAN TRỌNG ---
-        # Sử dụng .10f thay vì .6e để hiện số thập phân đầy đủ
-        # Nếu sai số cực nhỏ (< 1e-10), nó có thể hiện 0.0000000000
-        print(f"{h:<12.6f} | {max_err:<25.10f} | {order_str:<20}")
-        prev_error = max_err
-
-    return
+    return convergence_study(method, f_func, t_span, y0, h_base, levels=levels)
 
 # --- KHỐI GIAO DIỆN ---
 
@@ -199,12 +208,8 @@ def get_user_input():
     t_end = float(input("t_end: "))
     h = float(input("Bước h: "))
     
-    def system_func(t, y):
-        derivs = []
-        for eq in equations:
-            d = eval(eq, {"np": np, "t": t, "y": y})
-            derivs.append(d)
-        return np.array(derivs)
+    # Biên dịch một lần thành hàm vế phải (pickle được -> chạy song song khi phân tích hội tụ)
+    system_func = ExpressionRHS(equations)
 
     return system_func, (t0, t_end), np.array(y0_vals), h
 
@@ -217,6 +222,9 @@ def main():
     mode = input("Lựa chọn (1/2): ")
     
     methods = ['euler_hien', 'euler_an', 'hinh_thang']
+    bdf_in = input("Thêm công thức BDF bậc k (1-6) cho bài toán cứng (Enter để bỏ qua): ").strip()
+    if bdf_in:
+        methods.append(f'bdf{int(bdf_in)}')
     
     if mode == '2':
         # 1. Vẽ miền ổn định
@@ -236,8 +244,7 @@ def main():
 
         # 3. Phân tích hội tụ
         print("\n--- PHÂN TÍCH SAI SỐ & TỐC ĐỘ HỘI TỤ ---")
-        for m in methods:
-            analyze_convergence(m, f_func, t_span, y0, h)
+        analyze_convergence(methods, f_func, t_span, y0, h)
             
     else:
         # Chạy thường
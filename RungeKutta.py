@@ -1,14 +1,83 @@
+import os
 import numpy as np
 import matplotlib.pyplot as plt
 import sympy as sp
 from fractions import Fraction
 import math
+from scipy.linalg import lu_factor, lu_solve
+from tableaux import get_tableau, build_explicit_tableau, rooted_trees, step_kernel, MAX_ORDER
+from jacobian import get_jacobian, extreme_eigenvalues
+from problems import as_inplace
 
 # --- CẤU HÌNH HIỂN THỊ ---
 # suppress=True: Tắt chế độ in khoa học (e-05) của numpy
 # precision=6: Lấy 6 chữ số thập phân
 np.set_printoptions(suppress=True, precision=6, floatmode='fixed')
 
+def time_file(out_file):
+    """Đường dẫn file lưới thời gian đi kèm file quỹ đạo: 'traj.npy' -> 'traj_t.npy'."""
+    return os.path.splitext(out_file)[0] + '_t.npy'
+
+def _truncate_npy(path, n_rows):
+    """
+    Cắt file .npy (thứ tự C) về n_rows hàng đầu ngay trên đĩa: ghi lại header với shape mới
+    (đệm khoảng trắng cho đúng độ dài cũ, dữ liệu không phải dịch) rồi cắt phần đuôi file.
+    """
+    fmt = np.lib.format
+    with open(path, 'r+b') as fh:
+        major, _ = fmt.read_magic(fh)
+        read_header = fmt.read_array_header_1_0 if major == 1 else fmt.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(fh)
+        offset = fh.tell()
+        header = repr({'descr': fmt.dtype_to_descr(dtype), 'fortran_order': fortran_order,
+                       'shape': (n_rows,) + tuple(shape[1:])})
+        start = 8 + (2 if major == 1 else 4)     # magic + version + độ dài header
+        fh.seek(start)
+        fh.write((header.ljust(offset - start - 1) + '\n').encode('latin1'))
+        fh.truncate(offset + n_rows * int(np.prod(shape[1:], dtype=int)) * dtype.itemsize)
+
+class DenseOutput:
+    """
+    Nghiệm liên tục (dense output) dựng từ lưới bước của solver. Trên mỗi đoạn [t_n, t_{n+1}]:
+    - Nếu bảng Butcher có mở rộng liên tục (tableau 'dense': dp54, bs32) và mỗi bước đều được lưu:
+          y(t_n + theta h) = y_n + h sum_j Q_n[j] theta^(j+1),  Q_n = P^T K_n
+      dựng từ toàn bộ stage K_n solver đã tính (cùng cấp với mở rộng liên tục, không tốn thêm lần gọi f).
+    - Ngược lại (dự phòng): nội suy Hermite bậc 3 từ y_n, y_{n+1} và đạo hàm f_n = k_1 của mỗi bước;
+      đường bước cố định tốn thêm một lần gọi f tại nút cuối.
+    Gọi sol(t) với t là số hoặc mảng thời điểm (vector hóa).
+    """
+    def __init__(self, ts, ys, fs=None, Q=None):
+        self.ts = np.asarray(ts, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        self.fs = None if fs is None else np.asarray(fs, dtype=float)
+        self.Q = None if Q is None else np.asarray(Q, dtype=float)   # (n_steps, q, dim)
+        self.t_min, self.t_max = self.ts[0], self.ts[-1]
+
+    def __call__(self, t):
+        t_arr = np.asarray(t, dtype=float)
+        tq = np.ravel(t_arr)       # t dạng bất kỳ -> kết quả dạng t.shape + (dim,)
+        if np.any(tq < self.t_min - 1e-12) or np.any(tq > self.t_max + 1e-12):
+            raise ValueError(f"t nằm ngoài khoảng nghiệm [{self.t_min}, {self.t_max}]")
+        if len(self.ts) == 1:
+            return np.broadcast_to(self.ys[0], t_arr.shape + self.ys.shape[1:]).copy()
+
+        idx = np.clip(np.searchsorted(self.ts, tq, side='right') - 1, 0, len(self.ts) - 2)
+        h = (self.ts[idx + 1] - self.ts[idx])[:, None]
+        theta = (tq[:, None] - self.ts[idx][:, None]) / h
+        if self.Q is not None:
+            # theta^1, ..., theta^q -> tổ hợp với hệ số Q_n của từng đoạn
+            powers = np.cumprod(np.repeat(theta, self.Q.shape[1], axis=1), axis=1)
+            val = self.ys[idx] + h * np.einsum('nj,njd->nd', powers, self.Q[idx])
+            return val.reshape(t_arr.shape + self.ys.shape[1:])
+        # Đa thức cơ sở Hermite bậc 3
+        h00 = (1 + 2*theta) * (1 - theta)**2
+        h10 = theta * (1 - theta)**2
+        h01 = theta**2 * (3 - 2*theta)
+        h11 = theta**2 * (theta - 1)
+        val = (h00 * self.ys[idx] + h10 * h * self.fs[idx]
+               + h01 * self.ys[idx + 1] + h11 * h * self.fs[idx + 1])
+        return val.reshape(t_arr.shape + self.ys.shape[1:])
+
 class RungeKuttaSolver:
     def __init__(self, s):
         self.s = s
@@ -16,6 +85,13 @@ class RungeKuttaSolver:
         self.b = np.zeros(s)
         self.c = np.zeros(s)
         self.method_name = f"RK{s}"
+        self.order = s
+        self.b_hat = None       # Trọng số nhúng (chỉ có ở các cặp RK nhúng)
+        self.dense = None       # Hệ số mở rộng liên tục P (s, q) nếu bảng Butcher có
+        self.err_order = None
+        self.fsal = False
+        self.stats = {}
+        self._newton = None     # Trạng thái Newton (Jacobian, LU) của RK ẩn, dùng lại giữa các bước
 
     def _frac(self, val):
         """Helper: Chuyển float sang chuỗi phân số tối giản"""
@@ -28,6 +104,15 @@ class RungeKuttaSolver:
         # :.6f nghĩa là lấy 6 số sau dấu phẩy. Bạn có thể tăng lên .8f hoặc .10f nếu cần chính xác hơn
         return f"{val:.6f}"
 
+    def _fmt_state(self, y, max_items=8):
+        """Helper: Chuỗi trạng thái; hệ lớn chỉ in vài thành phần đầu/cuối."""
+        flat = np.ravel(y)
+        if flat.size <= max_items:
+            return "[" + ", ".join([self._fmt_float(val) for val in flat]) + "]"
+        head = ", ".join([self._fmt_float(val) for val in flat[:3]])
+        tail = ", ".join([self._fmt_float(val) for val in flat[-3:]])
+        return f"[{head}, ..., {tail}] ({flat.size} thành phần)"
+
     def derive_tableau(self, input_alphas=None):
         """Xây dựng bảng Butcher"""
         print("\n" + "="*60)
@@ -84,6 +169,46 @@ class RungeKuttaSolver:
                 self.A = np.array([[0,0,0,0], [0.5,0,0,0], [0,0.5,0,0], [0,0,1,0]])
                 self.method_name = "Classic RK4"
             print(f">> Sử dụng bảng Butcher chuẩn của {self.method_name}")
+
+        # --- TRƯỜNG HỢP s >= 5: GIẢI SỐ HỆ ĐIỀU KIỆN CẤP (CÂY CÓ GỐC) ---
+        else:
+            order = int(input_alphas[0]) if input_alphas else MAX_ORDER.get(self.s, 6)
+            n_cond = sum(len(rooted_trees(q)) for q in range(1, order + 1))
+            print(f">> Input: s = {self.s} nấc, cấp yêu cầu p = {order}")
+            print(f"\n1. Hệ điều kiện cấp: b^T Phi(t) = 1/gamma(t) cho mọi cây có gốc |t| <= {order} ({n_cond} phương trình)")
+            print(f"   Ẩn: {self.s*(self.s-1)//2} hệ số a_ij và {self.s} trọng số b_i")
+            try:
+                tab = build_explicit_tableau(order, self.s)
+            except RuntimeError as e:
+                print(f"Lỗi: {e}")
+                return False
+            print("\n2. Giải số thành công (phần dư < 1e-12)")
+            self.A, self.b, self.c = tab['A'], tab['b'], tab['c']
+            self.order = order
+            self.method_name = tab['name']
+        if self.s <= 4: self.order = self.s
+        # Bảng dựng mới thay toàn bộ bảng cũ (có thể nạp từ load_tableau): không có cặp nhúng,
+        # FSAL hay mở rộng liên tục (dense output dùng Hermite); trạng thái Newton của RK ẩn bỏ đi
+        self.b_hat = None
+        self.err_order = None
+        self.fsal = False
+        self.dense = None
+        self._newton = None
+        return True
+
+    def load_tableau(self, name):
+        """Nạp bảng Butcher có sẵn từ kho (tableaux.py), ví dụ 'bs32', 'rkf45', 'dp54'."""
+        tab = get_tableau(name)
+        self.A, self.b, self.c = tab['A'], tab['b'], tab['c']
+        self.s = len(self.b)
+        self.order = tab['order']
+        self.b_hat = tab.get('b_hat')
+        self.err_order = tab.get('err_order')
+        self.fsal = tab.get('fsal', False)
+        self.dense = tab.get('dense')
+        self.method_name = tab['name']
+        self._newton = None
+        print(f">> Sử dụng bảng Butcher {self.method_name} ({self.s} nấc, cấp {self.order})")
         return True
 
     def print_formula_structure(self):
@@ -177,7 +302,7 @@ class RungeKuttaSolver:
     def analyze_stability(self):
         print("\n[PHÂN TÍCH ỔN ĐỊNH & HỘI TỤ]")
         print("-" * 50)
-        p = self.s
+        p = self.order
         print(f"1. Cấp chính xác (Order): p = {p}")
         print(f"   - Sai số cụt cục bộ: O(h^{p+1})")
         print(f"   - Sai số toàn cục: O(h^{p})")
@@ -187,22 +312,46 @@ class RungeKuttaSolver:
         print(f"2. Kiểm tra tính nhất quán: Tổng b_i = {self._fmt_float(sum_b)} -> {'Đạt' if abs(sum_b-1)<1e-9 else 'Không đạt'}")
         
         rz_str = "1 + z"
-        for i in range(2, self.s + 1):
-            rz_str += f" + z^{i}/{math.factorial(i)}"
+        for i, coef in enumerate(self._stability_poly_coeffs()[2:], start=2):
+            if abs(coef) < 1e-14:
+                continue
+            if abs(coef - 1 / math.factorial(i)) < 1e-12:
+                rz_str += f" + z^{i}/{math.factorial(i)}"
+            else:
+                rz_str += f" + {self._fmt_float(coef)}*z^{i}"
             
         print(f"3. Đa thức ổn định R(z):")
         print(f"   R(z) = {rz_str}")
 
+    def _stability_rational(self):
+        """
+        Hệ số dạng hữu tỉ R(z) = P(z) / Q(z), tính MỘT lần cho mỗi bảng Butcher:
+            Q(z) = det(I - zA),   P(z) = det(I - z(A - 1 b^T))
+        (hệ số bậc cao trước, dùng trực tiếp với np.polyval). Phương pháp hiện có Q = 1.
+        """
+        key = (self.A.tobytes(), self.b.tobytes())
+        cache = getattr(self, '_rz_cache', None)
+        if cache is None or cache[0] != key:
+            if np.allclose(np.triu(self.A), 0):
+                P = np.array(self._stability_poly_coeffs(), dtype=float)[::-1]
+                Q = np.array([1.0])
+            else:
+                # np.poly(M) = [1, a_1, ..., a_s] với det(lambda I - M) = lambda^s + a_1 lambda^(s-1) + ...
+                # => det(I - zM) = 1 + a_1 z + ... + a_s z^s, đảo thứ tự để có hệ số bậc cao trước
+                P = np.real_if_close(np.poly(self.A - np.outer(np.ones(self.s), self.b)))[::-1]
+                Q = np.real_if_close(np.poly(self.A))[::-1]
+            self._rz_cache = (key, P, Q)
+        return self._rz_cache[1], self._rz_cache[2]
+
     def get_stability_function_value(self, z):
-        I = np.eye(self.s)
-        ones = np.ones(self.s)
-        try:
-            M = I - z * self.A
-            inv_vec = np.linalg.solve(M, ones)
-            val = 1 + z * np.dot(self.b, inv_vec)
-            return val
-        except np.linalg.LinAlgError:
-            return np.inf
+        """R(z) của bảng Butcher; z có thể là số hoặc mảng số phức (tính theo lô)."""
+        P, Q = self._stability_rational()
+        z_arr = np.asarray(z)
+        with np.errstate(all='ignore'):
+            num = np.polyval(P, z_arr)
+            den = np.polyval(Q, z_arr)
+            val = np.where(den == 0, np.inf, num / np.where(den == 0, 1, den))
+        return val.item() if val.ndim == 0 else val
 
     def plot_stability_region(self, test_points=[]):
         x = np.linspace(-5, 2, 400)
@@ -210,28 +359,8 @@ class RungeKuttaSolver:
         X, Y = np.meshgrid(x, y)
         Z = X + 1j * Y
         
-        R_abs = np.zeros_like(Z, dtype=float)
-        rows, cols = Z.shape
-        
-        is_explicit = np.allclose(np.triu(self.A), 0)
-        if is_explicit:
-            coeffs = [1.0]
-            curr = np.ones(self.s)
-            for k in range(self.s + 1):
-                val = np.dot(self.b, curr)
-                if k > 0: coeffs.append(val)
-                curr = np.dot(self.A, curr)
-                if np.allclose(curr, 0): break
-            
-            poly_val = np.zeros_like(Z, dtype=complex)
-            for i, c in enumerate(coeffs):
-                if i==0: poly_val += 1
-                else: poly_val += c * (Z**i)
-            R_abs = np.abs(poly_val)
-        else:
-            for r in range(rows):
-                for c in range(cols):
-                    R_abs[r, c] = abs(self.get_stability_function_value(Z[r, c]))
+        # R(z) tính theo lô trên toàn lưới (cả phương pháp hiện lẫn ẩn)
+        R_abs = np.abs(self.get_stability_function_value(Z))
 
         plt.figure(figsize=(8, 6))
         plt.contourf(X, Y, R_abs, levels=[0, 1], colors=['#99ccff'], alpha=0.6)
@@ -273,21 +402,18 @@ class RungeKuttaSolver:
         plt.tight_layout()
         plt.show()
 
-    def check_step_stability(self, f, t, y, h):
+    def check_step_stability(self, f, t, y, h, jac=None):
+        """
+        Kiểm tra |R(h*lambda)| <= 1 với mọi trị riêng lambda của Jacobian tại (t, y).
+        jac(t, y): hàm Jacobian; mặc định lấy từ get_jacobian(f) (giải tích nếu f có biểu thức).
+        Hệ lớn có Jacobian thưa: chỉ xét các trị riêng biên (ARPACK) thay vì toàn bộ phổ.
+        """
         y = np.array(y, dtype=float).flatten()
-        n = len(y)
-        J = np.zeros((n, n))
-        f_val = np.array(f(t, y)).flatten()
-        
-        epsilon = 1e-6
-        for i in range(n):
-            y_perturbed = y.copy()
-            y_perturbed[i] += epsilon
-            f_perturbed = np.array(f(t, y_perturbed)).flatten()
-            J[:, i] = (f_perturbed - f_val) / epsilon
+        if jac is None: jac = get_jacobian(f, sparse=None, t=t, y=y)
+        J = jac(t, y)
             
         try:
-            eigenvalues = np.linalg.eigvals(J)
+            eigenvalues = extreme_eigenvalues(J)
         except:
             return False, "Lỗi linalg"
 
@@ -303,51 +429,620 @@ class RungeKuttaSolver:
         
         return all_stable, max_R
 
-    def solve(self, f, t_span, y0, h):
+    def _stability_poly_coeffs(self):
+        """Hệ số đa thức ổn định R(z) = 1 + sum b^T A^(k-1) 1 z^k của phương pháp hiện."""
+        coeffs = [1.0]
+        curr = np.ones(self.s)   # curr = A^(k-1) 1
+        for k in range(1, self.s + 1):
+            coeffs.append(np.dot(self.b, curr))
+            curr = np.dot(self.A, curr)
+            if np.allclose(curr, 0): break
+        return coeffs
+
+    def _stability_values(self, Z):
+        """Tính R(z) trên cả mảng z cùng lúc."""
+        return self.get_stability_function_value(np.asarray(Z, dtype=complex))
+
+    def check_trajectory_stability(self, f, ts, ys, h, jac=None):
+        """
+        Phiên bản theo lô của check_step_stability cho toàn bộ quỹ đạo:
+        Jacobian của mọi điểm (một lần gọi jac theo lô) -> trị riêng bằng một lần
+        np.linalg.eigvals theo lô -> R(h*lambda) trên cả mảng trị riêng.
+        Trả về (stable: mảng bool (N,), max_R: mảng (N,)).
+        """
+        if jac is None: jac = get_jacobian(f)
+        ts = np.asarray(ts, dtype=float)
+        ys = np.asarray(ys, dtype=float).reshape(len(ts), -1)
+        with np.errstate(all='ignore'):
+            J = np.asarray(jac(ts, ys), dtype=float)
+        N = J.shape[0]
+        stable = np.zeros(N, dtype=bool)
+        max_R = np.full(N, np.inf)
+
+        # Điểm có Jacobian NaN/inf (nghiệm bùng nổ) được coi là không ổn định
+        ok = np.isfinite(J).all(axis=(1, 2))
+        if ok.any():
+            eigenvalues = np.linalg.eigvals(J[ok])
+            R_abs = np.abs(self._stability_values(eigenvalues * h))
+            max_R[ok] = R_abs.max(axis=1)
+            stable[ok] = max_R[ok] <= 1.0 + 1e-4
+        return stable, max_R
+
+    def _saved_steps(self, n_steps, save_every):
+        """Số điểm được lưu khi chỉ giữ 1 điểm sau mỗi save_every bước (luôn giữ điểm đầu và cuối)."""
+        return n_steps // save_every + 1 + (1 if n_steps % save_every else 0)
+
+    def _use_buffers(self, f, size):
+        """Dùng kernel ghi bộ đệm khi vế phải in-place hoặc hệ đủ lớn (chi phí cấp phát vượt chi phí gọi)."""
+        return getattr(f, 'inplace', False) or size >= 256
+
+    def _is_finite_state(self, y):
+        """Kiểm tra gộp một lần: không có NaN/inf và |y| < 1e100 (NaN làm phép so sánh trả về False)."""
+        return np.abs(y).max() < 1e100
+
+    def solve(self, f, t_span, y0, h, dense_output=False, save_every=1, out_file=None,
+              verbose=True, check_every=1, callback=None):
+        """
+        Giải với bước cố định h.
+        Mảng kết quả được cấp phát trước theo n_steps (không append vào list).
+        - save_every: chỉ lưu 1 điểm sau mỗi save_every bước (luôn lưu điểm cuối).
+        - out_file: đường dẫn file .npy; nếu có, quỹ đạo ys được ghi thẳng vào numpy.memmap
+          trên đĩa thay vì RAM (đọc lại bằng np.load(out_file, mmap_mode='r')); lưới ts được
+          ghi vào file đi kèm time_file(out_file). Khi dừng sớm, file được cắt về số điểm hợp lệ.
+        - dense_output=True: trả về thêm đối tượng DenseOutput để tính nghiệm tại t bất kỳ
+          (mở rộng liên tục của bảng Butcher nếu có và save_every=1, ngược lại nội suy Hermite
+          giữa các điểm đã lưu).
+        - verbose=False: chế độ headless, không in gì trong vòng lặp (dùng cho chạy hàng loạt).
+        - check_every: kiểm tra tràn số (NaN/inf/quá lớn) một lần sau mỗi check_every bước;
+          khi phát hiện, kết quả được cắt về lần kiểm tra hợp lệ gần nhất.
+        - callback(step, n_steps, t, y): gọi tại mỗi lần kiểm tra để báo tiến độ.
+        """
+        if not np.allclose(np.triu(self.A), 0):
+            raise ValueError(f"{self.method_name} là phương pháp ẩn, dùng solve_implicit().")
         t0, tf = t_span
         n_steps = int(np.ceil((tf - t0) / h - 1e-9))
+        save_every = max(1, int(save_every))
+        check_every = max(1, int(check_every))
         t = t0; y = np.array(y0, dtype=float)
-        ts = [t]; ys = [y]
+        dim = len(y)
         
-        print(f"\n[BẢNG SỐ LIỆU] Chạy từ t={t0} đến {tf}, h={h}")
-        print(f"{'t':<12} | {'y':<30}")
+        # Cấp phát trước toàn bộ bộ nhớ kết quả
+        n_saved = self._saved_steps(n_steps, save_every)
+        ts = np.empty(n_saved)
+        if out_file is not None:
+            ys = np.lib.format.open_memmap(out_file, mode='w+', dtype=float, shape=(n_saved, dim))
+        else:
+            ys = np.empty((n_saved, dim))
+        # Dense output: mở rộng liên tục (hệ số Q mỗi bước) hoặc Hermite (đạo hàm tại các điểm lưu)
+        use_ext = dense_output and self.dense is not None and save_every == 1
+        Qs = np.empty((n_steps, self.dense.shape[1], dim)) if use_ext else None
+        fs = np.empty((n_saved, dim)) if dense_output and not use_ext else None
+        ts[0] = t; ys[0] = y
+        n_out = 1
+        f_pending = 0 if fs is not None else None  # Điểm đã lưu đang chờ đạo hàm k_1
+        n_good, f_good = n_out, f_pending        # Trạng thái tại lần kiểm tra hợp lệ gần nhất
         
-        # --- SỬA ĐỔI: In dòng đầu tiên với định dạng fix float ---
-        y_str = "[" + ", ".join([self._fmt_float(val) for val in y.flatten()]) + "]"
-        print(f"{t:<12.6f} | {y_str}")
+        if verbose:
+            print(f"\n[BẢNG SỐ LIỆU] Chạy từ t={t0} đến {tf}, h={h}")
+            print(f"{'t':<12} | {'y':<30}")
+            
+            # --- SỬA ĐỔI: In dòng đầu tiên với định dạng fix float ---
+            print(f"{t:<12.6f} | {self._fmt_state(y)}")
         
-        for step in range(n_steps):
-            try:
-                k = np.zeros((self.s, len(y)))
-                for i in range(self.s):
-                    sum_ak = np.zeros_like(y)
-                    for j in range(i): sum_ak += self.A[i, j] * k[j]
-                    
-                    val = f(t + self.c[i]*h, y + h*sum_ak)
-                    if np.any(np.isinf(val)) or np.any(np.isnan(val)) or np.any(np.abs(val) > 1e100):
-                        raise OverflowError("Giá trị đạo hàm quá lớn")
-                    k[i] = val
+        # Kernel bước sinh mã từ bảng Butcher (cache theo bảng). Với vế phải in-place hoặc hệ lớn,
+        # vế phải, stage và y_{n+1} đều ghi vào bộ đệm cấp phát sẵn (hai bộ đệm y luân phiên)
+        buffered = self._use_buffers(f, dim)
+        step_fn = step_kernel(self.A, self.b, self.c, buffered)
+        F = as_inplace(f) if buffered else f
+        k = np.zeros((self.s, dim))
+        tmp = np.zeros((2, dim))
+        y_next = np.empty(dim)
+        with np.errstate(all='ignore'):
+            for step in range(n_steps):
+                y, y_next = step_fn(F, t, y, h, k, tmp, y_next), y
+                if f_pending is not None:
+                    fs[f_pending] = k[0]; f_pending = None
+                t += h
                 
-                sum_bk = np.zeros_like(y)
-                for i in range(self.s): sum_bk += self.b[i] * k[i]
+                if (step + 1) % save_every == 0 or step + 1 == n_steps:
+                    ts[n_out] = t; ys[n_out] = y
+                    if use_ext: Qs[n_out - 1] = self.dense.T @ k
+                    elif dense_output: f_pending = n_out
+                    n_out += 1
                 
-                y_new = y + h * sum_bk
-                
-                if np.any(np.isinf(y_new)) or np.any(np.isnan(y_new)) or np.any(np.abs(y_new) > 1e100):
-                    raise OverflowError("Nghiệm bùng nổ ra vô cùng")
-                    
-                y = y_new
-                t += h
-                ts.append(t); ys.append(y)
+                if (step + 1) % check_every == 0 or step + 1 == n_steps:
+                    if not self._is_finite_state(y):
+                        # Bỏ các điểm sau lần kiểm tra hợp lệ gần nhất
+                        n_out, f_pending = n_good, f_good
+                        if verbose:
+                            print(f"\n[DỪNG SỚM] Phát hiện tràn số tại t={self._fmt_float(t)}. Phương trình có nghiệm tiến tới vô cùng.")
+                            print("Lý do: Nghiệm bùng nổ ra vô cùng")
+                        break
+                    n_good, f_good = n_out, f_pending
+                    if callback is not None: callback(step + 1, n_steps, t, y)
                 
                 # --- SỬA ĐỔI: In trong vòng lặp với định dạng fix float ---
-                if len(ts) < 20 or step % (n_steps//20) == 0:
-                     y_str = "[" + ", ".join([self._fmt_float(val) for val in y.flatten()]) + "]"
-                     print(f"{t:<12.6f} | {y_str}")
-                      
-            except (OverflowError, RuntimeWarning) as e:
-                print(f"\n[DỪNG SỚM] Phát hiện tràn số tại t={self._fmt_float(t)}. Phương trình có nghiệm tiến tới vô cùng.")
-                print(f"Lý do: {e}")
+                if verbose and (step < 18 or step % (n_steps//20) == 0):
+                     print(f"{t:<12.6f} | {self._fmt_state(y)}")
+        
+        ts = ts[:n_out]; ys = ys[:n_out]
+        if out_file is not None:
+            ys.flush()
+            np.save(time_file(out_file), ts)
+            if n_out < n_saved:
+                del ys      # Đóng memmap trước khi cắt file
+                _truncate_npy(out_file, n_out)
+                ys = np.load(out_file, mmap_mode='r+')
+        if use_ext:
+            return ts, ys, DenseOutput(ts, ys, Q=Qs[:n_out - 1])
+        if dense_output:
+            if f_pending is not None: fs[f_pending] = f(ts[-1], ys[-1])
+            return ts, ys, DenseOutput(ts, ys, fs[:n_out])
+        return ts, ys
+
+    def solve_ensemble(self, f, t_span, Y0, h, save_every=1):
+        """
+        Giải đồng thời M điều kiện đầu (ensemble) trong một lần chạy vector hóa.
+        - Y0: mảng (M, dim), mỗi hàng là một điều kiện đầu.
+        - f(t, Y): hàm vế phải vector hóa, nhận Y dạng (M, dim) và trả về (M, dim).
+        - save_every: chỉ lưu 1 điểm sau mỗi save_every bước (giảm bộ nhớ).
+        Trả về (ts, ys) với ys có dạng (M, n_saved, dim).
+        Các thành viên bị tràn số được gán NaN và không ảnh hưởng tới phần còn lại.
+        """
+        t0, tf = t_span
+        n_steps = int(np.ceil((tf - t0) / h - 1e-9))
+        save_every = max(1, int(save_every))
+        Y = np.array(Y0, dtype=float)
+        if Y.ndim == 1: Y = Y[:, None]
+        M, dim = Y.shape
+
+        save_idx = list(range(0, n_steps + 1, save_every))
+        if save_idx[-1] != n_steps: save_idx.append(n_steps)
+        ts = t0 + h * np.array(save_idx, dtype=float)
+        ys = np.empty((M, len(save_idx), dim))
+        ys[:, 0] = Y
+
+        # Stage k_i của toàn bộ ensemble: (s, M, dim)
+        K = np.zeros((self.s, M, dim))
+        tmp = np.zeros((2, M, dim))
+        Y_next = np.empty((M, dim))
+        buffered = self._use_buffers(f, M * dim)
+        step_fn = step_kernel(self.A, self.b, self.c, buffered)
+        F = as_inplace(f) if buffered else f
+        alive = np.ones(M, dtype=bool)
+        out = 1
+        t = t0
+        with np.errstate(all='ignore'):
+            for step in range(1, n_steps + 1):
+                Y, Y_next = step_fn(F, t, Y, h, K, tmp, Y_next), Y
+                t = t0 + step * h
+
+                # Đánh dấu các thành viên bùng nổ (NaN, inf hoặc quá lớn)
+                bad = ~(np.abs(Y) < 1e100).all(axis=1) & alive
+                if bad.any():
+                    Y[bad] = np.nan
+                    alive &= ~bad
+
+                if out < len(save_idx) and step == save_idx[out]:
+                    ys[:, out] = Y
+                    out += 1
+
+        n_dead = M - int(alive.sum())
+        if n_dead:
+            print(f"\n[CẢNH BÁO] {n_dead}/{M} thành viên ensemble bị tràn số (gán NaN).")
+        return ts, ys
+
+    def _error_norm(self, err, y, y_new, rtol, atol):
+        """Chuẩn RMS có trọng số của sai số cục bộ: sqrt(mean((err / (atol + rtol*|y|))^2))"""
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        return np.sqrt(np.mean((err / scale)**2))
+
+    def _initial_step(self, f, t0, y0, f0, rtol, atol):
+        """Chọn bước đầu theo thuật toán của Hairer-Nørsett-Wanner."""
+        q = min(self.order, self.err_order)
+        scale = atol + rtol * np.abs(y0)
+        d0 = np.sqrt(np.mean((y0 / scale)**2))
+        d1 = np.sqrt(np.mean((f0 / scale)**2))
+        h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+        f1 = f(t0 + h0, y0 + h0 * f0)
+        d2 = np.sqrt(np.mean(((f1 - f0) / scale)**2)) / h0
+        if max(d1, d2) <= 1e-15:
+            h1 = max(1e-6, h0 * 1e-3)
+        else:
+            h1 = (0.01 / max(d1, d2)) ** (1.0 / (q + 1))
+        return min(100 * h0, h1)
+
+    def _embedded_stages(self, f, t, y, h, K):
+        """
+        Tính các stage 2..s của cặp nhúng vào K (K[0] = f(t, y) đã có).
+        Trả về (y_new, (Y_{s-1}, Y_s)): đối số của hai stage cuối (dùng ước lượng độ cứng).
+        """
+        Y_prev = Y = y
+        for i in range(1, self.s):
+            Y_prev, Y = Y, y + h * np.dot(self.A[i, :i], K[:i])
+            K[i] = f(t + self.c[i] * h, Y)
+        return y + h * np.dot(self.b, K), (Y_prev, Y)
+
+    def solve_adaptive(self, f, t_span, y0, rtol=1e-6, atol=1e-9, h0=None, h_max=np.inf, max_steps=100000,
+                       dense_output=False, verbose=True):
+        """
+        Giải với bước nhảy thích nghi dùng cặp RK nhúng (nạp bằng load_tableau).
+        Sai số cục bộ err = h * sum((b_i - b_hat_i) k_i) được đo bằng chuẩn RMS
+        theo rtol/atol; bước bị từ chối nếu chuẩn > 1.
+        Với cặp FSAL (bs32, dp54), stage cuối của bước được chấp nhận dùng lại làm k_1.
+        Thống kê số lần gọi f, số bước nhận/từ chối lưu trong self.stats.
+        dense_output=True: trả về thêm DenseOutput để lấy mẫu nghiệm giữa các bước lớn
+        (mở rộng liên tục của cặp nhúng nếu có, ví dụ dp54/bs32; ngược lại Hermite bậc 3).
+        verbose=False: chế độ headless, không in tiêu đề và thống kê.
+        """
+        if self.b_hat is None:
+            raise ValueError(f"{self.method_name} không có nghiệm nhúng. Dùng load_tableau('bs32' | 'rkf45' | 'dp54').")
+
+        t0, tf = t_span
+        t = t0; y = np.array(y0, dtype=float)
+        dim = len(y)
+        q = min(self.order, self.err_order)
+        safety, fac_min, fac_max = 0.9, 0.2, 5.0
+        db = self.b - self.b_hat
+
+        K = np.zeros((self.s, dim))
+        K[0] = f(t, y)
+        nfev = 1
+        if h0 is None:
+            h = self._initial_step(f, t, y, K[0], rtol, atol)
+            nfev += 1
+        else:
+            h = h0
+        ts = [t]; ys = [y.copy()]; fs = [K[0].copy()]; Qs = []
+        n_accept = n_reject = 0
+        rejected_last = False
+
+        if verbose: print(f"\n[BƯỚC THÍCH NGHI] {self.method_name}, t từ {t0} đến {tf}, rtol={rtol}, atol={atol}")
+        while t < tf:
+            if n_accept + n_reject >= max_steps:
+                if verbose: print(f"\n[DỪNG SỚM] Vượt quá {max_steps} bước tại t={self._fmt_float(t)}.")
                 break
-            
-        return np.array(ts), np.array(ys)
\ No newline at end of file
+            if h < 1e-14 * max(1.0, abs(t)):
+                print(f"\n[DỪNG SỚM] Bước nhảy quá nhỏ tại t={self._fmt_float(t)}. Phương trình có thể có nghiệm tiến tới vô cùng.")
+                break
+            h = min(h, h_max)
+            last = h >= tf - t
+            if last: h = tf - t
+
+            with np.errstate(all='ignore'):
+                y_new, _ = self._embedded_stages(f, t, y, h, K)
+                nfev += self.s - 1
+                err = self._error_norm(h * np.dot(db, K), y, y_new, rtol, atol)
+
+            if np.isfinite(err) and err <= 1.0:
+                t = tf if last else t + h
+                y = y_new
+                ts.append(t); ys.append(y.copy())
+                n_accept += 1
+                if dense_output and self.dense is not None:
+                    Qs.append(self.dense.T @ K)
+                if self.fsal:
+                    K[0] = K[-1]
+                else:
+                    K[0] = f(t, y); nfev += 1
+                fs.append(K[0].copy())
+                factor = fac_max if err == 0 else min(fac_max, safety * err ** (-1.0 / (q + 1)))
+                if rejected_last: factor = min(1.0, factor)
+                rejected_last = False
+            else:
+                n_reject += 1
+                factor = fac_min if not np.isfinite(err) else max(fac_min, safety * err ** (-1.0 / (q + 1)))
+                rejected_last = True
+            h *= factor
+
+        self.stats = {'nfev': nfev, 'n_accept': n_accept, 'n_reject': n_reject}
+        if verbose: print(f"Số bước nhận: {n_accept} | Số bước từ chối: {n_reject} | Số lần gọi f: {nfev}")
+        if dense_output:
+            # Chưa bước nào (t_span độ dài 0): DenseOutput hằng y0, không cần hệ số Q
+            if self.dense is not None and Qs:
+                return np.array(ts), np.array(ys), DenseOutput(ts, ys, Q=np.reshape(Qs, (len(Qs), -1, dim)))
+            return np.array(ts), np.array(ys), DenseOutput(ts, ys, fs)
+        return np.array(ts), np.array(ys)
+
+    def _real_stability_boundary(self):
+        """Biên ổn định trên trục thực âm: x lớn nhất sao cho |R(-u)| <= 1 với mọi u trong [0, x]."""
+        u = np.linspace(0, 50, 50001)
+        bad = np.nonzero(np.abs(self._stability_values(-u)) > 1 + 1e-9)[0]
+        return u[bad[0] - 1] if bad.size else np.inf
+
+    def _spectral_radius(self, jac, t, y):
+        """
+        Bán kính phổ của Jacobian tại (t, y) từ các trị riêng biên (extreme_eigenvalues).
+        Trả về None nếu không tính được tin cậy (lỗi linalg, ARPACK không hội tụ, giá trị không hữu hạn).
+        """
+        try:
+            eigenvalues = extreme_eigenvalues(jac(t, y))
+        except Exception:
+            return None
+        if len(eigenvalues) == 0 or not np.all(np.isfinite(eigenvalues)):
+            return None
+        return float(np.max(np.abs(eigenvalues)))
+
+    def solve_auto(self, f, t_span, y0, rtol=1e-6, atol=1e-9, h0=None, max_steps=100000,
+                   bdf_order=5, stiff_steps=15, window=100, verbose=True):
+        """
+        Giải với tự động phát hiện độ cứng, chuyển qua lại giữa hai pha trong quá trình tích phân:
+        - Pha không cứng: cặp RK nhúng hiện tại (như solve_adaptive). Mỗi bước ước lượng
+              rho ~ ||k_s - k_{s-1}|| / ||Y_s - Y_{s-1}||
+          từ hai stage cuối (một bước lặp lũy thừa với Jacobian, không tốn thêm lần gọi f).
+          Nếu h*rho vượt biên ổn định trên trục thực âm của R(z) trong stiff_steps bước liên tiếp
+          (bước bị giới hạn bởi ổn định chứ không phải độ chính xác) -> chuyển sang pha cứng.
+        - Pha cứng: một BDFStepper duy nhất (bdf.py) giữ bậc, lịch sử, Jacobian và LU suốt quá trình;
+          khi vào lại pha cứng, lịch sử được nạp từ các điểm RK gần nhất thay vì khởi động lạnh.
+          Sau mỗi `window` bước BDF, tính bán kính phổ rho từ trị riêng của Jacobian; nếu bước lớn nhất
+          của cửa sổ (hoặc bước kế tiếp của BDF, lấy giá trị lớn hơn) nằm trong nửa miền ổn định của RK
+          (h*rho <= biên/2) -> quay lại pha không cứng. Không tính được rho -> ở lại BDF.
+        - Trễ chuyển pha: pha RK kéo dài chưa tới `window` bước trước khi cứng trở lại nghĩa là
+          lần quay về RK là quá sớm -> cửa sổ kiểm tra của BDF tăng gấp đôi (về lại `window`
+          sau một pha RK đủ dài).
+        Trả về (ts, ys); self.stats gồm nfev, n_accept, n_reject, n_switch,
+        phases = [(t_bắt_đầu, 'rk' | 'bdf'), ...]. verbose=False: không in tiêu đề, thời điểm chuyển pha và thống kê.
+        """
+        from bdf import BDFStepper
+        if self.b_hat is None:
+            raise ValueError(f"{self.method_name} không có nghiệm nhúng. Dùng load_tableau('bs32' | 'rkf45' | 'dp54').")
+
+        t0, tf = t_span
+        t = t0; y = np.array(y0, dtype=float)
+        dim = len(y)
+        q = min(self.order, self.err_order)
+        safety, fac_min, fac_max = 0.9, 0.2, 5.0
+        db = self.b - self.b_hat
+        boundary = self._real_stability_boundary()
+
+        K = np.zeros((self.s, dim))
+        K[0] = f(t, y)
+        nfev = 1
+        if h0 is None:
+            h = self._initial_step(f, t, y, K[0], rtol, atol)
+            nfev += 1
+        else:
+            h = h0
+        ts = [t]; ys = [y.copy()]
+        n_accept = n_reject = n_switch = 0      # bước RK; bước BDF đếm trong bdf
+        phases = [(t0, 'rk')]
+        stiff = False
+        n_stiff = n_nonstiff = 0
+        rejected_last = False
+        bdf = jac = None
+        bdf_window = window
+        n_window = 0; h_max = 0.0               # số bước và bước lớn nhất trong cửa sổ BDF hiện tại
+        rk_start = 0                            # n_accept khi bắt đầu pha RK hiện tại
+
+        if verbose:
+            print(f"\n[TỰ ĐỘNG PHÁT HIỆN ĐỘ CỨNG] {self.method_name} <-> BDF, t từ {t0} đến {tf}, rtol={rtol}, atol={atol}")
+            print(f"   Biên ổn định của {self.method_name} trên trục thực âm: h*rho <= {self._fmt_float(boundary)}")
+        while t < tf:
+            n_steps = n_accept + n_reject + (bdf.n_accept + bdf.n_reject if bdf is not None else 0)
+            if n_steps >= max_steps:
+                if verbose: print(f"\n[DỪNG SỚM] Vượt quá {max_steps} bước tại t={self._fmt_float(t)}.")
+                break
+            if (bdf.h if stiff else h) < 1e-14 * max(1.0, abs(t)):
+                print(f"\n[DỪNG SỚM] Bước nhảy quá nhỏ tại t={self._fmt_float(t)}.")
+                break
+
+            # --- PHA CỨNG: một bước BDF ---
+            if stiff:
+                if not bdf.step(tf): continue
+                h_max = max(h_max, bdf.t - t)
+                t, y = bdf.t, bdf.y
+                ts.append(t); ys.append(y.copy())
+                n_window += 1
+                if n_window < bdf_window or t >= tf: continue
+                # Kiểm tra độ cứng ngay trên trạng thái hiện tại, BDF không bị khởi động lại
+                h_test = max(h_max, bdf.h)
+                n_window = 0; h_max = 0.0
+                rho = self._spectral_radius(jac, t, y)
+                if rho is not None and h_test * rho <= 0.5 * boundary:
+                    stiff = False; n_switch += 1; n_stiff = n_nonstiff = 0
+                    phases.append((t, 'rk'))
+                    K[0] = f(t, y); nfev += 1
+                    h = bdf.h
+                    rk_start = n_accept
+                    if verbose: print(f"   t = {self._fmt_float(t)}: h*rho = {self._fmt_float(h_test * rho)} -> chuyển về {self.method_name}")
+                continue
+
+            # --- PHA KHÔNG CỨNG: một bước RK nhúng ---
+            last = h >= tf - t
+            if last: h = tf - t
+            with np.errstate(all='ignore'):
+                y_new, (Y_prev, Y_last) = self._embedded_stages(f, t, y, h, K)
+                nfev += self.s - 1
+                err = self._error_norm(h * np.dot(db, K), y, y_new, rtol, atol)
+
+            if np.isfinite(err) and err <= 1.0:
+                # Ước lượng độ cứng từ hai stage cuối
+                dY = np.linalg.norm(Y_last - Y_prev)
+                rho = np.linalg.norm(K[-1] - K[-2]) / dY if dY > 0 else 0.0
+                t = tf if last else t + h
+                y = y_new
+                ts.append(t); ys.append(y.copy())
+                n_accept += 1
+                if self.fsal:
+                    K[0] = K[-1]
+                else:
+                    K[0] = f(t, y); nfev += 1
+                factor = fac_max if err == 0 else min(fac_max, safety * err ** (-1.0 / (q + 1)))
+                if rejected_last: factor = min(1.0, factor)
+                rejected_last = False
+
+                if h * rho > 0.9 * boundary:
+                    n_nonstiff = 0; n_stiff += 1
+                    if n_stiff >= stiff_steps and not last:
+                        stiff = True; n_switch += 1
+                        phases.append((t, 'bdf'))
+                        if verbose: print(f"   t = {self._fmt_float(t)}: h*rho = {self._fmt_float(h * rho)} ở {n_stiff} bước liên tiếp -> chuyển sang BDF")
+                        # Pha RK quá ngắn -> lần chuyển về RK trước đó là quá sớm: giãn cửa sổ kiểm tra
+                        bdf_window = 2 * bdf_window if n_switch > 1 and n_accept - rk_start < window else window
+                        if bdf is None:
+                            jac = get_jacobian(f, sparse=None, t=t, y=y)
+                            bdf = BDFStepper(f, t, y, rtol, atol, h, bdf_order, jac)
+                        bdf.restart(ts, ys, h)
+                        n_window = 0; h_max = 0.0
+                        continue
+                else:
+                    n_nonstiff += 1
+                    if n_nonstiff >= 6: n_stiff = 0
+            else:
+                n_reject += 1
+                factor = fac_min if not np.isfinite(err) else max(fac_min, safety * err ** (-1.0 / (q + 1)))
+                rejected_last = True
+            h *= factor
+
+        if bdf is not None:
+            st = bdf.stats
+            nfev += st['nfev']; n_accept += st['n_accept']; n_reject += st['n_reject']
+        self.stats = {'nfev': nfev, 'n_accept': n_accept, 'n_reject': n_reject, 'n_switch': n_switch,
+                      'phases': phases}
+        if verbose: print(f"Số bước nhận: {n_accept} | Số bước từ chối: {n_reject} | Số lần gọi f: {nfev} | Số lần chuyển pha: {n_switch}")
+        return np.array(ts), np.array(ys)
+
+    def _implicit_step(self, f, jac, t, y, h, newton_tol, max_iter):
+        """
+        Một bước RK ẩn: giải hệ stage Z_i = h sum_j a_ij f(t + c_j h, y + Z_j) bằng Newton đơn giản hóa
+            (I - h A (x) J) dZ = -(Z - h A F(Z))
+        Jacobian J và phân rã LU được giữ trong self._newton và dùng lại qua các bước;
+        chỉ phân rã lại khi h đổi, chỉ tính lại J khi hội tụ chậm/thất bại.
+        Nếu vẫn thất bại với J mới tại (t, y), thử lại bằng Newton đầy đủ: J_i tính tại từng stage
+        hiện tại ở mỗi lần lặp và bước Newton bị giới hạn (J(y_n) có thể khác xa J trên cả bước,
+        ví dụ Robertson tại t = 0, khi đó chia nhỏ h cũng không giúp được).
+        Trả về (y_new, converged).
+        """
+        st = self._newton
+        n = len(y)
+        scale = 1.0 + np.abs(y)
+        for attempt in range(2):
+            fresh = False
+            if st['J'] is None:
+                st['J'] = np.asarray(jac(t, y), dtype=float)
+                st['lu'] = None; st['njev'] += 1; fresh = True
+            if not np.all(np.isfinite(st['J'])):
+                break
+            if st['lu'] is None or st['h'] != h:
+                M = np.eye(self.s * n) - h * np.kron(self.A, st['J'])
+                st['lu'] = lu_factor(M); st['h'] = h; st['nlu'] += 1
+
+            Z = np.zeros((self.s, n))
+            F = np.empty((self.s, n))
+            prev = None; theta = 0.0; converged = False
+            for it in range(max_iter):
+                for i in range(self.s):
+                    F[i] = f(t + self.c[i] * h, y + Z[i])
+                st['nfev'] += self.s
+                dZ = lu_solve(st['lu'], (h * np.dot(self.A, F) - Z).ravel()).reshape(self.s, n)
+                Z += dZ
+                st['n_newton'] += 1
+                norm = np.sqrt(np.mean((dZ / scale)**2))
+                if not np.isfinite(norm): break
+                if prev is not None:
+                    theta = norm / prev
+                    if theta >= 1.0: break
+                    if theta / (1 - theta) * norm <= newton_tol:
+                        converged = True; break
+                elif norm <= newton_tol:
+                    converged = True; break
+                prev = norm
+
+            if converged:
+                # Hội tụ chậm (tỉ số lớn hoặc nhiều lần lặp) -> làm mới Jacobian ở bước sau
+                if theta > 0.5 or it >= 4: st['J'] = None
+                # y_{n+1} = y_n + h b^T F = y_n + b^T A^{-1} Z (không tốn thêm lần gọi f)
+                return y + np.dot(st['d'], Z), True
+            st['J'] = None   # Jacobian cũ -> tính lại và thử lần nữa
+            if fresh: break
+        return self._full_newton_step(f, jac, t, y, h, newton_tol, max_iter)
+
+    def _full_newton_step(self, f, jac, t, y, h, newton_tol, max_iter):
+        """
+        Dự phòng của _implicit_step: Newton đầy đủ cho hệ stage,
+            (I - h (A (x) I) diag(J_1, ..., J_s)) dZ = h A F(Z) - Z,  J_i = J(t + c_i h, y + Z_i),
+        tính lại J_i và phân rã ở mỗi lần lặp; |dZ| (theo 1 + |y|) bị chặn bởi 1.
+        J cache bị xóa để bước sau bắt đầu lại từ J tại điểm mới.
+        """
+        st = self._newton
+        n = len(y)
+        scale = 1.0 + np.abs(y)
+        AI = np.kron(self.A, np.eye(n))
+        Z = np.zeros((self.s, n))
+        F = np.empty((self.s, n))
+        Jd = np.zeros((self.s * n, self.s * n))
+        prev = None
+        st['J'] = None; st['lu'] = None
+        for it in range(2 * max_iter):
+            for i in range(self.s):
+                F[i] = f(t + self.c[i] * h, y + Z[i])
+                Jd[i * n:(i + 1) * n, i * n:(i + 1) * n] = jac(t + self.c[i] * h, y + Z[i])
+            st['nfev'] += self.s; st['njev'] += self.s; st['nlu'] += 1
+            G = h * np.dot(self.A, F) - Z
+            if not (np.all(np.isfinite(G)) and np.all(np.isfinite(Jd))): break
+            dZ = np.linalg.solve(np.eye(self.s * n) - h * AI @ Jd, G.ravel()).reshape(self.s, n)
+            norm = np.sqrt(np.mean((dZ / scale)**2))
+            if not np.isfinite(norm): break
+            if norm > 1.0:
+                dZ /= norm; norm = 1.0
+            Z += dZ
+            st['n_newton'] += 1
+            # Hội tụ bậc hai: dừng khi bước đủ nhỏ và đang giảm
+            if norm <= newton_tol or (prev is not None and norm < prev and norm ** 2 / prev <= newton_tol):
+                return y + np.dot(st['d'], Z), True
+            prev = norm
+        return y, False
+
+    def _implicit_advance(self, f, jac, t, y, h, newton_tol, max_iter, depth=0):
+        """Tiến một bước h; nếu Newton không hội tụ thì chia đôi bước con (tối đa 6 lần) để giữ lưới t."""
+        y_new, ok = self._implicit_step(f, jac, t, y, h, newton_tol, max_iter)
+        if ok or depth >= 6: return y_new, ok
+        y_mid, ok = self._implicit_advance(f, jac, t, y, h / 2, newton_tol, max_iter, depth + 1)
+        if not ok: return y, False
+        return self._implicit_advance(f, jac, t + h / 2, y_mid, h / 2, newton_tol, max_iter, depth + 1)
+
+    def solve_implicit(self, f, t_span, y0, h, jac=None, newton_tol=1e-10, max_iter=10,
+                       save_every=1, verbose=True):
+        """
+        Giải hệ cứng bằng RK ẩn toàn phần (nạp bằng load_tableau: 'gauss2', 'gauss4', 'gauss6',
+        'radau3', 'radau5') với bước cố định h. Bước nhảy chỉ bị giới hạn bởi độ chính xác,
+        không bởi miền ổn định (Gauss: A-ổn định, Radau IIA: L-ổn định).
+        Bước nào Newton không hội tụ sẽ được chia nhỏ bên trong, lưới kết quả vẫn là t0 + k*h;
+        nếu vẫn không hội tụ, solver dừng và luôn in thông báo (kể cả khi verbose=False).
+        jac(t, y): Jacobian của f; mặc định lấy từ get_jacobian(f).
+        Thống kê (nfev, njev, nlu, n_newton) lưu trong self.stats.
+        """
+        if jac is None: jac = get_jacobian(f)
+        t0, tf = t_span
+        n_steps = int(np.ceil((tf - t0) / h - 1e-9))
+        save_every = max(1, int(save_every))
+        t = t0; y = np.array(y0, dtype=float)
+        
+        n_saved = self._saved_steps(n_steps, save_every)
+        ts = np.empty(n_saved); ys = np.empty((n_saved, len(y)))
+        ts[0] = t; ys[0] = y
+        n_out = 1
+        
+        self._newton = {'J': None, 'lu': None, 'h': None, 'd': np.linalg.solve(self.A.T, self.b),
+                        'nfev': 0, 'njev': 0, 'nlu': 0, 'n_newton': 0}
+        if verbose:
+            print(f"\n[RK ẨN] {self.method_name}, t từ {t0} đến {tf}, h={h}")
+        
+        with np.errstate(all='ignore'):
+            for step in range(n_steps):
+                y_new, ok = self._implicit_advance(f, jac, t, y, h, newton_tol, max_iter)
+                if not ok or not self._is_finite_state(y_new):
+                    # Luôn báo (kể cả headless), như lỗi bước quá nhỏ của solve_adaptive
+                    print(f"\n[DỪNG SỚM] Newton không hội tụ tại t={self._fmt_float(t)}. Hãy giảm bước h.")
+                    break
+                y = y_new
+                t += h
+                if (step + 1) % save_every == 0 or step + 1 == n_steps:
+                    ts[n_out] = t; ys[n_out] = y
+                    n_out += 1
+        
+        st = self._newton
+        self.stats = {k: st[k] for k in ('nfev', 'njev', 'nlu', 'n_newton')}
+        if verbose:
+            print(f"Số lần gọi f: {st['nfev']} | Số Jacobian: {st['njev']} | Số lần phân rã LU: {st['nlu']}")
+        return ts[:n_out], ys[:n_out]
@@ -0,0 +1,136 @@
+import argparse
+import contextlib
+import csv
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from problems import load_problem_file, problem_from_spec
+
+# --- CHẠY HÀNG LOẠT (KHÔNG TƯƠNG TÁC) TỪ FILE ĐỀ BÀI ---
+# Đọc các file đề bài JSON/TOML (xem problems.load_problem_file), giải đồng thời trên process pool,
+# ghi mỗi nghiệm ra <out_dir>/<name>.npz (t, y, expressions, y0, t_span, h, method)
+# và bảng tổng hợp <out_dir>/summary.csv.
+#
+# Trường 'method' của mỗi bài (mặc định 'rk'):
+#   'rk'        : RK hiện bước cố định; 'tableau' là tên bảng (ví dụ 'dp54') hoặc số nấc s
+#                 (dùng derive_tableau, kèm 'alphas' nếu cần); mặc định Classic RK4
+#   'adaptive'  : bước thích nghi với cặp nhúng 'tableau' (mặc định 'dp54'), dùng rtol/atol
+#   'auto'      : tự phát hiện độ cứng, RK nhúng <-> BDF (solve_auto), dùng rtol/atol
+#   'implicit'  : RK ẩn toàn phần 'tableau' (mặc định 'radau5')
+#   'bdf_adaptive': BDF biến bước biến bậc, dùng rtol/atol, max_order
+#   'euler_hien' | 'euler_an' | 'hinh_thang' | 'bdf1'..'bdf6' : Euler.py
+#   'adams{k}'  : AB-AM bậc k của AM.py ('mode' như 'PECE')
+
+def _rk_solver(spec, default):
+    from RungeKutta import RungeKuttaSolver
+    tableau = spec.get('tableau', default)
+    if isinstance(tableau, int):
+        solver = RungeKuttaSolver(tableau)
+        if solver.derive_tableau(spec.get('alphas', [])) is False:
+            raise ValueError(f"Không dựng được bảng Butcher RK{tableau} với alphas={spec.get('alphas')}")
+    else:
+        solver = RungeKuttaSolver(1)
+        solver.load_tableau(tableau)
+    return solver
+
+def _solve(spec, f, t_span, y0, h):
+    """Giải một bài theo spec['method'], trả về (ts, ys, nhãn phương pháp)."""
+    method = str(spec.get('method', 'rk')).lower()
+    rtol, atol = float(spec.get('rtol', 1e-6)), float(spec.get('atol', 1e-9))
+    if method == 'rk':
+        solver = _rk_solver(spec, 4)
+        return (*solver.solve(f, t_span, y0, h, verbose=False), solver.method_name)
+    if method in ('adaptive', 'auto'):
+        solver = _rk_solver(spec, 'dp54')
+        run = solver.solve_auto if method == 'auto' else solver.solve_adaptive
+        return (*run(f, t_span, y0, rtol=rtol, atol=atol, h0=h, verbose=False), f"{solver.method_name} ({method})")
+    if method == 'implicit':
+        solver = _rk_solver(spec, 'radau5')
+        return (*solver.solve_implicit(f, t_span, y0, h, verbose=False), solver.method_name)
+    if method == 'bdf_adaptive':
+        from bdf import solve_bdf_adaptive
+        ts, ys = solve_bdf_adaptive(f, t_span, y0, rtol=rtol, atol=atol, h0=h,
+                                    max_order=int(spec.get('max_order', 5)), verbose=False)
+        return ts, ys, 'BDF (biến bước)'
+    from convergence import make_method
+    label, run = make_method(method, order=spec.get('order', 4), mode=spec.get('mode', 'PECE'))
+    return (*run(f, t_span, y0, h), label)
+
+def run_problem(spec, out_dir):
+    """
+    Worker: giải một bài ở chế độ headless, ghi <out_dir>/<name>.npz.
+    Trả về một dòng của bảng tổng hợp (lỗi được ghi vào cột status, không làm dừng cả lô).
+    """
+    row = {'name': spec['name'], 'method': spec.get('method', 'rk'), 'status': 'ok',
+           'n_points': 0, 't_end': '', 'y_end': '', 'time_s': 0.0, 'file': ''}
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            f, t_span, y0, h, expressions, param_name = problem_from_spec(spec)
+            ts, ys, label = _solve(spec, f, t_span, y0, h)
+        ts = np.asarray(ts, dtype=float)
+        ys = np.asarray(ys, dtype=float).reshape(len(ts), -1)
+        path = os.path.join(out_dir, f"{spec['name']}.npz")
+        np.savez_compressed(path, t=ts, y=ys, expressions=np.array(expressions), y0=np.array(y0),
+                            t_span=np.array(t_span), h=h, method=label)
+        row.update(method=label, n_points=len(ts), t_end=ts[-1], file=path,
+                   y_end=" ".join(f"{v:.10g}" for v in ys[-1]))
+        if ts[-1] < t_span[1] - 1e-9 * max(1.0, abs(t_span[1])):
+            row['status'] = 'stopped_early'
+    except Exception as e:
+        row['status'] = f"error: {type(e).__name__}: {e}"
+    row['time_s'] = time.perf_counter() - start
+    return row
+
+def run_batch(paths, out_dir='batch_out', max_workers=None, verbose=True):
+    """
+    Chạy toàn bộ bài trong các file đề bài `paths` trên process pool.
+    Trả về list các dòng tổng hợp (theo thứ tự trong file), đồng thời ghi <out_dir>/summary.csv.
+    """
+    if isinstance(paths, str): paths = [paths]
+    specs = [spec for path in paths for spec in load_problem_file(path)]
+    names = [spec['name'] for spec in specs]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"Trùng tên bài: {sorted(duplicates)} (file .npz sẽ ghi đè nhau)")
+    os.makedirs(out_dir, exist_ok=True)
+
+    if verbose:
+        print(f"\n[CHẠY HÀNG LOẠT] {len(specs)} bài từ {len(paths)} file -> {out_dir}")
+    rows = [None] * len(specs)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_problem, spec, out_dir): i for i, spec in enumerate(specs)}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            rows[futures[fut]] = row = fut.result()
+            if verbose:
+                print(f"   [{done}/{len(specs)}] {row['name']}: {row['status']} ({row['time_s']:.2f}s)")
+
+    summary = os.path.join(out_dir, 'summary.csv')
+    with open(summary, 'w', newline='', encoding='utf-8') as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0].keys()) if rows else ['name'])
+        writer.writeheader()
+        writer.writerows(rows)
+    if verbose:
+        print_summary(rows)
+        print(f"\nTổng thời gian: {time.perf_counter() - start:.2f}s | Bảng tổng hợp: {summary}")
+    return rows
+
+def print_summary(rows):
+    """In bảng tổng hợp kết quả của lô."""
+    print(f"\n{'Bài':<20} | {'Phương pháp':<32} | {'Trạng thái':<14} | {'Số điểm':<8} | {'Thời gian (s)':<12}")
+    print("-" * 99)
+    for row in rows:
+        status = row['status'] if len(row['status']) <= 14 else row['status'][:11] + '...'
+        print(f"{row['name']:<20} | {str(row['method']):<32} | {status:<14} | {row['n_points']:<8} | {row['time_s']:<12.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Giải hàng loạt bài toán ODE từ file đề bài JSON/TOML.")
+    parser.add_argument('files', nargs='+', help="các file đề bài .json / .toml")
+    parser.add_argument('-o', '--out-dir', default='batch_out', help="thư mục kết quả (mặc định batch_out)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="số process (mặc định số CPU)")
+    args = parser.parse_args()
+    run_batch(args.files, args.out_dir, args.workers)
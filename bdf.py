@@ -0,0 +1,267 @@
+import contextlib
+import io
+import math
+
+import numpy as np
+import scipy.sparse as sps
+from jacobian import get_jacobian
+from newton import NewtonSolver
+
+# --- CÔNG THỨC LÙI BDF (BACKWARD DIFFERENTIATION FORMULAS) BẬC 1..6 ---
+# BDF bậc k trên lưới bất kỳ: đạo hàm tại t_{n+1} của đa thức nội suy Lagrange qua
+# (t_{n+1}, y_{n+1}), (t_n, y_n), ..., (t_{n+1-k}, y_{n+1-k}) bằng f(t_{n+1}, y_{n+1}):
+#     sum_j L_j'(t_{n+1}) y_{n+1-j} = f(t_{n+1}, y_{n+1})
+# <=> y_{n+1} - gh * f(t_{n+1}, y_{n+1}) - psi = 0, giải bằng NewtonSolver.
+
+MAX_BDF_ORDER = 6   # BDF bậc >= 7 không còn ổn định không
+
+def bdf_coefficients(t_new, t_hist):
+    """
+    Hệ số BDF biến bước: alpha_j = L_j'(t_new) với các nút [t_new, t_hist...].
+    Trả về (gh, beta) sao cho y_new = gh * f(t_new, y_new) + sum_j beta_j * y_hist[j].
+    """
+    nodes = np.concatenate(([t_new], np.asarray(t_hist, dtype=float)))
+    k = len(nodes) - 1
+    alpha = np.empty(k + 1)
+    alpha[0] = np.sum(1.0 / (t_new - nodes[1:]))
+    for j in range(1, k + 1):
+        others = np.delete(nodes, [0, j])
+        alpha[j] = np.prod(t_new - others) / np.prod(nodes[j] - np.delete(nodes, j))
+    return 1.0 / alpha[0], -alpha[1:] / alpha[0]
+
+def _lagrange_weights(nodes, x):
+    """Trọng số nội suy Lagrange tại x: p(x) = sum_j w_j y_j."""
+    nodes = np.asarray(nodes, dtype=float)
+    w = np.empty(len(nodes))
+    for j in range(len(nodes)):
+        others = np.delete(nodes, j)
+        w[j] = np.prod(x - others) / np.prod(nodes[j] - others)
+    return w
+
+def _divided_difference(nodes, values):
+    """Tỉ sai phân [x_0, ..., x_m] y = sum_j y_j / prod_{i != j} (x_j - x_i)."""
+    nodes = np.asarray(nodes, dtype=float)
+    w = np.array([1.0 / np.prod(nodes[j] - np.delete(nodes, j)) for j in range(len(nodes))])
+    return np.tensordot(w, np.asarray(values), axes=1)
+
+def _wrms(v, scale):
+    return np.sqrt(np.mean((v / scale) ** 2))
+
+def _radau_start(f, jac, ts, ys, h, n_start, order, newton_tol):
+    """
+    Điền ys[1..n_start] bằng Radau IIA bậc 5 (L-ổn định, dùng được cho bài toán cứng).
+    Sai số điểm khởi tạo phải nhỏ hơn sai số toàn cục O(h^order) của BDF: bước con h/m với
+    m ~ h^(-(order-4)/5) cho sai số cục bộ ~ h^(order+1), cộng thêm hệ số an toàn 2.
+    Dung sai cố định (như solve_bdf_adaptive trước đây) tạo sàn sai số ~1e-9 cho BDF4-6.
+    Radau giải hệ đặc s*n x s*n: với Jacobian thưa (hệ lớn) hoặc khi Radau dừng sớm,
+    các điểm còn lại tính bằng solve_bdf_adaptive với dung sai chặt.
+    Trả về số lần gọi f.
+    """
+    if n_start <= 0:
+        return 0
+    n_ok = 0; nfev = 0
+    if not sps.issparse(jac(ts[0], ys[0])):
+        from RungeKutta import RungeKuttaSolver
+        solver = RungeKuttaSolver(1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            solver.load_tableau('radau5')
+        m = 2 * max(1, math.ceil(h ** (-(order - 4) / 5.0)))
+        # Radau dừng sớm không phải lỗi ở đây (có dự phòng bên dưới): bỏ thông báo của nó
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, y_sub = solver.solve_implicit(f, (ts[0], ts[n_start]), ys[0], h / m, jac=jac,
+                                             newton_tol=newton_tol, save_every=m, verbose=False)
+        n_ok = min(len(y_sub) - 1, n_start)
+        ys[1:n_ok + 1] = y_sub[1:n_ok + 1]
+        nfev = solver.stats['nfev']
+    for i in range(n_ok, n_start):
+        _, y_seg, st = solve_bdf_adaptive(f, (ts[i], ts[i + 1]), ys[i], rtol=1e-10, atol=1e-12,
+                                          max_order=order, jac=jac, return_stats=True, verbose=False)
+        ys[i + 1] = y_seg[-1]
+        nfev += st['nfev']
+    return nfev
+
+def solve_bdf(f, t_span, y0, h, order=2, jac=None, newton_tol=1e-10, return_stats=False):
+    """
+    BDF bậc `order` (1..6) với bước cố định h.
+    k-1 điểm khởi tạo đầu tiên được tính bằng Radau IIA bậc 5 với bước con thu nhỏ theo h
+    (_radau_start). Hệ số BDF và LU của ma trận Newton là hằng số
+    trên toàn bộ lưới -> thường chỉ một lần phân rã cho cả quá trình.
+    Nếu Newton (kể cả dự phòng Newton đầy đủ) không hội tụ, dừng sớm: ts, ys bị cắt tại
+    điểm cuối cùng đã hội tụ và stats['n_newton_fail'] = 1.
+    Trả về (ts, ys) hoặc thêm stats nếu return_stats=True.
+    """
+    if not 1 <= order <= MAX_BDF_ORDER:
+        raise ValueError(f"BDF chỉ hỗ trợ bậc 1..{MAX_BDF_ORDER}, nhận {order}")
+    t0, tf = t_span
+    N = int(np.ceil((tf - t0) / h - 1e-9))
+    ts = t0 + h * np.arange(N + 1)
+    y0 = np.array(y0, dtype=float)
+    ys = np.empty((N + 1, len(y0)))
+    ys[0] = y0
+
+    # Dựng Jacobian (dò mẫu thưa nếu cần) một lần, dùng chung cho cả giai đoạn khởi tạo
+    if jac is None: jac = get_jacobian(f, sparse=None, t=t0, y=y0)
+    newton = NewtonSolver(f, jac, tol=newton_tol)
+    n_start = min(order - 1, N)
+    nfev_start = _radau_start(f, newton.jac, ts, ys, h, n_start, order, newton_tol)
+
+    # Lưới đều: hệ số BDF và trọng số dự báo là hằng số
+    gh, beta = bdf_coefficients(h, -h * np.arange(order))
+    w_pred = {m: _lagrange_weights(-h * np.arange(m), h) for m in (order, order + 1)}
+    n_done = N
+    for n in range(n_start, N):
+        m = min(order + 1, n + 1)
+        y_pred = np.dot(w_pred[m], ys[n::-1][:m])
+        psi = np.dot(beta, ys[n::-1][:order])
+        y_new, ok = newton.solve(ts[n + 1], psi, gh, y_pred)
+        if not ok:
+            # Không ghi điểm lặp chưa hội tụ vào nghiệm: dừng và cắt kết quả tại t_n
+            print(f"[DỪNG SỚM] Newton không hội tụ tại t={ts[n + 1]:.6f} (BDF{order}, h = {h}). Hãy giảm bước h.")
+            n_done = n
+            break
+        ys[n + 1] = y_new
+    ts, ys = ts[:n_done + 1], ys[:n_done + 1]
+
+    stats = dict(newton.stats, nfev=newton.stats['nfev'] + nfev_start, n_steps=n_done,
+                 n_newton_fail=int(n_done < N))
+    if return_stats:
+        return ts, ys, stats
+    return ts, ys
+
+class BDFStepper:
+    """
+    Trạng thái của BDF biến bước, biến bậc (1..max_order) với hệ số tính lại theo lưới thực (Lagrange),
+    tiến từng bước một để có thể dừng và tiếp tục mà không mất bậc, lịch sử, Jacobian và LU.
+    - Dự báo: ngoại suy đa thức qua k+1 điểm gần nhất; sai số cục bộ err ~ ||y - y_pred|| / (k+1).
+    - Sau k+1 bước ở bậc k, ước lượng sai số bậc k-1 và k+1 từ tỉ sai phân của lịch sử
+      và chọn bậc cho bước dài nhất.
+    - Newton dùng chung (NewtonSolver): J giữ qua các bước, LU chỉ phân rã lại khi gh đổi nhiều.
+    step(tf) thử một bước (không vượt tf), trả về True nếu bước được nhận (self.t, self.y mới).
+    restart(ts, ys, h) khởi động lại từ các điểm quỹ đạo gần nhất (ví dụ do RK tính), giữ nguyên Newton.
+    """
+    def __init__(self, f, t0, y0, rtol=1e-6, atol=1e-9, h0=None, max_order=5, jac=None):
+        self.f = f
+        self.rtol, self.atol = rtol, atol
+        self.max_order = max(1, min(int(max_order), MAX_BDF_ORDER))
+        self.newton = NewtonSolver(f, jac, gh_rtol=0.3)
+        self.nfev = 0
+        self.n_accept = self.n_reject = 0
+        self.restart([t0], [y0], h0)
+
+    def restart(self, ts, ys, h=None):
+        """
+        Đặt lại lịch sử từ các điểm (ts, ys) theo thời gian tăng dần (điểm cuối là trạng thái hiện tại),
+        bậc về 1. Chỉ giữ max_order + 2 điểm cuối; h=None -> ước lượng bước đầu.
+        """
+        n = self.max_order + 2
+        self.hist_t = [float(t) for t in ts[-n:]][::-1]     # mới nhất ở đầu danh sách
+        self.hist_y = [np.array(y, dtype=float) for y in ys[-n:]][::-1]
+        self.t, self.y = self.hist_t[0], self.hist_y[0]
+        self.f0 = None
+        if len(self.hist_t) == 1 or h is None:
+            self.f0 = np.asarray(self.f(self.t, self.y), dtype=float)
+            self.nfev += 1
+        if h is None:
+            scale = self.atol + self.rtol * np.abs(self.y)
+            d0, d1 = _wrms(self.y, scale), _wrms(self.f0, scale)
+            h = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+        self.h = h
+        self.k = 1
+        self.k_wait = self.k + 1
+        self.rejected_last = False
+
+    @property
+    def stats(self):
+        return dict(self.newton.stats, nfev=self.newton.stats['nfev'] + self.nfev,
+                    n_accept=self.n_accept, n_reject=self.n_reject)
+
+    def step(self, tf):
+        t, y, h, k = self.t, self.y, self.h, self.k
+        hist_t, hist_y = self.hist_t, self.hist_y
+        last = t + h >= tf
+        t_new = tf if last else t + h
+
+        k_eff = min(k, len(hist_t))
+        gh, beta = bdf_coefficients(t_new, hist_t[:k_eff])
+        psi = np.dot(beta, hist_y[:k_eff])
+        n_pred = min(k_eff + 1, len(hist_t))
+        if n_pred == 1:
+            y_pred = hist_y[0] + (t_new - t) * self.f0
+        else:
+            y_pred = np.dot(_lagrange_weights(hist_t[:n_pred], t_new), hist_y[:n_pred])
+
+        scale = self.atol + self.rtol * np.abs(y_pred)
+        y_new, ok = self.newton.solve(t_new, psi, gh, y_pred, scale=scale, tol=0.03)
+        if not ok:
+            self.n_reject += 1; self.rejected_last = True
+            self.h = h * 0.25
+            self.k_wait = k + 1
+            return False
+
+        scale = self.atol + self.rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err = _wrms(y_new - y_pred, scale) / (k_eff + 1)
+        if err > 1.0:
+            self.n_reject += 1; self.rejected_last = True
+            self.h = h * max(0.2, 0.9 * err ** (-1.0 / (k_eff + 1)))
+            self.k_wait = k + 1
+            return False
+
+        # Chấp nhận bước
+        hist_t.insert(0, t_new); hist_y.insert(0, y_new)
+        del hist_t[self.max_order + 2:], hist_y[self.max_order + 2:]
+        self.t, self.y = t_new, y_new
+        self.n_accept += 1
+        if last: return True
+
+        # Chọn bậc / bước tiếp theo
+        eta = 0.9 * err ** (-1.0 / (k_eff + 1)) if err > 0 else 5.0
+        self.k_wait -= 1
+        if self.k_wait <= 0 and k_eff == k:
+            k_new = k
+            if k > 1:
+                dd = _divided_difference(hist_t[:k + 1], hist_y[:k + 1])
+                err_dn = _wrms(math.factorial(k) * h ** k * dd, scale) / k
+                eta_dn = 0.9 * err_dn ** (-1.0 / k) / 1.2 if err_dn > 0 else 5.0
+                if eta_dn > eta: eta, k_new = eta_dn, k - 1
+            if k < self.max_order and len(hist_t) >= k + 3:
+                dd = _divided_difference(hist_t[:k + 3], hist_y[:k + 3])
+                err_up = _wrms(math.factorial(k + 2) * h ** (k + 2) * dd, scale) / (k + 2)
+                eta_up = 0.9 * err_up ** (-1.0 / (k + 2)) / 1.4 if err_up > 0 else 5.0
+                if eta_up > eta: eta, k_new = eta_up, k + 1
+            if k_new != k:
+                self.k = k_new; self.k_wait = k_new + 1
+        if self.rejected_last: eta = min(1.0, eta)
+        self.rejected_last = False
+        # Giữ nguyên h khi eta gần 1 để dùng lại LU
+        if eta >= 1.2 or eta < 1.0:
+            self.h = h * min(5.0, max(0.2, eta))
+        return True
+
+def solve_bdf_adaptive(f, t_span, y0, rtol=1e-6, atol=1e-9, h0=None, max_order=5, jac=None,
+                       max_steps=100000, return_stats=False, verbose=True):
+    """
+    BDF biến bước, biến bậc (1..max_order) trên t_span bằng BDFStepper.
+    Trả về (ts, ys) hoặc thêm stats nếu return_stats=True.
+    """
+    t0, tf = t_span
+    bdf = BDFStepper(f, t0, y0, rtol, atol, h0, max_order, jac)
+    bdf.h = min(bdf.h, tf - t0)
+    ts = [bdf.t]; ys = [bdf.y.copy()]
+
+    while bdf.t < tf:
+        if bdf.n_accept + bdf.n_reject >= max_steps:
+            if verbose: print(f"[DỪNG SỚM] Vượt quá {max_steps} bước tại t={bdf.t:.6f}.")
+            break
+        if bdf.h < 1e-14 * max(1.0, abs(bdf.t)):
+            print(f"[DỪNG SỚM] Bước nhảy quá nhỏ tại t={bdf.t:.6f}.")
+            break
+        if bdf.step(tf):
+            ts.append(bdf.t); ys.append(bdf.y.copy())
+
+    stats = bdf.stats
+    if verbose:
+        print(f"Số bước nhận: {stats['n_accept']} | Số bước từ chối: {stats['n_reject']} | Số lần gọi f: {stats['nfev']}"
+              f" | Số lần tính J: {stats['njev']} | Số lần phân rã LU: {stats['nlu']}")
+    if return_stats:
+        return np.array(ts), np.array(ys), stats
+    return np.array(ts), np.array(ys)
@@ -0,0 +1,169 @@
+import contextlib
+import io
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+# --- BỘ MÁY KHẢO SÁT HỘI TỤ (CẤP QUAN SÁT ĐƯỢC) ---
+# Chạy một hay nhiều phương pháp trên thang bước h, h/r, h/r^2, ... song song trên process pool,
+# so với nghiệm tham chiếu solve_ivp (cache theo bài toán) và lập bảng cấp hội tụ quan sát.
+# Phương pháp là hàm method(f, t_span, y0, h) -> (ts, ys) pickle được (xem make_method).
+
+EULER_METHODS = ('euler_hien', 'euler_an', 'hinh_thang')
+
+# Các solver được import trong hàm để tránh import vòng (Euler.py dùng lại module này)
+def _run_euler(method, f, t_span, y0, h):
+    from Euler import solve_ode_core
+    return solve_ode_core(method, f, t_span, y0, h)
+
+def _run_adams(order, mode, f, t_span, y0, h):
+    from AM import solve_adams_predictor_corrector
+    return solve_adams_predictor_corrector(f, np.asarray(y0, dtype=float), t_span, h, order, mode=mode)
+
+def _run_rk(solver, f, t_span, y0, h):
+    if not np.allclose(np.triu(solver.A), 0):
+        return solver.solve_implicit(f, t_span, y0, h, verbose=False)
+    return solver.solve(f, t_span, y0, h, verbose=False)
+
+def make_method(spec, **opts):
+    """
+    Chuyển mô tả phương pháp thành (nhãn, hàm giải pickle được):
+    - 'euler_hien' | 'euler_an' | 'hinh_thang' | 'bdf1'..'bdf6' -> Euler.solve_ode_core
+    - 'adams{k}' (ví dụ 'adams4', tùy chọn mode='PECE')          -> AM.solve_adams_predictor_corrector
+    - tên bảng Butcher ('dp54', 'radau5', ...) hoặc RungeKuttaSolver -> RungeKutta
+    - (nhãn, hàm) hoặc hàm bất kỳ method(f, t_span, y0, h)
+    """
+    if isinstance(spec, tuple):
+        return spec
+    if callable(spec) and not hasattr(spec, 'load_tableau'):
+        return getattr(spec, '__name__', 'method'), spec
+    if hasattr(spec, 'load_tableau'):
+        return spec.method_name, partial(_run_rk, spec)
+    name = spec.lower()
+    if name in EULER_METHODS or name.startswith('bdf'):
+        return name, partial(_run_euler, name)
+    if name.startswith('adams'):
+        order = int(name[5:] or opts.get('order', 4))
+        mode = opts.get('mode', 'PECE')
+        return f"AB{order}-AM{order} ({mode})", partial(_run_adams, order, mode)
+    from RungeKutta import RungeKuttaSolver
+    solver = RungeKuttaSolver(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver.load_tableau(name)
+    return solver.method_name, partial(_run_rk, solver)
+
+# --- NGHIỆM THAM CHIẾU (CACHE THEO BÀI TOÁN) ---
+
+_reference_cache = {}
+
+def problem_key(f, t_span, y0, rtol):
+    """
+    Khóa cache của bài toán: với ExpressionRHS dùng nội dung biểu thức (cùng bài toán -> cùng khóa,
+    kể cả khi là đối tượng khác nhau); hàm khác dùng chính đối tượng hàm.
+    """
+    expressions = getattr(f, 'expressions', None)
+    f_key = (tuple(expressions), getattr(f, 'param_name', None), getattr(f, 'param_val', 0)) \
+        if expressions is not None else f
+    return hash((f_key, tuple(map(float, t_span)), tuple(np.ravel(y0).astype(float)), rtol))
+
+# Sai số thực của nghiệm tham chiếu ~ vài lần rtol * cỡ nghiệm; sai số của phương pháp dưới
+# REF_FLOOR * ref_rtol * max(1, |y|) bị nhiễu bởi chính sai số tham chiếu -> không tính cấp hội tụ
+REF_FLOOR = 100
+
+def reference_solution(f, t_span, y0, rtol=1e-13):
+    """
+    Nghiệm tham chiếu liên tục (OdeSolution) của solve_ivp, tính một lần cho mỗi bài toán.
+    DOP853 với atol theo cỡ nghiệm (rtol * 1e-2 * max|y0|) để sai số tuyệt đối không bị atol chi phối.
+    """
+    key = problem_key(f, t_span, y0, rtol)
+    if key not in _reference_cache:
+        y0 = np.asarray(y0, dtype=float)
+        atol = rtol * 1e-2 * max(1.0, np.max(np.abs(y0)))
+        sol = solve_ivp(f, t_span, y0, method='DOP853', rtol=rtol, atol=atol, dense_output=True)
+        if not sol.success:
+            # Bài toán cứng: chuyển sang Radau
+            sol = solve_ivp(f, t_span, y0, method='Radau', rtol=rtol, atol=atol, dense_output=True)
+        _reference_cache[key] = sol.sol
+    return _reference_cache[key]
+
+# --- CHẠY SONG SONG ---
+
+def _run_task(task):
+    """Worker: chạy một (phương pháp, h) ở chế độ headless, trả về (ts, ys, thời gian)."""
+    method, f, t_span, y0, h = task
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ts, ys = method(f, t_span, y0, h)
+    return np.asarray(ts), np.asarray(ys), time.perf_counter() - start
+
+def _picklable(obj):
+    try:
+        pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+def convergence_study(methods, f, t_span, y0, h_base, levels=3, ratio=2, max_workers=None,
+                      ref_rtol=1e-13, verbose=True):
+    """
+    Khảo sát hội tụ cho một hoặc nhiều phương pháp trên thang bước h_base / ratio^i (i < levels).
+    - Mọi cặp (phương pháp, h) chạy song song trên process pool (tuần tự nếu f không pickle được);
+      nghiệm tham chiếu được tính trong process chính trong lúc chờ.
+    - Sai số max toàn cục được tính vector hóa trên cả lưới t (OdeSolution gọi một lần).
+    - Cấp hội tụ là None (in N/A) khi sai số đã chạm ngưỡng chính xác của nghiệm tham chiếu.
+    Trả về dict {nhãn: list các dòng {'h', 'n_steps', 'error', 'order', 'time'}}.
+    """
+    if isinstance(methods, (str, tuple)) or callable(methods):
+        methods = [methods]
+    labeled = [make_method(m) for m in methods]
+    steps = [h_base / ratio ** i for i in range(levels)]
+    tasks = [(method, f, t_span, y0, h) for _, method in labeled for h in steps]
+    t_end = max(t_span)
+
+    if _picklable(tasks):
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_run_task, task) for task in tasks]
+            sol = reference_solution(f, t_span, y0, ref_rtol)
+            outputs = [fut.result() for fut in futures]
+    else:
+        sol = reference_solution(f, t_span, y0, ref_rtol)
+        outputs = [_run_task(task) for task in tasks]
+
+    results = {}
+    for m_idx, (label, _) in enumerate(labeled):
+        rows = []
+        for i, h in enumerate(steps):
+            ts, ys, elapsed = outputs[m_idx * levels + i]
+            ys = ys.reshape(len(ts), -1)
+            # Bỏ các điểm lưới vượt quá t_end (lưới của Euler có thể vượt t_end)
+            mask = ts <= t_end + 1e-12 * max(1.0, abs(t_end))
+            ref = sol(ts[mask]).T
+            error = np.max(np.abs(ref - ys[mask]))
+            floor = REF_FLOOR * ref_rtol * max(1.0, np.max(np.abs(ref)))
+            order = None
+            if rows and rows[-1]['error'] > floor and error > floor:
+                order = np.log(rows[-1]['error'] / error) / np.log(ratio)
+            rows.append({'h': h, 'n_steps': len(ts) - 1, 'error': error, 'order': order, 'time': elapsed})
+        results[label] = rows
+        if verbose: print_convergence_table(label, rows)
+    return results
+
+def print_convergence_table(label, rows):
+    """In bảng sai số và cấp hội tụ quan sát được."""
+    print(f"\n>> PHÂN TÍCH HỘI TỤ: {label.upper()}")
+    print(f"{'h':<12} | {'Sai số Max (Global)':<25} | {'Cấp hội tụ (p)':<20} | {'Thời gian (s)':<12}")
+    print("-" * 80)
+    for row in rows:
+        order_str = "N/A" if row['order'] is None else f"{row['order']:.4f}"
+        print(f"{row['h']:<12.6f} | {row['error']:<25.10f} | {order_str:<20} | {row['time']:<12.3f}")
+
+if __name__ == "__main__":
+    # Ví dụ: so sánh cấp hội tụ của các họ phương pháp trên y' = -2(y - cos t)
+    from problems import ExpressionRHS
+    f = ExpressionRHS(["-2*(y - np.cos(t))"])
+    convergence_study(['euler_hien', 'hinh_thang', 'bdf3', 'adams4', 'dp54', 'radau5'],
+                      f, (0, 2), [1.0], 0.2, levels=4)
@@ -0,0 +1,296 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import scipy.sparse as sps
+import sympy as sp
+from scipy.sparse.linalg import eigs, ArpackNoConvergence, ArpackError
+
+# --- JACOBIAN GIẢI TÍCH (SYMBOLIC) ---
+
+def _to_sympy_source(expr):
+    """Chuyển biểu thức dạng numpy (đã preprocess) về cú pháp sympy: np.exp -> exp, y[2] -> Y_2"""
+    expr = re.sub(r'\b(np|math)\.', '', expr)
+    return re.sub(r'\by\[(\d+)\]', r'Y_\1', expr)
+
+@lru_cache(maxsize=None)
+def symbolic_jacobian(expressions, param_name=None):
+    """
+    Đạo hàm symbolic MỘT lần bộ biểu thức (cùng quy ước biến với problems.compile_expressions),
+    lambdify thành hàm numpy vector hóa và cache theo (expressions, param_name).
+    Trả về (jac, pattern):
+      - jac(t, y, param_val) -> (n, n) với y dạng (n,), hoặc (M, n, n) với y dạng (M, n)
+      - pattern: mảng bool (n, n), True tại các phần tử khác 0 của Jacobian
+    """
+    n = len(expressions)
+    # Biến thực: d|y|/dy = sign(y) thay vì biểu thức theo re/im mà lambdify không in được
+    t_sym = sp.Symbol('t', real=True)
+    p_sym = sp.Symbol(param_name if param_name else '_param', real=True)
+    state = [sp.Symbol(f'Y_{i}', real=True) for i in range(n)]
+
+    local_dict = {'t': t_sym, 'log10': lambda a: sp.log(a, 10)}
+    for i in range(n): local_dict[f'Y_{i}'] = state[i]
+    if n == 1:
+        local_dict['x'] = local_dict['y'] = state[0]
+    else:
+        for name, idx in zip(['x', 'y', 'z'], range(min(n, 3))):
+            local_dict[name] = state[idx]
+    if param_name: local_dict[param_name] = p_sym
+
+    exprs = [sp.sympify(_to_sympy_source(e), locals=local_dict) for e in expressions]
+    J = sp.Matrix(exprs).jacobian(state)
+
+    entries = [(i, j) for i in range(n) for j in range(n) if J[i, j] != 0]
+    pattern = np.zeros((n, n), dtype=bool)
+    for i, j in entries: pattern[i, j] = True
+    entry_func = sp.lambdify((t_sym, state, p_sym), [J[i, j] for i, j in entries], modules='numpy')
+
+    rows = np.array([i for i, _ in entries], dtype=int)
+    cols = np.array([j for _, j in entries], dtype=int)
+
+    def jac(t, y, param_val=0, sparse=False):
+        y = np.asarray(y, dtype=float)
+        if sparse:
+            # Chỉ tính các phần tử khác 0 -> ma trận CSC, không dựng mảng n x n
+            values = entry_func(t, [y[k] for k in range(n)], param_val) if entries else []
+            values = np.array([np.broadcast_to(v, ()) for v in values], dtype=float)
+            return sps.csc_matrix((values, (rows, cols)), shape=(n, n))
+        batch_shape = y.shape[:-1]
+        out = np.zeros(batch_shape + (n, n))
+        if entries:
+            values = entry_func(t, [y[..., k] for k in range(n)], param_val)
+            for (i, j), val in zip(entries, values):
+                out[..., i, j] = val
+        return out
+
+    return jac, pattern
+
+# --- JACOBIAN SỐ (CHO HÀM KHÔNG CÓ BIỂU THỨC) ---
+
+def _supports_complex(f, t, y):
+    """
+    Thử gọi f với đầu vào phức: dùng được complex-step nếu kết quả vẫn là số phức hữu hạn
+    và đạo hàm theo một hướng khớp với sai phân (abs, np.maximum... nhận số phức
+    nhưng không giải tích, complex-step cho kết quả sai).
+    """
+    try:
+        with np.errstate(all='ignore'):
+            v = np.linspace(1.0, 2.0, np.size(y)).reshape(np.shape(y))
+            res = np.asarray(f(t, y + 1e-30j * v))
+            if not (np.iscomplexobj(res) and np.all(np.isfinite(res))):
+                return False
+            delta = np.sqrt(np.finfo(float).eps) * max(1.0, float(np.max(np.abs(y))))
+            f0 = np.asarray(f(t, y), dtype=float)
+            fd = (np.asarray(f(t, y + delta * v), dtype=float) - f0) / delta
+        return np.allclose(res.imag / 1e-30, fd, rtol=1e-4, atol=1e-4 * (1.0 + np.max(np.abs(fd))))
+    except Exception:
+        return False
+
+def numeric_jacobian(f, t, y, method=None):
+    """
+    Jacobian số của f tại (t, y); y dạng (n,) hoặc lô (M, n).
+    - method='complex': complex-step, J[:, j] = Im f(y + i*h e_j) / h (không có sai số trừ, h = 1e-20)
+    - method='fd'     : sai phân tiến với bước sqrt(eps) * max(1, |y_j|)
+    - method=None     : tự chọn complex-step nếu f chấp nhận số phức, ngược lại sai phân.
+    Nếu f vector hóa (f.vectorized = True), mọi điểm nhiễu được gộp vào một lần gọi f.
+    """
+    y = np.asarray(y, dtype=float)
+    batch = y.ndim == 2
+    Y = y if batch else y[None, :]
+    N, n = Y.shape
+    T = np.broadcast_to(np.asarray(t, dtype=float), (N,))
+    if method is None:
+        method = 'complex' if _supports_complex(f, T[0], Y[0]) else 'fd'
+
+    if method == 'complex':
+        steps = np.full((N, n), 1e-20)
+        Yp = Y[:, None, :] + 1j * steps[:, :, None] * np.eye(n)[None]
+    else:
+        steps = np.sqrt(np.finfo(float).eps) * np.maximum(1.0, np.abs(Y))
+        Yp = Y[:, None, :] + steps[:, :, None] * np.eye(n)[None]
+
+    if getattr(f, 'vectorized', False):
+        Fp = np.asarray(f(np.repeat(T, n), Yp.reshape(N * n, n))).reshape(N, n, n)
+        F0 = None if method == 'complex' else np.asarray(f(T, Y)).reshape(N, n)
+    else:
+        Fp = np.array([[np.asarray(f(T[p], Yp[p, j])).flatten() for j in range(n)] for p in range(N)])
+        F0 = None if method == 'complex' else np.array([np.asarray(f(T[p], Y[p])).flatten() for p in range(N)])
+
+    # Fp[p, j, i] = f_i(y_p + h e_j) -> J[p, i, j]
+    if method == 'complex':
+        J = (Fp.imag / steps[:, :, None]).transpose(0, 2, 1)
+    else:
+        J = ((Fp - F0[:, None, :]) / steps[:, :, None]).transpose(0, 2, 1)
+    return J if batch else J[0]
+
+# --- JACOBIAN THƯA: MẪU THƯA, TÔ MÀU CỘT, SAI PHÂN THEO NHÓM ---
+
+SPARSE_MIN_DIM = 50         # Hệ nhỏ hơn: ma trận đặc luôn nhanh hơn
+SPARSE_MAX_DENSITY = 0.1    # Tỉ lệ phần tử khác 0 tối đa để dùng dạng thưa
+
+def probe_sparsity(f, t, y, n_points=2, seed=0):
+    """
+    Dò mẫu thưa của Jacobian bằng sai phân từng cột tại n_points điểm nhiễu ngẫu nhiên quanh y
+    (nhiều điểm để tránh phần tử bằng 0 tình cờ). Tốn n_points * (n + 1) lần gọi f, chỉ làm một lần.
+    Trả về ma trận CSC bool (n, n).
+    """
+    y = np.asarray(y, dtype=float).ravel()
+    n = y.size
+    rng = np.random.default_rng(seed)
+    found = np.zeros((n, n), dtype=bool) if n <= 2000 else None
+    rows_all, cols_all = [], []
+    with np.errstate(all='ignore'):
+        for _ in range(n_points):
+            yp = y + 1e-3 * (1.0 + np.abs(y)) * rng.standard_normal(n)
+            f0 = np.asarray(f(t, yp), dtype=float).ravel()
+            steps = 1e-6 * (1.0 + np.abs(yp))
+            for j in range(n):
+                yj = yp.copy(); yj[j] += steps[j]
+                rows = np.nonzero(np.asarray(f(t, yj), dtype=float).ravel() != f0)[0]
+                if found is not None:
+                    found[rows, j] = True
+                else:
+                    rows_all.append(rows); cols_all.append(np.full(rows.size, j))
+    if found is not None:
+        return sps.csc_matrix(found)
+    rows = np.concatenate(rows_all); cols = np.concatenate(cols_all)
+    pattern = sps.csc_matrix((np.ones(rows.size, dtype=bool), (rows, cols)), shape=(n, n))
+    pattern.sum_duplicates()
+    return pattern.astype(bool)
+
+def color_columns(pattern):
+    """
+    Tô màu tham lam đồ thị giao cột (Curtis-Powell-Reid): hai cột cùng màu không có hàng chung
+    -> một lần gọi f cho cả nhóm. Duyệt cột theo số phần tử khác 0 giảm dần.
+    Trả về (colors: mảng (n,) nhãn nhóm của từng cột, n_colors).
+    """
+    csc = sps.csc_matrix(pattern, dtype=bool)
+    csr = csc.tocsr()
+    n = csc.shape[1]
+    colors = np.full(n, -1, dtype=int)
+    n_colors = 0
+    for j in np.argsort(-np.diff(csc.indptr), kind='stable'):
+        rows = csc.indices[csc.indptr[j]:csc.indptr[j + 1]]
+        neighbors = np.concatenate([csr.indices[csr.indptr[i]:csr.indptr[i + 1]] for i in rows]) \
+            if rows.size else np.empty(0, dtype=int)
+        used = set(colors[neighbors].tolist())
+        c = 0
+        while c in used: c += 1
+        colors[j] = c
+        n_colors = max(n_colors, c + 1)
+    return colors, n_colors
+
+def sparse_numeric_jacobian(f, t, y, pattern, colors=None, method=None):
+    """
+    Jacobian số dạng CSC theo mẫu thưa: mỗi nhóm cột (cùng màu) nhiễu đồng thời,
+    tốn n_colors (+1 với sai phân) lần gọi f thay vì n. method như numeric_jacobian.
+    """
+    y = np.asarray(y, dtype=float).ravel()
+    pattern = sps.coo_matrix(pattern)
+    if colors is None: colors, _ = color_columns(pattern)
+    n_colors = int(colors.max()) + 1 if colors.size else 0
+    if method is None:
+        method = 'complex' if _supports_complex(f, t, y) else 'fd'
+
+    if method == 'complex':
+        steps = np.full(y.size, 1e-20)
+    else:
+        steps = np.sqrt(np.finfo(float).eps) * np.maximum(1.0, np.abs(y))
+        f0 = np.asarray(f(t, y), dtype=float).ravel()
+    D = np.empty((n_colors, y.size))
+    for c in range(n_colors):
+        mask = colors == c
+        if method == 'complex':
+            D[c] = np.asarray(f(t, y + 1j * steps * mask)).ravel().imag
+        else:
+            D[c] = np.asarray(f(t, y + steps * mask), dtype=float).ravel() - f0
+
+    # J[i, j] = D[màu của cột j, i] / h_j với (i, j) thuộc mẫu thưa
+    values = D[colors[pattern.col], pattern.row] / steps[pattern.col]
+    return sps.csc_matrix((values, (pattern.row, pattern.col)), shape=pattern.shape)
+
+def extreme_eigenvalues(J, k=6, tol=1e-3, maxiter=300):
+    """
+    Các trị riêng biên của Jacobian (quyết định ổn định bước hiện): ma trận đặc -> toàn bộ eigvals;
+    ma trận thưa -> ARPACK lấy k trị riêng có mô-đun lớn nhất và k trị riêng có phần thực lớn nhất,
+    với dung sai tương đối tol (đủ cho kiểm tra ổn định; chính xác hơn sẽ chậm hơn nhiều lần).
+    """
+    if not sps.issparse(J):
+        return np.linalg.eigvals(np.asarray(J, dtype=float))
+    n = J.shape[0]
+    if n <= k + 2:
+        return np.linalg.eigvals(J.toarray())
+    found = []
+    for which in ('LM', 'LR'):
+        try:
+            found.append(eigs(J.astype(float), k=k, which=which, tol=tol, maxiter=maxiter,
+                                   return_eigenvectors=False))
+        except ArpackNoConvergence as e:
+            found.append(e.eigenvalues)
+        except ArpackError:
+            pass
+    return np.concatenate(found) if found else np.linalg.eigvals(J.toarray())
+
+def _use_sparse(pattern):
+    n = pattern.shape[0]
+    return n >= SPARSE_MIN_DIM and pattern.nnz <= SPARSE_MAX_DENSITY * n * n
+
+# --- BỘ CUNG CẤP JACOBIAN ---
+
+def get_jacobian(f, sparse=False, t=None, y=None):
+    """
+    Trả về hàm jac(t, y) cho vế phải f:
+    - f có biểu thức (ExpressionRHS: f.expressions, f.param_name) -> Jacobian giải tích đã cache
+    - ngược lại -> Jacobian số (complex-step hoặc sai phân theo lô)
+    sparse: False -> luôn trả ma trận đặc (n, n) (hỗ trợ lô (M, n));
+            True/None -> ma trận CSC nếu Jacobian thưa (None: tự quyết theo cỡ và mật độ).
+    Mẫu thưa lấy từ f.jac_sparsity, từ biểu thức đạo hàm symbolic, hoặc dò tại (t, y).
+    """
+    expressions = getattr(f, 'expressions', None)
+    sym_jac = pattern = None
+    if expressions is not None:
+        try:
+            sym_jac, pattern = symbolic_jacobian(tuple(expressions), getattr(f, 'param_name', None))
+        except Exception:
+            # Hàm sympy không đạo hàm/lambdify được (np.maximum, np.arctan, ...) -> Jacobian số
+            sym_jac = pattern = None
+    param_val = getattr(f, 'param_val', 0)
+    # Chọn complex-step / sai phân một lần ở lần gọi đầu, không dò lại mỗi bước
+    method = {}
+    def _method(t, y):
+        if 'm' not in method:
+            y0 = np.asarray(y, dtype=float)
+            y0 = y0[0] if y0.ndim == 2 else y0
+            t0 = np.ravel(np.asarray(t, dtype=float))[0]
+            method['m'] = 'complex' if _supports_complex(f, t0, y0) else 'fd'
+        return method['m']
+    dense_jac = (lambda t, y: sym_jac(t, y, param_val)) if sym_jac is not None \
+        else (lambda t, y: numeric_jacobian(f, t, y, method=_method(t, y)))
+    if sparse is False:
+        return dense_jac
+
+    if getattr(f, 'jac_sparsity', None) is not None:
+        pattern = sps.csc_matrix(f.jac_sparsity, dtype=bool)
+    elif pattern is None:
+        if y is None:
+            return dense_jac
+        n = np.size(y)
+        # Hệ nhỏ ở chế độ tự động: không đáng tốn n lần gọi f để dò
+        if sparse is None and n < SPARSE_MIN_DIM:
+            return dense_jac
+        pattern = probe_sparsity(f, t if t is not None else 0.0, y)
+    pattern = sps.csc_matrix(pattern, dtype=bool)
+    if sparse is None and not _use_sparse(pattern):
+        return dense_jac
+
+    if sym_jac is not None:
+        sparse_jac = lambda t, y: sym_jac(t, y, param_val, sparse=True)
+    else:
+        colors, _ = color_columns(pattern)
+        sparse_jac = lambda t, y: sparse_numeric_jacobian(f, t, y, pattern, colors, _method(t, y))
+
+    def jac(t, y):
+        # Lô trạng thái (M, n): giữ dạng đặc theo lô
+        if np.ndim(y) == 2: return dense_jac(t, y)
+        return sparse_jac(t, y)
+    return jac
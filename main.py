@@ -2,6 +2,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from RungeKutta import RungeKuttaSolver
 from problems import get_problem
+from sweep import sweep_parameter, plot_sweep
+from tableaux import MAX_ORDER
 
 def plot_solutions(solver, ts, ys, f=None, h=None):
     """
@@ -21,38 +23,24 @@ def plot_solutions(solver, ts, ys, f=None, h=None):
 
     # 2. Vẽ các điểm (Scatter) với màu sắc dựa trên tính ổn định
     if f is not None and h is not None:
-        print("\n>> Đang phân tích ổn định từng điểm trên đồ thị (vui lòng chờ)...")
-        stable_points_x = []
-        stable_points_y = []
-        unstable_points_x = []
-        unstable_points_y = []
+        print("\n>> Đang phân tích ổn định từng điểm trên đồ thị...")
+        # Phân tích cả quỹ đạo theo lô: Jacobian, trị riêng và R(z) tính một lần cho mọi điểm
+        is_stable, r_vals = solver.check_trajectory_stability(f, ts, ys, h)
         
-        # Duyệt qua từng bước thời gian
-        for i, t_val in enumerate(ts):
-            y_val = ys[i]
-            # Gọi hàm kiểm tra từ solver (Bạn phải chắc chắn đã thêm hàm này vào RungeKutta.py)
-            try:
-                is_stable, r_val = solver.check_step_stability(f, t_val, y_val, h)
-                
-                # Lưu tọa độ để vẽ (gom tất cả biến y vào chung để hiển thị trạng thái hệ thống)
-                for var_idx in range(num_vars):
-                    if is_stable:
-                        stable_points_x.append(t_val)
-                        stable_points_y.append(y_val[var_idx])
-                    else:
-                        unstable_points_x.append(t_val)
-                        unstable_points_y.append(y_val[var_idx])
-            except AttributeError:
-                print("Cảnh báo: Hàm 'check_step_stability' chưa có trong RungeKuttaSolver.")
-                break
+        # Lưu tọa độ để vẽ (gom tất cả biến y vào chung để hiển thị trạng thái hệ thống)
+        t_grid = np.repeat(ts, num_vars)
+        y_flat = ys.reshape(-1)
+        mask = np.repeat(is_stable, num_vars)
+        stable_points_x, stable_points_y = t_grid[mask], y_flat[mask]
+        unstable_points_x, unstable_points_y = t_grid[~mask], y_flat[~mask]
 
         # Vẽ điểm ỔN ĐỊNH (Xanh lá)
-        if stable_points_x:
+        if len(stable_points_x):
             plt.scatter(stable_points_x, stable_points_y, c='green', s=20, zorder=5, 
                         label='Ổn định (|R(z)| ≤ 1)')
         
         # Vẽ điểm KHÔNG ỔN ĐỊNH (Đỏ)
-        if unstable_points_x:
+        if len(unstable_points_x):
             plt.scatter(unstable_points_x, unstable_points_y, c='red', s=30, zorder=6, marker='x',
                         label='Mất ổn định (|R(z)| > 1)')
     else:
@@ -67,6 +55,69 @@ def plot_solutions(solver, ts, ys, f=None, h=None):
     plt.grid(True, linestyle='--', alpha=0.7)
     plt.show()
 
+def run_adaptive():
+    """Giải với bước nhảy thích nghi bằng cặp RK nhúng."""
+    print("\n   [BƯỚC THÍCH NGHI] Chọn cặp RK nhúng:")
+    print("   a. Bogacki-Shampine 3(2)")
+    print("   b. Fehlberg 4(5)")
+    print("   c. Dormand-Prince 5(4)")
+    print("   d. Tự động phát hiện độ cứng (Dormand-Prince 5(4) <-> BDF)")
+    ch = input("   Chọn (a/b/c/d): ").lower()
+    name = {'a': 'bs32', 'b': 'rkf45'}.get(ch, 'dp54')
+    
+    solver = RungeKuttaSolver(4)
+    solver.load_tableau(name)
+    try:
+        rtol = float(input("   rtol [Enter = 1e-6]: ") or 1e-6)
+        atol = float(input("   atol [Enter = 1e-9]: ") or 1e-9)
+    except ValueError:
+        print("Lỗi nhập số liệu.")
+        return
+    
+    pid_input = input("   Nhập 'custom' hoặc ID bài đã lưu: ").strip() or 'custom'
+    data = get_problem(pid_input)
+    if not data: return
+    f, t_span, y0, h, expressions, _ = data
+    
+    # h của đề bài dùng làm bước đầu
+    if ch == 'd':
+        ts, ys = solver.solve_auto(f, t_span, y0, rtol=rtol, atol=atol, h0=h)
+        for t_start, phase in solver.stats['phases']:
+            print(f"   Từ t = {t_start:.6f}: {'BDF (pha cứng)' if phase == 'bdf' else solver.method_name}")
+    else:
+        ts, ys = solver.solve_adaptive(f, t_span, y0, rtol=rtol, atol=atol, h0=h)
+    print("\n   [BẢNG KẾT QUẢ TÓM TẮT]")
+    print(f"   {'t':<10} | {'y (vector)':<30}")
+    step_log = max(1, len(ts)//10)
+    for i in range(0, len(ts), step_log):
+        print(f"   {ts[i]:<10.4f} | {str(ys[i])}")
+    plot_solutions(solver, ts, ys)
+
+def run_implicit():
+    """Giải hệ cứng bằng RK ẩn toàn phần (Gauss-Legendre, Radau IIA)."""
+    print("\n   [RK ẨN - HỆ CỨNG] Chọn phương pháp:")
+    print("   a. Gauss-Legendre 4 (2 nấc)")
+    print("   b. Gauss-Legendre 6 (3 nấc)")
+    print("   c. Radau IIA 3 (2 nấc)")
+    print("   d. Radau IIA 5 (3 nấc)")
+    ch = input("   Chọn (a/b/c/d): ").lower()
+    name = {'a': 'gauss4', 'b': 'gauss6', 'c': 'radau3'}.get(ch, 'radau5')
+    
+    solver = RungeKuttaSolver(3)
+    solver.load_tableau(name)
+    pid_input = input("   Nhập 'custom' hoặc ID bài đã lưu: ").strip() or 'custom'
+    data = get_problem(pid_input)
+    if not data: return
+    f, t_span, y0, h, expressions, _ = data
+    
+    ts, ys = solver.solve_implicit(f, t_span, y0, h)
+    print("\n   [BẢNG KẾT QUẢ TÓM TẮT]")
+    print(f"   {'t':<10} | {'y (vector)':<30}")
+    step_log = max(1, len(ts)//10)
+    for i in range(0, len(ts), step_log):
+        print(f"   {ts[i]:<10.4f} | {str(ys[i])}")
+    plot_solutions(solver, ts, ys, f=f, h=h)
+
 def main():
     while True:
         print("\n" + "="*60)
@@ -75,11 +126,17 @@ def main():
         
         # BƯỚC 1: CHỌN SỐ NẤC
         try:
-            s_input = input(">> BƯỚC 1: Nhập số nấc s (2, 3, 4) [q để thoát]: ").strip()
+            s_input = input(">> BƯỚC 1: Nhập số nấc s (2 - 8) [a: bước thích nghi, i: RK ẩn, q để thoát]: ").strip()
             if s_input.lower() == 'q': break
+            if s_input.lower() == 'a':
+                run_adaptive()
+                continue
+            if s_input.lower() == 'i':
+                run_implicit()
+                continue
             s = int(s_input)
-            if s not in [2, 3, 4]:
-                print("Lỗi: Hiện tại chỉ hỗ trợ s = 2, 3, 4.")
+            if s not in range(2, 9):
+                print("Lỗi: Hiện tại chỉ hỗ trợ s = 2 đến 8.")
                 continue
         except ValueError:
             continue
@@ -106,6 +163,10 @@ def main():
                     v2 = float(input("   c2: "))
                     v3 = float(input("   c3: "))
                     alphas = [v2, v3]
+                elif s >= 5:
+                    p_max = MAX_ORDER[s]
+                    p_in = input(f"   Nhập cấp p cần đạt (tối đa {p_max}) [Enter = {p_max}]: ").strip()
+                    alphas = [min(int(p_in), p_max)] if p_in else [p_max]
                 
                 # 2. Tính bảng Butcher & In lời giải
                 success = solver.derive_tableau(alphas)
@@ -147,6 +208,8 @@ def main():
                 ch = input("   Chọn (a/b): ").lower()
                 if ch == 'b': alphas = ['3/8'] 
                 else: alphas = [] 
+            else:
+                print(f"   Bảng RK{s} cấp {MAX_ORDER[s]} dựng từ hệ điều kiện cây có gốc")
 
             # 2. Tạo bảng Butcher
             solver.derive_tableau(alphas)
@@ -159,7 +222,24 @@ def main():
 
             data = get_problem(pid_input)
             if data:
-                f, t_span, y0, h, expressions, _ = data
+                f, t_span, y0, h, expressions, param_name = data
+                
+                # Nếu phát hiện tham số, cho phép quét nhiều giá trị song song
+                if param_name and input(f"\n>> Quét tham số '{param_name}'? (y/n): ").lower() == 'y':
+                    try:
+                        p_start = float(input(f"   {param_name} bắt đầu: "))
+                        p_end = float(input(f"   {param_name} kết thúc: "))
+                        p_count = int(input("   Số giá trị: "))
+                    except ValueError:
+                        print("Lỗi nhập số liệu.")
+                        continue
+                    params, _, finals = sweep_parameter(solver, f, np.linspace(p_start, p_end, p_count),
+                                                        t_span, y0, h)
+                    print(f"\n   {param_name:<10} | {'y cuối (vector)':<30}")
+                    for p_val, y_end in zip(params, finals):
+                        print(f"   {p_val:<10.4f} | {str(y_end)}")
+                    plot_sweep(params, finals, param_name)
+                    continue
                 
                 # 4. [QUAN TRỌNG] In cả 2 loại công thức
                 solver.print_formula_structure()          # Công thức lý thuyết
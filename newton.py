@@ -0,0 +1,151 @@
+import numpy as np
+import scipy.sparse as sps
+from scipy.linalg import lu_factor, get_lapack_funcs
+from scipy.sparse.linalg import splu
+from jacobian import get_jacobian
+from problems import as_inplace
+
+# --- NEWTON ĐƠN GIẢN HÓA DÙNG CHUNG CHO CÁC PHƯƠNG PHÁP ẨN ---
+
+class NewtonSolver:
+    """
+    Giải phương trình bước ẩn dạng chuẩn
+        G(y) = y - gh * f(t, y) - psi = 0
+    (Euler ẩn: gh = h, psi = y_n; hình thang: gh = h/2, psi = y_n + h/2 f_n;
+     BDF: gh = 1 / L_0'(t_{n+1}), psi = -sum_j L_j' y_j / L_0')
+    bằng Newton đơn giản hóa với ma trận lặp M = I - gh * J.
+    - J được giữ lại qua các bước, chỉ tính lại khi Newton hội tụ chậm hoặc thất bại;
+      nếu J mới tại điểm đoán vẫn thất bại -> Newton đầy đủ có tìm kiếm theo tia (_full_newton).
+    - LU của M được cache, chỉ phân rã lại khi J mới hoặc gh đổi quá gh_rtol (tương đối).
+    - Jacobian thưa (hệ lớn, ghép cặp cục bộ) -> M giữ dạng CSC và phân rã bằng splu.
+      Mặc định jac được dựng ở lần tính J đầu tiên bằng get_jacobian(f, sparse=None, t, y):
+      tự dò mẫu thưa và chọn dạng đặc/thưa theo cỡ hệ.
+    Thống kê: self.stats (nfev, njev, nlu, n_iter, n_fail, n_full: số lần dùng Newton đầy đủ).
+    """
+    def __init__(self, f, jac=None, tol=1e-10, max_iter=7, gh_rtol=0.3):
+        self.f = f
+        self._F = as_inplace(f)
+        self._fbuf = None
+        self.jac = jac
+        self.tol = tol
+        self.max_iter = max_iter
+        self.gh_rtol = gh_rtol
+        self.J = None
+        self.lu = None
+        self.gh = None
+        self.stats = {'nfev': 0, 'njev': 0, 'nlu': 0, 'n_iter': 0, 'n_fail': 0, 'n_full': 0}
+
+    def _update_jacobian(self, t, y):
+        if self.jac is None: self.jac = get_jacobian(self.f, sparse=None, t=t, y=y)
+        J = self.jac(t, y)
+        self.J = sps.csc_matrix(J, dtype=float) if sps.issparse(J) else np.atleast_2d(np.asarray(J, dtype=float))
+        self.lu = None
+        self.stats['njev'] += 1
+
+    def _factor(self, gh):
+        n = self.J.shape[0]
+        if sps.issparse(self.J):
+            self.lu = splu((sps.identity(n, format='csc') - gh * self.J).tocsc())
+            self._solve_lin = self.lu.solve
+        else:
+            self.lu = lu_factor(np.eye(n) - gh * self.J)
+            # Gọi thẳng LAPACK getrs: bỏ chi phí kiểm tra đầu vào của lu_solve ở mỗi vòng lặp
+            getrs = get_lapack_funcs('getrs', self.lu)
+            lu, piv = self.lu
+            self._solve_lin = lambda rhs: getrs(lu, piv, rhs)[0]
+        self.gh = gh
+        self.stats['nlu'] += 1
+
+    def _needs_factor(self, gh):
+        return self.lu is None or abs(gh - self.gh) > self.gh_rtol * abs(self.gh)
+
+    def solve(self, t, psi, gh, y_guess, scale=None, tol=None):
+        """
+        Giải G(y) = 0 từ điểm đoán y_guess. Trả về (y, converged).
+        - scale: trọng số chuẩn RMS của bước Newton (mặc định 1 + |y_guess|)
+        - tol: ngưỡng hội tụ (mặc định self.tol), kiểm tra theo tốc độ hội tụ
+          theta / (1 - theta) * ||dy|| <= tol
+        """
+        tol = self.tol if tol is None else tol
+        y_guess = np.asarray(y_guess, dtype=float)
+        if scale is None: scale = 1.0 + np.abs(y_guess)
+        y = y_guess
+        for attempt in range(2):
+            fresh = False
+            if self.J is None:
+                self._update_jacobian(t, y_guess); fresh = True
+            if self._needs_factor(gh):
+                self._factor(gh)
+
+            y = y_guess.copy()
+            prev = None; theta = 0.0; converged = False
+            with np.errstate(all='ignore'):
+                for it in range(self.max_iter):
+                    if self._fbuf is None or self._fbuf.shape != y.shape: self._fbuf = np.empty_like(y)
+                    res = y - gh * self._F(t, y, self._fbuf) - psi
+                    self.stats['nfev'] += 1
+                    dy = self._solve_lin(-res)
+                    y += dy
+                    self.stats['n_iter'] += 1
+                    w = dy / scale
+                    norm = np.sqrt(w.dot(w) / w.size)
+                    if not np.isfinite(norm): break
+                    if prev is not None:
+                        theta = norm / prev
+                        if theta >= 1.0: break
+                        if theta / (1 - theta) * norm <= tol:
+                            converged = True; break
+                    elif norm <= tol:
+                        converged = True; break
+                    prev = norm
+
+            if converged:
+                # Hội tụ chậm -> làm mới Jacobian ở lần giải sau
+                if theta > 0.5: self.J = None
+                return y, True
+            if fresh: break
+            self.J = None   # Jacobian cũ -> tính lại và thử lần nữa
+        # J mới tại điểm đoán vẫn không đủ: Newton đầy đủ có tìm kiếm theo tia
+        y, converged = self._full_newton(t, psi, gh, y_guess, scale, tol)
+        if not converged: self.stats['n_fail'] += 1
+        return y, converged
+
+    def _residual(self, t, y, psi, gh):
+        if self._fbuf is None or self._fbuf.shape != y.shape: self._fbuf = np.empty_like(y)
+        self.stats['nfev'] += 1
+        return y - gh * self._F(t, y, self._fbuf) - psi
+
+    def _full_newton(self, t, psi, gh, y_guess, scale, tol):
+        """
+        Dự phòng khi Newton đơn giản hóa thất bại (J tại điểm đoán khác xa J gần nghiệm, ví dụ
+        Robertson với bước lớn): J và M = I - gh * J được tính lại tại mỗi điểm lặp, bước Newton
+        được rút ngắn (chia đôi) cho tới khi ||G|| giảm. Khi hội tụ, J tại nghiệm được giữ cho
+        các lần giải sau. Trả về (y, converged).
+        """
+        self.stats['n_full'] += 1
+        y = y_guess.copy()
+        with np.errstate(all='ignore'):
+            res = self._residual(t, y, psi, gh)
+            w = res / scale
+            g_norm = np.sqrt(w.dot(w) / w.size)
+            for it in range(4 * self.max_iter):
+                if not np.isfinite(g_norm): break
+                self._update_jacobian(t, y)
+                self._factor(gh)
+                dy = self._solve_lin(-res)
+                self.stats['n_iter'] += 1
+                w = dy / scale
+                if np.sqrt(w.dot(w) / w.size) <= tol:
+                    # Bước Newton đầy đủ đã ở mức dung sai (||G|| có thể không giảm được nữa do làm tròn)
+                    return y + dy, True
+                lam = 1.0
+                while True:
+                    y_try = y + lam * dy
+                    res_try = self._residual(t, y_try, psi, gh)
+                    w = res_try / scale
+                    g_try = np.sqrt(w.dot(w) / w.size)
+                    if g_try < (1 - 1e-4 * lam) * g_norm or lam < 1e-3: break
+                    lam *= 0.5
+                y, res, g_norm = y_try, res_try, g_try
+        self.J = None
+        return y, False
@@ -0,0 +1,140 @@
+import contextlib
+import io
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from RungeKutta import RungeKuttaSolver
+from problems import ExpressionRHS
+from convergence import _picklable
+
+# --- PARAREAL: TÍCH PHÂN SONG SONG THEO THỜI GIAN ---
+# Chia [t0, tf] thành N lát T_0 < T_1 < ... < T_N. Với bộ lan truyền thô G (rẻ, bước lớn)
+# và bộ lan truyền mịn F (chính xác, bước nhỏ), lặp
+#     U_{n+1}^{k+1} = G(U_n^{k+1}) + F(U_n^k) - G(U_n^k)
+# Các lần giải F(U_n^k) độc lập nhau -> chạy đồng thời trên process pool; phần tuần tự chỉ còn G.
+# Sau k vòng lặp, k lát đầu tiên trùng khớp nghiệm tuần tự của F.
+# Khi nào có lợi: mỗi vòng tốn ít nhất một "đợt" giải F song song (một lát trên mỗi worker), nên với
+# N lát = số worker và K vòng, tăng tốc tối đa là N / K (chưa kể phần G tuần tự). Parareal chỉ đáng dùng
+# khi có nhiều worker, G đủ chính xác để hội tụ sau K << N vòng, và F đắt hơn G nhiều
+# (f tốn kém, h_fine << h_coarse). Nhiều lát hơn số worker chỉ thêm đợt F: tăng tốc giảm.
+
+def _slice_step(t_span, h):
+    """Bước đều gần h nhất chia hết độ dài lát (solve không cắt bước cuối)."""
+    length = t_span[1] - t_span[0]
+    return length / max(1, int(np.ceil(length / h - 1e-9)))
+
+def _propagate(task):
+    """Worker: giải một lát thời gian bằng RungeKuttaSolver ở chế độ headless, trả về (ts, ys)."""
+    solver, f, t_span, y0, h = task
+    return solver.solve(f, t_span, y0, _slice_step(t_span, h), verbose=False)
+
+def _default_solver(s, alphas):
+    solver = RungeKuttaSolver(s)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver.derive_tableau(alphas)
+    return solver
+
+def parareal(f, t_span, y0, h_fine, h_coarse=None, n_slices=None, fine=None, coarse=None,
+             tol=1e-8, max_iter=None, max_workers=None, return_stats=False, verbose=True):
+    """
+    Giải y' = f(t, y) trên t_span bằng Parareal.
+    - fine / coarse: RungeKuttaSolver đã có bảng Butcher (mặc định Classic RK4 / Heun RK2).
+    - h_fine: bước của F; h_coarse: bước của G (mặc định bằng độ dài lát: một bước mỗi lát).
+    - n_slices: số lát (mặc định bằng số worker: mỗi vòng đúng một đợt F song song).
+    - Dừng khi max_n |U_n^{k+1} - U_n^k| / (1 + |U_n^k|) <= tol hoặc sau max_iter vòng (mặc định n_slices).
+    - f phải pickle được để chạy song song (ví dụ ExpressionRHS); ngược lại F chạy tuần tự.
+    Trả về (ts, ys) trên lưới mịn ghép từ các lát, hoặc thêm stats nếu return_stats=True.
+    """
+    fine = fine or _default_solver(4, [])
+    coarse = coarse or _default_solver(2, [1.0])
+    workers = max_workers or os.cpu_count() or 1
+    n_slices = n_slices or workers
+    max_iter = max_iter or n_slices
+    t0, tf = t_span
+    T = np.linspace(t0, tf, n_slices + 1)
+    if h_coarse is None: h_coarse = T[1] - T[0]
+
+    def G(n, u):
+        _, ys = coarse.solve(f, (T[n], T[n + 1]), u, _slice_step((T[n], T[n + 1]), h_coarse), verbose=False)
+        return ys[-1]
+
+    start = time.perf_counter()
+    # Vòng 0: lan truyền thô tuần tự
+    U = np.empty((n_slices + 1, len(y0)))
+    U[0] = np.asarray(y0, dtype=float)
+    G_old = np.empty((n_slices, len(y0)))
+    for n in range(n_slices):
+        G_old[n] = G(n, U[n])
+        U[n + 1] = G_old[n]
+
+    if verbose:
+        print(f"\n[PARAREAL] {n_slices} lát, F = {fine.method_name} (h={h_fine}), "
+              f"G = {coarse.method_name} (h={h_coarse}), {workers} worker")
+        print(f"{'Vòng':<6} | {'Thay đổi max tại biên lát':<28} | {'Thời gian (s)':<12}")
+        print("-" * 55)
+
+    parallel = _picklable((fine, f))
+    pool = ProcessPoolExecutor(max_workers=max_workers) if parallel else None
+    increments = []
+    fine_runs = [None] * n_slices
+    converged = False
+    try:
+        for k in range(max_iter):
+            # Lát < k đã hội tụ chính xác (bằng nghiệm tuần tự của F) -> chỉ giải lại từ lát k
+            tasks = [(fine, f, (T[n], T[n + 1]), U[n], h_fine) for n in range(k, n_slices)]
+            results = pool.map(_propagate, tasks) if parallel else map(_propagate, tasks)
+            for n, run in zip(range(k, n_slices), results):
+                fine_runs[n] = run
+            F_end = np.array([run[1][-1] for run in fine_runs])
+
+            # Hiệu chỉnh tuần tự: U_{n+1} = G(U_n mới) + F(U_n cũ) - G(U_n cũ)
+            U_new = U.copy()
+            U_new[k + 1] = F_end[k]
+            for n in range(k + 1, n_slices):
+                g_new = G(n, U_new[n])
+                U_new[n + 1] = g_new + F_end[n] - G_old[n]
+                G_old[n] = g_new
+            with np.errstate(all='ignore'):
+                change = np.max(np.abs(U_new - U) / (1.0 + np.abs(U)))
+            U = U_new
+            increments.append(change)
+            if verbose:
+                print(f"{k + 1:<6} | {change:<28.3e} | {time.perf_counter() - start:<12.3f}")
+            if not np.isfinite(change):
+                print("[CẢNH BÁO] Parareal phân kỳ (tràn số). Giảm h_coarse hoặc tăng n_slices.")
+                break
+            if change <= tol or k + 1 == n_slices:
+                converged = True
+                break
+    finally:
+        if pool is not None: pool.shutdown()
+
+    # Ghép quỹ đạo mịn của vòng cuối (bỏ điểm đầu trùng lặp của mỗi lát)
+    ts = np.concatenate([fine_runs[0][0]] + [run[0][1:] for run in fine_runs[1:]])
+    ys = np.concatenate([fine_runs[0][1]] + [run[1][1:] for run in fine_runs[1:]])
+    n_iter = len(increments)
+    if not converged:
+        print(f"[CẢNH BÁO] Parareal chưa hội tụ sau {n_iter} vòng (thay đổi {increments[-1]:.3e} > tol={tol}).")
+    stats = {'n_iter': n_iter, 'n_slices': n_slices, 'increments': increments, 'converged': converged,
+             'time': time.perf_counter() - start,
+             # Tăng tốc lý thuyết tối đa (bỏ qua chi phí G): N lát tuần tự / số "đợt" lát mịn song song
+             'speedup_bound': n_slices / sum(math.ceil((n_slices - k) / workers) for k in range(n_iter))
+                              if parallel else 1.0}
+    if verbose and parallel and stats['speedup_bound'] <= 1.0:
+        print(f"[CẢNH BÁO] {n_iter} vòng cho {n_slices} lát: Parareal không nhanh hơn giải F tuần tự "
+              f"(cần nhiều worker hơn hoặc G chính xác hơn).")
+    if return_stats:
+        return ts, ys, stats
+    return ts, ys
+
+if __name__ == "__main__":
+    # Ví dụ: hệ Lotka-Volterra mở rộng (Câu 2 trong AM.py) trên [0, 100] với h = 0.01
+    f = ExpressionRHS(["x*(1-x)*(x-0.2) - 0.2*x*y", "0.6*x*y - 0.45*y"])
+    ts, ys, stats = parareal(f, (0, 100), [0.8, 0.3], h_fine=0.01, h_coarse=0.5, return_stats=True)
+    fine = _default_solver(4, [])
+    _, ys_seq = fine.solve(f, (0, 100), [0.8, 0.3], 0.01, verbose=False)
+    print(f"\nSố vòng: {stats['n_iter']} | Sai khác với RK4 tuần tự: {np.max(np.abs(ys[-1] - ys_seq[-1])):.3e}")
+    print(f"Tăng tốc tối đa lý thuyết: {stats['speedup_bound']:.2f}x")
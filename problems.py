@@ -1,10 +1,18 @@
+import json
+import os
 import numpy as np
 import re
+from functools import lru_cache, partial
+
+try:
+    import tomllib          # Python >= 3.11
+except ImportError:
+    tomllib = None
 
 def preprocess_expression(expr):
     """
     Chuyển đổi input người dùng (math dạng text) sang Python syntax hợp lệ.
-    Ví dụ: "e^x + ln(y) + 2t^2" -> "np.exp(x) + np.log(y) + 2*t**2"
+    Ví dụ: "e^x + ln(y) + 2*t^2" -> "np.exp(x) + np.log(y) + 2*t**2"
     """
     # 1. Chuyển mũ ^ thành **
     expr = expr.replace('^', '**')
@@ -13,16 +21,20 @@ def preprocess_expression(expr):
     # Thay 'ln' thành 'np.log', 'e^' hoặc 'exp' thành 'np.exp'
     # Dùng regex để tránh thay thế nhầm tên biến (ví dụ biến 'aln' không bị đổi)
     
+    # e**(...) hoặc e**<số/biến> (có thể kèm dấu) -> np.exp(...) (đóng ngoặc đầy đủ)
+    expr = re.sub(r'(?<![\w.])e\*\*([-+]?(?:\([^()]*\)|[\w.]+(?:\[\d+\])?))', r'np.exp(\1)', expr)
+    
+    # Lookbehind (?<![\w.]) thay cho \b: không khớp lại tên hàm đã có tiền tố 'np.'
+    # (với \b, 'log' trong 'np.log' bị thay thành 'np.np.log10')
     replacements = {
-        r'\bln\b': 'np.log',
-        r'\blog\b': 'np.log10', # Mặc định log là log10, ln là log tự nhiên
-        r'\be\*\*': 'np.exp(',  # e**x -> np.exp(x
-        r'\bexp\b': 'np.exp',
-        r'\bsin\b': 'np.sin',
-        r'\bcos\b': 'np.cos',
-        r'\btan\b': 'np.tan',
-        r'\bsqrt\b': 'np.sqrt',
-        r'\bpi\b': 'np.pi',
+        r'(?<![\w.])ln\b': 'np.log',
+        r'(?<![\w.])log\b': 'np.log10', # Mặc định log là log10, ln là log tự nhiên
+        r'(?<![\w.])exp\b': 'np.exp',
+        r'(?<![\w.])sin\b': 'np.sin',
+        r'(?<![\w.])cos\b': 'np.cos',
+        r'(?<![\w.])tan\b': 'np.tan',
+        r'(?<![\w.])sqrt\b': 'np.sqrt',
+        r'(?<![\w.])pi\b': 'np.pi',
     }
     
     for pattern, repl in replacements.items():
@@ -30,8 +42,215 @@ def preprocess_expression(expr):
         
     return expr
 
+@lru_cache(maxsize=None)
+def compile_expressions(expressions, param_name=None, batch=False):
+    """
+    Biên dịch MỘT lần bộ biểu thức thành hàm Python thật:
+        _rhs(t, y_arr, <param>) -> np.array([f_1, f_2, ...])
+    thay vì eval() từng chuỗi ở mỗi stage. Kết quả được cache theo (expressions, param_name, batch).
+    batch=True: hàm nhận y_arr dạng (M, dim), t là số hoặc mảng (M,), trả về (M, dim).
+    """
+    num_vars = len(expressions)
+    param_arg = param_name if param_name else '_param'
+    
+    # Mapping biến giống hệt quy ước cũ: 1 biến -> x = y; nhiều biến -> x, y, z
+    # Với batch, y_arr.T[i] là cột thành phần i của lô (M, dim)
+    y_ref = 'y_arr.T[' if batch else 'y_arr['
+    lines = [f"def _rhs(t, y_arr, {param_arg}=0):"]
+    if num_vars == 1:
+        lines.append(f"    x = y = {y_ref}0]")
+    else:
+        for name, idx in zip(['x', 'y', 'z'], range(min(num_vars, 3))):
+            lines.append(f"    {name} = {y_ref}{idx}]")
+    body = ", ".join(f"({expr.replace('y[', y_ref)})" for expr in expressions)
+    if batch:
+        # Biểu thức hằng số được broadcast theo số hàng của batch
+        lines.append(f"    return np.stack(np.broadcast_arrays(y_arr.T[0], {body})[1:], axis=-1)")
+    else:
+        lines.append(f"    return np.array([{body}])")
+    
+    source = "\n".join(lines)
+    env = {'np': np, 'math': np}
+    exec(compile(source, '<rhs>', 'exec'), env)
+    return env['_rhs']
+
+class ExpressionRHS:
+    """
+    Hàm vế phải f(t, y) dựng từ danh sách biểu thức (đã qua preprocess_expression).
+    Biểu thức được biên dịch một lần (compile_expressions); khi pickle chỉ gửi chuỗi
+    biểu thức, process nhận sẽ tự biên dịch lại -> dùng được với process pool.
+    Hàm vector hóa (vectorized = True): y có thể là một trạng thái (dim,) hoặc
+    một lô trạng thái (M, dim) với t là số hoặc mảng (M,).
+    """
+    vectorized = True
+
+    def __init__(self, expressions, param_name=None, param_val=0):
+        self.expressions = list(expressions)
+        self.param_name = param_name
+        self.param_val = param_val
+        self._func = compile_expressions(tuple(self.expressions), param_name)
+        self._batch_func = compile_expressions(tuple(self.expressions), param_name, batch=True)
+
+    def __reduce__(self):
+        return (ExpressionRHS, (self.expressions, self.param_name, self.param_val))
+
+    def with_param(self, param_val):
+        """Trả về bản sao với giá trị tham số mặc định mới."""
+        return ExpressionRHS(self.expressions, self.param_name, param_val)
+
+    def __call__(self, t, y_vec, param_val=None):
+        if param_val is None: param_val = self.param_val
+        if y_vec.ndim == 2: return self._batch_func(t, y_vec, param_val)
+        return self._func(t, y_vec, param_val)
+
+# --- GIAO DIỆN VẾ PHẢI VECTOR HÓA (HỆ LỚN, METHOD OF LINES) ---
+# Quy ước chung cho mọi solver (RungeKutta, AM, Euler):
+#   f(t, y) -> mảng dy cùng dạng với y (toàn bộ trạng thái, không lặp theo thành phần)
+#   f.vectorized = True : f nhận thêm lô trạng thái (M, dim)
+#   f.inplace = True    : f(t, y, out=buf) ghi dy vào buf (không cấp phát) và trả về buf
+#   f.jac_sparsity      : (tùy chọn) mẫu thưa (n, n) của Jacobian, bỏ qua bước dò mẫu thưa
+# Solver gọi vế phải qua as_inplace(f)(t, y, out) nên cả hai dạng đều dùng được.
+
+class ArrayRHS:
+    """
+    Bọc hàm numpy làm việc trên toàn bộ mảng trạng thái:
+        fun(t, y) -> dy           (inplace=False)
+        fun(t, y, out) -> None    (inplace=True, ghi vào out)
+    jac_sparsity: mẫu thưa của Jacobian nếu biết trước (mảng/ma trận thưa (n, n)).
+    Pickle được nếu fun pickle được (hàm cấp module hoặc functools.partial).
+    """
+    def __init__(self, fun, inplace=False, vectorized=False, jac_sparsity=None):
+        self.fun = fun
+        self.inplace = inplace
+        self.vectorized = vectorized
+        self.jac_sparsity = jac_sparsity
+
+    def __call__(self, t, y, out=None):
+        if self.inplace:
+            if out is None: out = np.empty(np.shape(y))
+            self.fun(t, y, out)
+            return out
+        if out is None: return self.fun(t, y)
+        out[...] = self.fun(t, y)
+        return out
+
+def as_inplace(f):
+    """Chuẩn hóa vế phải f về dạng F(t, y, out): ghi f(t, y) vào out và trả về out."""
+    if getattr(f, 'inplace', False):
+        return lambda t, y, out: f(t, y, out=out)
+    def F(t, y, out):
+        out[...] = f(t, y)
+        return out
+    return F
+
+def _heat_rhs(t, u, out, coef):
+    """u_t = alpha u_xx, biên Dirichlet 0, sai phân trung tâm (ghi vào out)."""
+    np.subtract(u[:-2] + u[2:], 2 * u[1:-1], out=out[1:-1])
+    out[0] = u[1] - 2 * u[0]
+    out[-1] = u[-2] - 2 * u[-1]
+    out *= coef
+
+def heat_equation_1d(n, alpha=1.0):
+    """
+    Bài toán mẫu cỡ lớn: phương trình nhiệt 1D trên (0, 1) rời rạc bằng n điểm trong.
+    Trả về (f, y0) với f là ArrayRHS in-place (Jacobian ba đường chéo), y0 = sin(pi x).
+    Nghiệm đúng: e^{-alpha pi^2 t} sin(pi x).
+    """
+    from scipy.sparse import diags
+    dx = 1.0 / (n + 1)
+    x = dx * np.arange(1, n + 1)
+    pattern = diags([1, 1, 1], [-1, 0, 1], shape=(n, n), dtype=bool, format='csc')
+    return ArrayRHS(partial(_heat_rhs, coef=alpha / dx**2), inplace=True, jac_sparsity=pattern), np.sin(np.pi * x)
+
+# --- ĐỀ BÀI TỪ FILE (JSON / TOML) ---
+# Một file chứa một bài, danh sách bài, hoặc {"defaults": {...}, "problems": [...]}
+# (TOML: bảng [defaults] và mảng [[problems]]). Mỗi bài:
+#   name        : tên (mặc định theo thứ tự trong file)
+#   expressions : danh sách vế phải dạng text (như khi nhập tay: ^, ln, e^, sin...)
+#   y0, t_span, h
+#   param_name / param_value : (tùy chọn) tham số; tự phát hiện tên nếu bỏ trống.
+#                 Giá trị cũng có thể ghi trực tiếp theo tên tham số, ví dụ {"expressions": ["-a*x"], "a": 3}
+#   method, tableau, rtol, atol, ... : cấu hình solver (xem batch.py)
+# Trường lạ (gõ sai tên, tham số không có trong biểu thức) -> ValueError thay vì bị bỏ qua.
+
+SPEC_KEYS = {'name', 'expressions', 'y0', 't_span', 'h', 'param_name', 'param_value',
+             'method', 'tableau', 'alphas', 'rtol', 'atol', 'max_order', 'order', 'mode'}
+
+def detect_param(expressions):
+    """Tìm tên tham số (k, m, beta...) trong bộ biểu thức: từ đầu tiên không thuộc whitelist."""
+    # Whitelist các từ khóa không phải là tham số
+    whitelist = ['x','y','z','t','np','math','sin','cos','tan','exp','sqrt','log','abs','pi']
+    for expr in expressions:
+        for w in re.findall(r'[a-zA-Z_]+', expr):
+            if w not in whitelist:
+                return w
+    return None
+
+def load_problem_file(path):
+    """Đọc file đề bài .json/.toml, trả về list các dict đề bài (đã gộp defaults và có 'name')."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.toml':
+        if tomllib is None:
+            raise ValueError("Đọc TOML cần Python >= 3.11 (tomllib)")
+        with open(path, 'rb') as fh:
+            data = tomllib.load(fh)
+    elif ext == '.json':
+        with open(path, encoding='utf-8') as fh:
+            data = json.load(fh)
+    else:
+        raise ValueError(f"Không hỗ trợ định dạng '{ext}' (dùng .json hoặc .toml)")
+
+    defaults = {}
+    if isinstance(data, dict) and 'problems' in data:
+        defaults = data.get('defaults', {})
+        data = data['problems']
+    if isinstance(data, dict):
+        data = [data]
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    specs = []
+    for i, item in enumerate(data):
+        spec = dict(defaults, **item)
+        spec.setdefault('name', stem if len(data) == 1 else f"{stem}_{i + 1}")
+        for key in ('expressions', 'y0', 't_span', 'h'):
+            if key not in spec:
+                raise ValueError(f"Bài '{spec['name']}' thiếu trường '{key}'")
+        specs.append(spec)
+    return specs
+
+def problem_from_spec(spec):
+    """
+    Dựng bài toán từ dict đề bài (xem load_problem_file).
+    Trả về: (f_numeric, t_span, y0, h, raw_expressions, param_name) như get_problem.
+    """
+    expressions = [preprocess_expression(str(e)) for e in spec['expressions']]
+    y0 = [float(v) for v in spec['y0']]
+    if len(y0) != len(expressions):
+        raise ValueError(f"Bài '{spec.get('name')}': y0 có {len(y0)} phần tử, cần {len(expressions)}")
+    t0, tf = map(float, spec['t_span'])
+    param_name = spec.get('param_name') or detect_param(expressions)
+    name = spec.get('name')
+    unknown = sorted(set(spec) - SPEC_KEYS - {param_name})
+    if unknown:
+        raise ValueError(f"Bài '{name}': trường không hợp lệ {unknown}"
+                         + (f" (tham số trong biểu thức là '{param_name}')" if param_name else ""))
+    values = [spec[key] for key in ('param_value', param_name) if key in spec]
+    if param_name is None:
+        if values: raise ValueError(f"Bài '{name}': có param_value nhưng biểu thức không chứa tham số")
+        param_value = 0.0
+    elif not values:
+        raise ValueError(f"Bài '{name}': thiếu giá trị tham số '{param_name}' (param_value hoặc \"{param_name}\")")
+    elif len(values) == 2 and float(values[0]) != float(values[1]):
+        raise ValueError(f"Bài '{name}': param_value = {values[0]} mâu thuẫn với {param_name} = {values[1]}")
+    else:
+        param_value = float(values[0])
+    f = ExpressionRHS(expressions, param_name, param_value)
+    return f, [t0, tf], y0, float(spec['h']), expressions, param_name
+
 def get_problem(problem_id):
     """
+    problem_id: 'custom' (nhập tay), 'test', hoặc đường dẫn file đề bài .json/.toml
+    (tùy chọn '#ten_bai' để chọn bài trong file nhiều bài).
     Trả về: (f_numeric, t_span, y0, h, raw_expressions, param_name)
     """
     # Nếu là input custom
@@ -55,20 +274,8 @@ def get_problem(problem_id):
                 expressions.append(expr_ready)
 
             # Tự động tìm biến tham số (k, m, a...)
-            param_name = None
-            potential_params = set()
-            
-            # Whitelist các từ khóa không phải là tham số
-            whitelist = ['x','y','z','t','np','math','sin','cos','tan','exp','sqrt','log','abs','pi']
-            
-            for expr in expressions:
-                words = re.findall(r'[a-zA-Z_]+', expr)
-                for w in words:
-                    if w not in whitelist and 'y[' not in w:
-                        potential_params.add(w)
-            
-            if potential_params:
-                param_name = list(potential_params)[0]
+            param_name = detect_param(expressions)
+            if param_name:
                 print(f"-> Phát hiện tham số: '{param_name}'")
 
             t0 = float(input("   t bắt đầu: "))
@@ -82,25 +289,7 @@ def get_problem(problem_id):
                 
             h = float(input(">> Bước nhảy h: "))
 
-            def f_numeric_wrapper(t, y_vec, param_val=0):
-                # Môi trường tính toán
-                env = {
-                    't': t, 'np': np, 'math': np,
-                    'y_arr': y_vec
-                }
-                if param_name: env[param_name] = param_val
-                
-                # Mapping biến
-                if len(y_vec) == 1: env['y'] = y_vec[0]; env['x'] = y_vec[0] # x cũng là y nếu 1 biến
-                elif len(y_vec) >= 2:
-                    env['x'] = y_vec[0]; env['y'] = y_vec[1]
-                    if len(y_vec) >= 3: env['z'] = y_vec[2]
-
-                res = []
-                for expr in expressions:
-                    expr_eval = expr.replace('y[', 'y_arr[')
-                    res.append(eval(expr_eval, env))
-                return np.array(res)
+            f_numeric_wrapper = ExpressionRHS(expressions, param_name)
 
             return f_numeric_wrapper, [t0, tf], y0_list, h, expressions, param_name
 
@@ -111,6 +300,17 @@ def get_problem(problem_id):
     # Mẫu test nhanh
     if problem_id == 'test': 
         # y' = y, y(0)=1
-        return lambda t, y, p=0: np.array([y[0]]), [0, 1], [1.0], 0.1, ["y"], None
+        return ExpressionRHS(["y"]), [0, 1], [1.0], 0.1, ["y"], None
     
+    # File đề bài JSON/TOML: 'duong/dan.toml' (bài đầu tiên) hoặc 'duong/dan.toml#ten_bai'
+    path, _, name = problem_id.partition('#')
+    if os.path.isfile(path):
+        try:
+            specs = load_problem_file(path)
+            spec = next(sp for sp in specs if sp['name'] == name) if name else specs[0]
+            return problem_from_spec(spec)
+        except StopIteration:
+            print(f"[LỖI] Không có bài '{name}' trong {path}")
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"[LỖI ĐỌC FILE ĐỀ BÀI]: {e}")
     return None
\ No newline at end of file
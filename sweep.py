@@ -0,0 +1,82 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.pyplot as plt
+from RungeKutta import RungeKuttaSolver
+from problems import ExpressionRHS
+
+def _run_single(task):
+    """Worker: giải bài toán với một giá trị tham số (chạy trong process con)."""
+    solver, f, t_span, y0, h, param_val = task
+    # Chế độ headless: không in bảng số liệu trong process con
+    return solver.solve(lambda t, y: f(t, y, param_val), t_span, y0, h, verbose=False)
+
+def sweep_parameter(solver, f, param_values, t_span, y0, h, output='final', max_workers=None):
+    """
+    Quét tham số: giải bài toán với từng giá trị trong param_values bằng RungeKuttaSolver,
+    phân phối các lần chạy trên process pool.
+    - solver: RungeKuttaSolver đã có bảng Butcher (đã gọi derive_tableau).
+    - f(t, y, param_val): hàm vế phải pickle được (ví dụ ExpressionRHS từ get_problem).
+    - param_values: list/mảng giá trị tham số hoặc range.
+    - output: 'final' -> mảng (P, dim) trạng thái cuối
+              'trajectory' -> mảng (P, n_steps+1, dim) toàn bộ quỹ đạo
+    Lần chạy dừng sớm (tràn số) được bù NaN cho các điểm còn thiếu.
+    Trả về (params, ts, results).
+    """
+    params = np.array(list(param_values), dtype=float)
+    t0, tf = t_span
+    n_steps = int(np.ceil((tf - t0) / h - 1e-9))
+    ts_full = t0 + h * np.arange(n_steps + 1)
+    dim = len(y0)
+
+    if output == 'final':
+        results = np.full((len(params), dim), np.nan)
+    elif output == 'trajectory':
+        results = np.full((len(params), n_steps + 1, dim), np.nan)
+    else:
+        raise ValueError(f"output không hợp lệ: '{output}' (chọn 'final' hoặc 'trajectory')")
+
+    tasks = [(solver, f, t_span, y0, h, p) for p in params]
+    chunksize = max(1, len(tasks) // (4 * (max_workers or 8)))
+
+    print(f"\n[QUÉT THAM SỐ] {len(params)} giá trị, phương pháp {solver.method_name}, h={h}")
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for idx, (ts, ys) in enumerate(pool.map(_run_single, tasks, chunksize=chunksize)):
+            n_done = len(ys) - 1
+            if output == 'final':
+                # Chỉ nhận trạng thái cuối nếu chạy hết khoảng t
+                if n_done == n_steps: results[idx] = ys[-1]
+            else:
+                results[idx, :len(ys)] = ys
+
+    n_fail = int(np.isnan(results.reshape(len(params), -1)[:, -1]).sum())
+    if n_fail:
+        print(f"[CẢNH BÁO] {n_fail}/{len(params)} lần chạy dừng sớm do tràn số.")
+    return params, ts_full, results
+
+def plot_sweep(params, results, param_name='p', labels=None):
+    """Vẽ trạng thái cuối theo tham số (dạng đồ thị rẽ nhánh)."""
+    dim = results.shape[-1]
+    if labels is None: labels = ['x', 'y', 'z', 'w'] if dim <= 4 else [f'y_{i}' for i in range(dim)]
+    final = results if results.ndim == 2 else results[:, -1]
+
+    plt.figure(figsize=(10, 6))
+    for i in range(dim):
+        plt.plot(params, final[:, i], 'o-', markersize=3, label=f'{labels[i]}(t_cuối)')
+    plt.title(f'Quét tham số {param_name}')
+    plt.xlabel(param_name)
+    plt.ylabel('Trạng thái cuối')
+    plt.legend()
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.show()
+
+if __name__ == "__main__":
+    # Ví dụ: quét beta của hệ Lotka-Volterra mở rộng (Câu 2 trong AM.py), beta = k * 0.01
+    f = ExpressionRHS(["x*(1-x)*(x-beta) - 0.2*x*y", "0.6*x*y - 0.45*y"], 'beta')
+    solver = RungeKuttaSolver(4)
+    solver.derive_tableau([])
+    betas = np.arange(0, 51) * 0.01
+    params, ts, finals = sweep_parameter(solver, f, betas, (0, 100), [0.8, 0.3], 0.01)
+    for p, y in zip(params, finals):
+        print(f"beta = {p:.2f} | x = {y[0]:.6f}, y = {y[1]:.6f}")
+    plot_sweep(params, finals, 'beta')
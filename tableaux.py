@@ -0,0 +1,334 @@
+import json
+import os
+import numpy as np
+from functools import lru_cache
+from scipy.optimize import least_squares
+
+# --- KHO BẢNG BUTCHER (TABLEAU REGISTRY) ---
+# Mỗi bảng là một dict:
+#   'name'     : tên hiển thị
+#   'A', 'b', 'c': bảng Butcher
+#   'order'    : cấp chính xác của nghiệm dùng để tiến bước (b)
+#   'b_hat'    : (tùy chọn) trọng số nhúng để ước lượng sai số
+#   'err_order': (tùy chọn) cấp của nghiệm nhúng b_hat
+#   'fsal'     : (tùy chọn) First Same As Last -> stage cuối = f(t+h, y_{n+1})
+#   'implicit' : (tùy chọn) True nếu A không tam giác dưới chặt (cần giải hệ stage)
+#   'dense'    : (tùy chọn) mở rộng liên tục P (s, q): b_i(theta) = sum_j P[i][j] theta^(j+1),
+#                y(t_n + theta h) = y_n + h sum_i b_i(theta) k_i (dùng toàn bộ stage của bước)
+
+_S3 = 3 ** 0.5
+_S6 = 6 ** 0.5
+_S15 = 15 ** 0.5
+
+TABLEAUX = {
+    # Bogacki-Shampine 3(2)
+    'bs32': {
+        'name': 'Bogacki-Shampine 3(2)',
+        'c': [0, 1/2, 3/4, 1],
+        'A': [[0, 0, 0, 0],
+              [1/2, 0, 0, 0],
+              [0, 3/4, 0, 0],
+              [2/9, 1/3, 4/9, 0]],
+        'b': [2/9, 1/3, 4/9, 0],
+        'b_hat': [7/24, 1/4, 1/3, 1/8],
+        'order': 3, 'err_order': 2, 'fsal': True,
+        # Nội suy cấp 3 (Bogacki-Shampine 1989), dùng cả stage FSAL k_4 = f(t+h, y_{n+1})
+        'dense': [[1, -4/3, 5/9],
+                  [0, 1, -2/3],
+                  [0, 4/3, -8/9],
+                  [0, -1, 1]],
+    },
+    # Runge-Kutta-Fehlberg 4(5): tiến bước bằng nghiệm cấp 4
+    'rkf45': {
+        'name': 'Fehlberg 4(5)',
+        'c': [0, 1/4, 3/8, 12/13, 1, 1/2],
+        'A': [[0, 0, 0, 0, 0, 0],
+              [1/4, 0, 0, 0, 0, 0],
+              [3/32, 9/32, 0, 0, 0, 0],
+              [1932/2197, -7200/2197, 7296/2197, 0, 0, 0],
+              [439/216, -8, 3680/513, -845/4104, 0, 0],
+              [-8/27, 2, -3544/2565, 1859/4104, -11/40, 0]],
+        'b': [25/216, 0, 1408/2565, 2197/4104, -1/5, 0],
+        'b_hat': [16/135, 0, 6656/12825, 28561/56430, -9/50, 2/55],
+        'order': 4, 'err_order': 5, 'fsal': False,
+    },
+    # Dormand-Prince 5(4)
+    'dp54': {
+        'name': 'Dormand-Prince 5(4)',
+        'c': [0, 1/5, 3/10, 4/5, 8/9, 1, 1],
+        'A': [[0, 0, 0, 0, 0, 0, 0],
+              [1/5, 0, 0, 0, 0, 0, 0],
+              [3/40, 9/40, 0, 0, 0, 0, 0],
+              [44/45, -56/15, 32/9, 0, 0, 0, 0],
+              [19372/6561, -25360/2187, 64448/6561, -212/729, 0, 0, 0],
+              [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656, 0, 0],
+              [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0]],
+        'b': [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0],
+        'b_hat': [5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40],
+        'order': 5, 'err_order': 4, 'fsal': True,
+        # Mở rộng liên tục cấp 4 của Dormand-Prince (Hairer-Nørsett-Wanner, không tốn thêm stage)
+        'dense': [[1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+                  [0, 0, 0, 0],
+                  [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+                  [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+                  [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+                  [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+                  [0, 40617522/29380423, -110615467/29380423, 69997945/29380423]],
+    },
+    # --- RK ẨN TOÀN PHẦN (cho hệ cứng) ---
+    # Gauss-Legendre: cấp 2s, A-ổn định
+    'gauss2': {
+        'name': 'Gauss-Legendre 2 (Implicit Midpoint)',
+        'c': [1/2],
+        'A': [[1/2]],
+        'b': [1],
+        'order': 2, 'implicit': True,
+    },
+    'gauss4': {
+        'name': 'Gauss-Legendre 4',
+        'c': [1/2 - _S3/6, 1/2 + _S3/6],
+        'A': [[1/4, 1/4 - _S3/6],
+              [1/4 + _S3/6, 1/4]],
+        'b': [1/2, 1/2],
+        'order': 4, 'implicit': True,
+    },
+    'gauss6': {
+        'name': 'Gauss-Legendre 6',
+        'c': [1/2 - _S15/10, 1/2, 1/2 + _S15/10],
+        'A': [[5/36, 2/9 - _S15/15, 5/36 - _S15/30],
+              [5/36 + _S15/24, 2/9, 5/36 - _S15/24],
+              [5/36 + _S15/30, 2/9 + _S15/15, 5/36]],
+        'b': [5/18, 4/9, 5/18],
+        'order': 6, 'implicit': True,
+    },
+    # Radau IIA: cấp 2s-1, L-ổn định, stiffly accurate (hàng cuối của A = b)
+    'radau3': {
+        'name': 'Radau IIA 3',
+        'c': [1/3, 1],
+        'A': [[5/12, -1/12],
+              [3/4, 1/4]],
+        'b': [3/4, 1/4],
+        'order': 3, 'implicit': True,
+    },
+    'radau5': {
+        'name': 'Radau IIA 5',
+        'c': [(4 - _S6)/10, (4 + _S6)/10, 1],
+        'A': [[(88 - 7*_S6)/360, (296 - 169*_S6)/1800, (-2 + 3*_S6)/225],
+              [(296 + 169*_S6)/1800, (88 + 7*_S6)/360, (-2 - 3*_S6)/225],
+              [(16 - _S6)/36, (16 + _S6)/36, 1/9]],
+        'b': [(16 - _S6)/36, (16 + _S6)/36, 1/9],
+        'order': 5, 'implicit': True,
+    },
+}
+
+def get_tableau(name):
+    """Lấy bảng Butcher theo tên (trả về bản sao dạng numpy)."""
+    key = name.lower()
+    if key not in TABLEAUX:
+        raise KeyError(f"Không có bảng Butcher '{name}'. Có sẵn: {', '.join(TABLEAUX)}")
+    tab = dict(TABLEAUX[key])
+    for field in ('A', 'b', 'c', 'b_hat', 'dense'):
+        if tab.get(field) is not None:
+            tab[field] = np.array(tab[field], dtype=float)
+    return tab
+
+def register_tableau(key, A, b, c=None, order=None, name=None, **extra):
+    """Thêm một bảng Butcher vào kho để solver nạp bằng load_tableau(key)."""
+    A = np.array(A, dtype=float)
+    if c is None: c = A.sum(axis=1)
+    tab = {'name': name or key, 'A': A.tolist(), 'b': list(map(float, b)), 'c': list(map(float, c)),
+           'order': order if order is not None else len(b)}
+    tab.update(extra)
+    TABLEAUX[key.lower()] = tab
+    return get_tableau(key)
+
+# --- ĐIỀU KIỆN CẤP THEO CÂY CÓ GỐC (BUTCHER) ---
+# Cây có gốc biểu diễn bằng tuple đã sắp xếp các cây con: () là một nút lá.
+
+def _grow(tree):
+    """Mọi cây thu được khi gắn thêm một lá vào một nút bất kỳ của tree."""
+    out = {tuple(sorted(tree + ((),)))}
+    for i, child in enumerate(tree):
+        for g in _grow(child):
+            out.add(tuple(sorted(tree[:i] + (g,) + tree[i+1:])))
+    return out
+
+@lru_cache(maxsize=None)
+def rooted_trees(order):
+    """Danh sách các cây có gốc đúng `order` nút (1, 1, 2, 4, 9, 20, 48, 115, ...)."""
+    if order == 1: return [()]
+    trees = set()
+    for tree in rooted_trees(order - 1):
+        trees |= _grow(tree)
+    return sorted(trees)
+
+def tree_order(tree):
+    """Số nút |t| của cây."""
+    return 1 + sum(tree_order(ch) for ch in tree)
+
+def tree_density(tree):
+    """Mật độ gamma(t) = |t| * tích gamma(các cây con)."""
+    val = tree_order(tree)
+    for ch in tree: val *= tree_density(ch)
+    return val
+
+def elementary_weights(trees, A):
+    """Ma trận Phi (số cây x s): Phi(t) = tích_{con} (A Phi(con)), Phi(lá) = 1."""
+    memo = {}
+    def phi(tree):
+        if tree not in memo:
+            v = np.ones(A.shape[0])
+            for ch in tree: v = v * np.dot(A, phi(ch))
+            memo[tree] = v
+        return memo[tree]
+    return np.array([phi(t) for t in trees])
+
+def order_conditions(A, b, order):
+    """Phần dư các điều kiện cấp b^T Phi(t) - 1/gamma(t) cho mọi cây |t| <= order."""
+    trees = [t for q in range(1, order + 1) for t in rooted_trees(q)]
+    gammas = np.array([1.0 / tree_density(t) for t in trees])
+    return elementary_weights(trees, np.asarray(A, dtype=float)) @ np.asarray(b, dtype=float) - gammas
+
+# Số nấc tối thiểu đã biết của RK hiện theo cấp, và cấp cao nhất đạt được với s nấc
+MIN_STAGES = {1: 1, 2: 2, 3: 3, 4: 4, 5: 6, 6: 7, 7: 9, 8: 11}
+MAX_ORDER = {1: 1, 2: 2, 3: 3, 4: 4, 5: 4, 6: 5, 7: 6, 8: 6}
+
+# Bảng giải sẵn được lưu ở explicit_tableaux.json (khóa 'erk{order}_{stages}' -> A, b); giải số
+# s = 7, p = 6 mất hàng chục giây nên mỗi tiến trình (kể cả worker của ProcessPool) đọc lại từ file
+# thay vì giải lại. Bảng mới dựng được ghi bổ sung vào file (bỏ qua nếu không ghi được).
+TABLEAU_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'explicit_tableaux.json')
+_tableau_file = None
+
+def _load_tableau_file():
+    global _tableau_file
+    if _tableau_file is None:
+        try:
+            with open(TABLEAU_FILE, encoding='utf-8') as fh:
+                _tableau_file = json.load(fh)
+        except (OSError, ValueError):
+            _tableau_file = {}
+    return _tableau_file
+
+def _save_tableau(key, A, b, order, stages):
+    table = _load_tableau_file()
+    table[key] = {'order': order, 'stages': stages, 'A': np.asarray(A).tolist(), 'b': np.asarray(b).tolist()}
+    try:
+        with open(TABLEAU_FILE, 'w', encoding='utf-8') as fh:
+            json.dump(table, fh, indent=1)
+    except OSError:
+        pass
+
+def build_explicit_tableau(order, stages=None, seed=0, max_tries=50, tol=1e-12, max_coeff=10.0, key=None):
+    """
+    Dựng bảng Butcher RK hiện cấp `order` với `stages` nấc bằng cách giải số hệ điều kiện cấp
+    sinh từ các cây có gốc. Với A cố định, các điều kiện tuyến tính theo b nên b được khử bằng
+    bình phương tối thiểu (variable projection); phần còn lại giải theo A bằng least_squares
+    từ nhiều điểm xuất phát ngẫu nhiên; nghiệm có hệ số lớn hơn max_coeff (kém ổn định số) bị bỏ qua.
+    Kết quả được lưu vào kho (mặc định khóa 'erk{order}_{stages}') và vào TABLEAU_FILE;
+    bảng đã có trong file (và vẫn thỏa điều kiện cấp) được nạp lại, không giải lại.
+    """
+    stages = stages or MIN_STAGES.get(order, order)
+    key = (key or f'erk{order}_{stages}').lower()
+    if key in TABLEAUX: return get_tableau(key)
+    name = f"RK{stages} cấp {order} (điều kiện cây)"
+
+    entry = _load_tableau_file().get(key)
+    if entry is not None and entry.get('order') == order and entry.get('stages') == stages:
+        A, b = np.array(entry['A'], dtype=float), np.array(entry['b'], dtype=float)
+        if A.shape == (stages, stages) and np.abs(order_conditions(A, b, order)).max() < tol:
+            return register_tableau(key, A, b, order=order, name=name)
+    
+    trees = [t for q in range(1, order + 1) for t in rooted_trees(q)]
+    gammas = np.array([1.0 / tree_density(t) for t in trees])
+    low = np.tril_indices(stages, -1)
+    n_a = len(low[0])
+
+    def unpack(x):
+        A = np.zeros((stages, stages)); A[low] = x
+        Phi = elementary_weights(trees, A)
+        b = np.linalg.lstsq(Phi, gammas, rcond=None)[0]
+        return A, b, Phi
+
+    def residual(x):
+        A, b, Phi = unpack(x)
+        return Phi @ b - gammas
+
+    if n_a == 0:
+        A, b, _ = unpack(np.zeros(0))
+    else:
+        rng = np.random.default_rng(seed)
+        method = 'lm' if len(trees) >= n_a else 'trf'
+        for attempt in range(max_tries):
+            x0 = rng.uniform(0, 0.6, n_a)
+            sol = least_squares(residual, x0, method=method, xtol=1e-15, ftol=1e-15, gtol=1e-15, max_nfev=600)
+            if np.abs(sol.fun).max() < tol:
+                A, b, _ = unpack(sol.x)
+                if max(np.abs(A).max(), np.abs(b).max()) <= max_coeff: break
+        else:
+            raise RuntimeError(f"Không tìm được RK hiện cấp {order} với {stages} nấc sau {max_tries} lần thử.")
+
+    if np.abs(order_conditions(A, b, order)).max() >= tol:
+        raise RuntimeError(f"Không tìm được RK hiện cấp {order} với {stages} nấc.")
+    _save_tableau(key, A, b, order, stages)
+    return register_tableau(key, A, b, order=order, name=name)
+
+# --- KERNEL BƯỚC SINH MÃ TỪ BẢNG BUTCHER ---
+
+@lru_cache(maxsize=None)
+def _compile_step_kernel(A, b, c, buffered):
+    """
+    Sinh mã thẳng (không vòng lặp) cho một bước RK hiện từ bảng Butcher dạng tuple.
+    buffered=True: mọi phép toán ghi vào bộ đệm (không cấp phát mảng mới) cho hệ rất lớn,
+    vế phải gọi dạng F(t, y, out). buffered=False: gọi f(t, y) trực tiếp, ít lệnh numpy hơn
+    (nhanh hơn với hệ nhỏ, khi chi phí mỗi lần gọi chiếm ưu thế).
+    """
+    s = len(b)
+    lines = ["def _step(F, t, y, h, k, tmp, out):", "    tmp0, tmp1 = tmp"]
+    for i in range(s):
+        t_arg = "t" if c[i] == 0 else f"t + {c[i]!r}*h"
+        terms = [(j, A[i][j]) for j in range(i) if A[i][j] != 0]
+        call = (lambda arg: f"    F({t_arg}, {arg}, k[{i}])") if buffered else \
+               (lambda arg: f"    k[{i}] = F({t_arg}, {arg})")
+        if not terms:
+            lines.append(call("y"))
+            continue
+        # tmp0 = y + h * sum_j a_ij k_j, chỉ với các hệ số khác 0
+        j0, a0 = terms[0]
+        lines.append(f"    np.multiply(k[{j0}], {a0!r}*h, out=tmp0)")
+        for j, a in terms[1:]:
+            if buffered:
+                lines.append(f"    np.multiply(k[{j}], {a!r}*h, out=tmp1); tmp0 += tmp1")
+            else:
+                lines.append(f"    tmp0 += ({a!r}*h) * k[{j}]")
+        lines.append("    tmp0 += y")
+        lines.append(call("tmp0"))
+    terms = [(i, b[i]) for i in range(s) if b[i] != 0]
+    if not buffered:
+        body = " + ".join(f"{w!r}*k[{i}]" for i, w in terms) or "0.0"
+        lines.append(f"    return y + h*({body})")
+    elif terms:
+        i0, w0 = terms[0]
+        lines.append(f"    np.multiply(k[{i0}], {w0!r}*h, out=out)")
+        for i, w in terms[1:]:
+            lines.append(f"    np.multiply(k[{i}], {w!r}*h, out=tmp1); out += tmp1")
+        lines.append("    out += y")
+        lines.append("    return out")
+    else:
+        lines.append("    out[...] = y")
+        lines.append("    return out")
+
+    source = "\n".join(lines)
+    env = {'np': np}
+    exec(compile(source, '<rk_step>', 'exec'), env)
+    return env['_step']
+
+def step_kernel(A, b, c, buffered=False):
+    """
+    Hàm bước _step(F, t, y, h, k, tmp, out) -> y_{n+1} cho bảng Butcher hiện (A, b, c):
+    các stage được viết thẳng, bỏ qua hệ số 0; k (s, ...), tmp (2, ...) cấp phát sẵn.
+    - buffered=False: F là vế phải f(t, y), trả về mảng y_{n+1} mới (out không dùng).
+    - buffered=True : F(t, y, out) ghi vào bộ đệm (problems.as_inplace), kết quả ghi vào out (khác y).
+    Hoạt động cho cả y dạng (dim,) và lô (M, dim). Cache theo giá trị bảng Butcher.
+    """
+    A = tuple(tuple(map(float, row)) for row in np.asarray(A, dtype=float))
+    return _compile_step_kernel(A, tuple(map(float, b)), tuple(map(float, c)), bool(buffered))
@@ -0,0 +1,46 @@
+import contextlib
+import io
+
+import numpy as np
+
+from AM import solve_adams_adaptive
+
+
+def _work(f, y0, t_span, rtols):
+    stats, errs = [], []
+    for rtol in rtols:
+        with contextlib.redirect_stdout(io.StringIO()):
+            t, y, st = solve_adams_adaptive(f, y0, t_span, rtol=rtol, atol=rtol * 1e-2,
+                                            return_stats=True)
+        assert t[-1] == t_span[1]
+        stats.append(st); errs.append(y[-1])
+    return stats, errs
+
+
+def _check_smooth(stats):
+    nfev = np.array([st['nfev'] for st in stats])
+    # Số lần gọi f tăng dần đều theo dung sai, không nhảy vọt (trước đây: 752 -> 36578 -> 117k)
+    assert np.all(nfev[1:] / nfev[:-1] < 3.0)
+    assert nfev[-1] < 5 * nfev[0]
+    for st in stats:
+        assert st['n_reject'] < 0.2 * st['n_accept']
+
+
+RTOLS = [10.0 ** -k for k in range(6, 13)]
+
+
+def test_work_vs_tolerance_forced_decay():
+    f = lambda t, y: -2 * (y - np.cos(t))
+    exact = (4 * np.cos(20) + 2 * np.sin(20)) / 5 + np.exp(-40) / 5
+    stats, ends = _work(f, [1.0], (0.0, 20.0), RTOLS)
+    _check_smooth(stats)
+    for rtol, y in zip(RTOLS, ends):
+        assert abs(y[0] - exact) < 100 * rtol
+
+
+def test_work_vs_tolerance_oscillator():
+    f = lambda t, y: np.array([y[1], -y[0]])
+    stats, ends = _work(f, [1.0, 0.0], (0.0, 20.0), RTOLS)
+    _check_smooth(stats)
+    for rtol, y in zip(RTOLS, ends):
+        assert abs(y[0] - np.cos(20)) < 1000 * rtol
@@ -0,0 +1,74 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pytest
+
+from batch import run_batch
+from problems import tomllib
+
+
+def _write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh)
+    return str(path)
+
+
+def test_batch_outputs(tmp_path):
+    path = _write_json(tmp_path / 'lo.json', {
+        'defaults': {'t_span': [0, 1], 'h': 0.01},
+        'problems': [
+            {'name': 'decay', 'expressions': ['-a*x'], 'y0': [1.0], 'a': 2},
+            {'name': 'osc', 'expressions': ['y', '-x'], 'y0': [1.0, 0.0], 'method': 'adaptive',
+             'rtol': 1e-10, 'atol': 1e-12},
+            {'name': 'euler', 'expressions': ['x - t^2 + 1'], 'y0': [0.5], 'method': 'euler_hien', 'h': 0.1},
+            {'name': 'blowup', 'expressions': ['x^2'], 'y0': [2.0]},
+            {'name': 'typo', 'expressions': ['-x'], 'y0': [1.0], 'metod': 'rk'},
+        ]})
+    out = tmp_path / 'out'
+    rows = run_batch(path, str(out), max_workers=2, verbose=False)
+    status = {row['name']: row['status'] for row in rows}
+    assert [row['name'] for row in rows] == ['decay', 'osc', 'euler', 'blowup', 'typo']
+    assert status['decay'] == status['osc'] == status['euler'] == 'ok'
+    assert status['blowup'] == 'stopped_early'
+    assert status['typo'].startswith('error: ValueError') and 'metod' in status['typo']
+
+    decay = np.load(out / 'decay.npz')
+    assert decay['t'].shape == (101,) and decay['y'].shape == (101, 1)
+    assert np.abs(decay['y'][:, 0] - np.exp(-2 * decay['t'])).max() < 1e-9
+    assert str(decay['method']) == 'Classic RK4'
+    osc = np.load(out / 'osc.npz')
+    assert abs(osc['t'][-1] - 1.0) < 1e-12 and np.abs(osc['y'][-1] - [np.cos(1), -np.sin(1)]).max() < 1e-8
+    # Euler hiện cho y' = y - t^2 + 1: y_{n+1} = y_n + h (y_n - t_n^2 + 1)
+    y = 0.5
+    for t in np.arange(10) * 0.1:
+        y += 0.1 * (y - t ** 2 + 1)
+    assert abs(np.load(out / 'euler.npz')['y'][-1, 0] - y) < 1e-12
+    assert not os.path.exists(out / 'typo.npz')
+
+    with open(out / 'summary.csv', encoding='utf-8') as fh:
+        summary = list(csv.DictReader(fh))
+    assert [r['name'] for r in summary] == [row['name'] for row in rows]
+    assert [r['status'] for r in summary] == [row['status'] for row in rows]
+    assert float(summary[0]['y_end']) == pytest.approx(np.exp(-2.0), abs=1e-9)
+
+
+@pytest.mark.skipif(tomllib is None, reason="cần Python >= 3.11 (tomllib)")
+def test_batch_toml(tmp_path):
+    path = tmp_path / 'lo.toml'
+    path.write_text('[defaults]\nt_span = [0, 2]\nh = 0.05\n\n'
+                    '[[problems]]\nname = "bdf"\nexpressions = ["-50*(x - cos(t))"]\ny0 = [0.0]\nmethod = "bdf2"\n',
+                    encoding='utf-8')
+    rows = run_batch(str(path), str(tmp_path / 'out'), max_workers=1, verbose=False)
+    assert rows[0]['status'] == 'ok'
+    y = np.load(tmp_path / 'out' / 'bdf.npz')['y']
+    # Nghiệm đúng (bỏ số hạng e^{-50t}): (2500 cos t + 50 sin t) / 2501
+    assert abs(y[-1, 0] - (2500 * np.cos(2.0) + 50 * np.sin(2.0)) / 2501) < 1e-4
+
+
+def test_duplicate_names_rejected(tmp_path):
+    a = _write_json(tmp_path / 'a.json', {'name': 'p', 'expressions': ['-x'], 'y0': [1], 't_span': [0, 1], 'h': 0.1})
+    b = _write_json(tmp_path / 'b.json', {'name': 'p', 'expressions': ['-x'], 'y0': [1], 't_span': [0, 1], 'h': 0.1})
+    with pytest.raises(ValueError):
+        run_batch([a, b], str(tmp_path / 'out'), verbose=False)
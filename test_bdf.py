@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from bdf import solve_bdf
+
+
+def _f(t, y):
+    return -2 * (y - np.cos(t))
+
+
+def _exact(t):
+    return (4 * np.cos(t) + 2 * np.sin(t)) / 5 + np.exp(-2 * t) / 5
+
+
+@pytest.mark.parametrize('order', [4, 5, 6])
+def test_observed_order(order):
+    # Điểm khởi tạo không được tạo sàn sai số: cấp quan sát giữ đúng bậc k đến h nhỏ nhất
+    steps = [0.1, 0.05, 0.025, 0.0125]
+    errs = np.array([abs(solve_bdf(_f, (0.0, 2.0), [1.0], h, order=order)[1][-1, 0] - _exact(2.0))
+                     for h in steps])
+    observed = np.log2(errs[:-1] / errs[1:])
+    assert np.all(np.abs(observed - order) < 0.3), observed
+
+
+def _robertson(t, y):
+    return np.array([-0.04 * y[0] + 1e4 * y[1] * y[2],
+                     0.04 * y[0] - 1e4 * y[1] * y[2] - 3e7 * y[1] ** 2,
+                     3e7 * y[1] ** 2])
+
+
+@pytest.mark.parametrize('order, h', [(1, 0.1), (3, 0.1), (5, 0.01)])
+def test_robertson_newton_converges(order, h):
+    # J(y0) thiếu số hạng 3e7 * y2^2: Newton đầy đủ dự phòng thay vì ghi điểm lặp chưa hội tụ
+    ts, ys, st = solve_bdf(_robertson, (0.0, 40.0), [1.0, 0.0, 0.0], h, order=order, return_stats=True)
+    assert st['n_newton_fail'] == 0 and abs(ts[-1] - 40.0) < 1e-9
+    assert abs(ys[-1, 0] - 0.7158271) < 2e-3
+    assert abs(ys[-1].sum() - 1.0) < 1e-9
+
+
+def test_newton_failure_stops_early(capsys):
+    f = lambda t, y: -y if t < 0.5 else np.full_like(y, np.nan)
+    ts, ys, st = solve_bdf(f, (0.0, 1.0), [1.0], 0.1, order=2, return_stats=True)
+    assert st['n_newton_fail'] == 1 and len(ts) == len(ys) < 11
+    assert ts[-1] < 0.5 and np.all(np.isfinite(ys))
+    assert 'Newton không hội tụ' in capsys.readouterr().out
@@ -0,0 +1,55 @@
+import numpy as np
+
+import convergence
+from convergence import REF_FLOOR, convergence_study, reference_solution
+from problems import ExpressionRHS
+
+F = ExpressionRHS(["-2*(y - np.cos(t))"])
+
+
+def _exact(t):
+    return (4 * np.cos(t) + 2 * np.sin(t)) / 5 + np.exp(-2 * t) / 5
+
+
+def test_observed_orders():
+    nominal = {'euler_hien': 1, 'euler_an': 1, 'hinh_thang': 2, 'bdf3': 3, 'AB4-AM4 (PECE)': 4,
+               'Dormand-Prince 5(4)': 5}
+    results = convergence_study(['euler_hien', 'euler_an', 'hinh_thang', 'bdf3', 'adams4', 'dp54'],
+                                F, (0.0, 2.0), [1.0], 0.1, levels=3, max_workers=2, verbose=False)
+    assert set(results) == set(nominal)
+    for label, rows in results.items():
+        assert [row['h'] for row in rows] == [0.1, 0.05, 0.025]
+        assert rows[0]['order'] is None
+        assert abs(rows[-1]['order'] - nominal[label]) < 0.3, (label, rows[-1]['order'])
+
+
+def test_error_matches_exact_solution():
+    rows = convergence_study('euler_hien', F, (0.0, 2.0), [1.0], 0.1, levels=1, verbose=False)['euler_hien']
+    ts = np.arange(21) * 0.1
+    ys = [1.0]
+    for t in ts[:-1]:
+        ys.append(ys[-1] + 0.1 * -2 * (ys[-1] - np.cos(t)))
+    assert abs(rows[0]['error'] - np.max(np.abs(np.array(ys) - _exact(ts)))) < 1e-10
+
+
+def test_order_not_reported_below_reference_floor():
+    rows = convergence_study('radau5', F, (0.0, 2.0), [1.0], 0.1, levels=3, verbose=False)['Radau IIA 5']
+    floor = REF_FLOOR * 1e-13
+    for prev, row in zip(rows, rows[1:]):
+        assert (row['order'] is None) == (min(prev['error'], row['error']) <= floor)
+
+
+def test_reference_cached_per_problem():
+    convergence._reference_cache.clear()
+    sol = reference_solution(F, (0.0, 2.0), [1.0])
+    # Cùng biểu thức (đối tượng khác) -> dùng lại; bài toán khác -> nghiệm khác
+    assert reference_solution(ExpressionRHS(["-2*(y - np.cos(t))"]), (0.0, 2.0), [1.0]) is sol
+    other = reference_solution(ExpressionRHS(["-3*(y - np.cos(t))"]), (0.0, 2.0), [1.0])
+    assert other is not sol and len(convergence._reference_cache) == 2
+    assert abs(sol(2.0)[0] - _exact(2.0)) < 1e-11
+
+
+def test_unpicklable_rhs_runs_sequentially():
+    f = lambda t, y: -2 * (y - np.cos(t))
+    rows = convergence_study('hinh_thang', f, (0.0, 2.0), [1.0], 0.1, levels=2, verbose=False)['hinh_thang']
+    assert abs(rows[-1]['order'] - 2) < 0.1
@@ -0,0 +1,36 @@
+import numpy as np
+
+from Euler import solve_ode_core
+
+
+def _robertson(t, y):
+    return np.array([-0.04 * y[0] + 1e4 * y[1] * y[2],
+                     0.04 * y[0] - 1e4 * y[1] * y[2] - 3e7 * y[1] ** 2,
+                     3e7 * y[1] ** 2])
+
+
+def _residuals(method, ts, ys, h):
+    f = np.array([_robertson(t, y) for t, y in zip(ts, ys)])
+    if method == 'euler_an':
+        return ys[1:] - ys[:-1] - h * f[1:]
+    return ys[1:] - ys[:-1] - h / 2 * (f[:-1] + f[1:])
+
+
+def test_backward_euler_robertson_steps_converge(capsys):
+    # Trước đây: fsolve thay thế ở 6/400 bước, y_end ~ [-0.34, 0, 1.34]
+    h = 0.1
+    ts, ys = solve_ode_core('euler_an', _robertson, (0.0, 40.0), [1.0, 0.0, 0.0], h)
+    assert capsys.readouterr().out == ''
+    assert len(ts) == 401
+    assert np.abs(_residuals('euler_an', ts, ys, h)).max() < 1e-9
+    assert abs(ys[-1, 0] - 0.7158271) < 1e-3
+
+
+def test_trapezoid_never_stores_unconverged_steps(capsys):
+    # Hình thang không L-ổn định: y2 dao động sang âm và phương trình bước mất nghiệm ->
+    # dừng sớm, mọi bước đã lưu đều là nghiệm của phương trình bước
+    h = 0.1
+    ts, ys = solve_ode_core('hinh_thang', _robertson, (0.0, 4.0), [1.0, 0.0, 0.0], h)
+    assert np.abs(_residuals('hinh_thang', ts, ys, h)).max() < 1e-9
+    if len(ts) < 41:
+        assert '[DỪNG SỚM]' in capsys.readouterr().out
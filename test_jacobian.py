@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+import scipy.sparse as sps
+
+from jacobian import (color_columns, get_jacobian, numeric_jacobian, probe_sparsity,
+                      sparse_numeric_jacobian)
+from problems import ExpressionRHS, heat_equation_1d, preprocess_expression
+from RungeKutta import RungeKuttaSolver
+
+
+def _rhs(*exprs):
+    return ExpressionRHS([preprocess_expression(e) for e in exprs])
+
+
+def test_abs_uses_symbolic_sign():
+    # Biến thực: d|y|/dy = sign(y), không còn lỗi lambdify Derivative(re(y))
+    f = _rhs('-y*abs(y)')
+    jac = get_jacobian(f)
+    assert np.allclose(jac(0.0, np.array([-1.5])), [[-3.0]])
+    assert np.allclose(jac(0.0, np.array([[2.0], [-0.5]])), [[[-4.0]], [[-1.0]]])
+
+
+def test_unsupported_functions_fall_back_to_numeric():
+    f = _rhs('np.arctan(x) - np.maximum(x, 0)', '-abs(y) + x')
+    y = np.array([-1.5, 0.7])
+    J = get_jacobian(f)(0.3, y)
+    assert np.allclose(J, numeric_jacobian(f, 0.3, y), atol=1e-6)
+    assert np.allclose(J, [[1 / (1 + 1.5 ** 2), 0.0], [1.0, -1.0]], atol=1e-6)
+
+
+def test_implicit_solver_runs_with_abs():
+    f = _rhs('-5*abs(y) + 1')
+    solver = RungeKuttaSolver(1)
+    solver.load_tableau('radau5')
+    ts, ys = solver.solve_implicit(f, (0.0, 1.0), [1.0], 0.1, verbose=False)
+    # Nghiệm tiến về điểm cân bằng y = 0.2
+    assert abs(ts[-1] - 1.0) < 1e-12
+    assert abs(ys[-1, 0] - 0.2) < 1e-2
+
+
+def _brusselator(n, a=1.0, b=3.0, alpha=0.02):
+    # Brusselator 1D: u_i, v_i chỉ ghép với điểm lân cận -> Jacobian thưa
+    coef = alpha * (n + 1) ** 2
+    def f(t, y):
+        u, v = y[:n], y[n:]
+        lap = lambda w, bc: np.concatenate(([bc - 2 * w[0] + w[1]], w[:-2] - 2 * w[1:-1] + w[2:],
+                                            [w[-2] - 2 * w[-1] + bc]))
+        return np.concatenate((a + u * u * v - (b + 1) * u + coef * lap(u, a),
+                               b * u - u * u * v + coef * lap(v, b / a)))
+    x = np.arange(1, n + 1) / (n + 1)
+    return f, np.concatenate((1 + np.sin(2 * np.pi * x), np.full(n, 3.0)))
+
+
+def test_probe_sparsity_and_coloring():
+    f, y = _brusselator(40)
+    J = numeric_jacobian(f, 0.0, y, method='fd')
+    pattern = probe_sparsity(f, 0.0, y)
+    assert np.array_equal(pattern.toarray(), J != 0)
+    colors, n_colors = color_columns(pattern)
+    # Hai cột cùng màu không có hàng chung (CPR), số màu cỡ số phần tử mỗi hàng
+    dense = pattern.toarray()
+    for row in dense:
+        assert len(set(colors[row])) == row.sum()
+    assert n_colors <= 6
+
+
+@pytest.mark.parametrize('method', ['fd', 'complex'])
+def test_cpr_jacobian_matches_dense(method):
+    f, y = _brusselator(40)
+    calls = []
+    counted = lambda t, y: calls.append(1) or f(t, y)
+    pattern = probe_sparsity(f, 0.0, y)
+    colors, n_colors = color_columns(pattern)
+    J = sparse_numeric_jacobian(counted, 0.3, y, pattern, colors, method=method)
+    assert sps.issparse(J) and len(calls) == n_colors + (method == 'fd')
+    ref = numeric_jacobian(f, 0.3, y, method=method)
+    tol = 1e-5 if method == 'fd' else 1e-10
+    assert np.allclose(J.toarray(), ref, rtol=tol, atol=tol)
+    assert np.allclose(J.toarray(), numeric_jacobian(f, 0.3, y, method='complex'), rtol=1e-5, atol=1e-5)
+
+
+def test_get_jacobian_auto_sparse():
+    f, y = _brusselator(50)
+    jac = get_jacobian(f, sparse=None, t=0.0, y=y)
+    J = jac(0.0, y)
+    assert sps.issparse(J)
+    assert np.allclose(J.toarray(), numeric_jacobian(f, 0.0, y, method='complex'), atol=1e-10)
+    # Hệ nhỏ: luôn dạng đặc
+    f_small, y_small = _brusselator(5)
+    assert not sps.issparse(get_jacobian(f_small, sparse=None, t=0.0, y=y_small)(0.0, y_small))
+
+
+def test_declared_sparsity_heat_equation():
+    f, y = heat_equation_1d(200)
+    J = get_jacobian(f, sparse=True, t=0.0, y=y)(0.0, y)
+    assert sps.issparse(J) and J.nnz == 3 * 200 - 2
+    assert color_columns(f.jac_sparsity)[1] == 3
+    n = 200; dx = 1.0 / (n + 1)
+    ref = (np.diag(np.full(n - 1, 1.0), -1) - 2 * np.eye(n) + np.diag(np.full(n - 1, 1.0), 1)) / dx ** 2
+    assert np.allclose(J.toarray(), ref, rtol=1e-6, atol=1e-6 / dx ** 2)
+
+
+def test_sparse_newton_heat_equation():
+    # Newton của BDF phân rã I - gh*J dạng CSC (splu); nghiệm đúng e^{-pi^2 t} sin(pi x)
+    from bdf import solve_bdf
+    f, y0 = heat_equation_1d(200)
+    ts, ys, st = solve_bdf(f, (0.0, 0.1), y0, 1e-3, order=2, return_stats=True)
+    assert st['n_newton_fail'] == 0 and st['nlu'] <= 3
+    assert np.abs(ys[-1] - np.exp(-np.pi ** 2 * 0.1) * y0).max() < 1e-4
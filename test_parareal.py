@@ -0,0 +1,31 @@
+import numpy as np
+
+from parareal import _default_solver, parareal
+from problems import ExpressionRHS
+
+F = ExpressionRHS(["x*(1-x)*(x-0.2) - 0.2*x*y", "0.6*x*y - 0.45*y"])
+
+
+def test_matches_sequential_rk4():
+    ts, ys, st = parareal(F, (0.0, 20.0), [0.8, 0.3], h_fine=0.01, h_coarse=0.5, n_slices=4,
+                          max_workers=2, tol=1e-12, return_stats=True, verbose=False)
+    ts_seq, ys_seq = _default_solver(4, []).solve(F, (0.0, 20.0), [0.8, 0.3], 0.01, verbose=False)
+    assert st['converged'] and st['n_iter'] <= 4
+    assert np.allclose(ts, ts_seq, atol=1e-12)
+    assert np.abs(ys - ys_seq).max() < 1e-10
+
+
+def test_default_slices_match_workers():
+    # Mặc định một lát mỗi worker: N lát / K vòng là tăng tốc tối đa
+    _, _, st = parareal(F, (0.0, 10.0), [0.8, 0.3], h_fine=0.01, h_coarse=0.5, max_workers=3,
+                        return_stats=True, verbose=False)
+    assert st['n_slices'] == 3
+    assert st['speedup_bound'] == 3 / st['n_iter']
+
+
+def test_unpicklable_rhs_runs_sequentially():
+    f = lambda t, y: -y
+    ts, ys, st = parareal(f, (0.0, 1.0), [1.0], h_fine=0.01, n_slices=4, max_workers=2,
+                          return_stats=True, verbose=False)
+    assert st['converged'] and st['speedup_bound'] == 1.0
+    assert abs(ys[-1, 0] - np.exp(-1.0)) < 1e-9
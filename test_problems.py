@@ -0,0 +1,55 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from problems import ExpressionRHS, preprocess_expression
+
+
+def _eval_reference(expressions, param_name, t, y_vec, param_val=0):
+    # Ngữ nghĩa của f_numeric_wrapper cũ: eval() từng biểu thức trên môi trường dựng lại mỗi lần gọi
+    env = {'t': t, 'np': np, 'math': np, 'y_arr': y_vec}
+    if param_name: env[param_name] = param_val
+    if len(y_vec) == 1: env['y'] = y_vec[0]; env['x'] = y_vec[0]
+    else:
+        env['x'] = y_vec[0]; env['y'] = y_vec[1]
+        if len(y_vec) >= 3: env['z'] = y_vec[2]
+    return np.array([eval(e.replace('y[', 'y_arr['), env) for e in expressions])
+
+
+CASES = [
+    (["x - t^2 + 1"], None),
+    (["y", "-k*sin(x) + e^(-t)"], 'k'),
+    (["10*(y - x)", "x*(28 - z) - y", "x*y - 8/3*z + a*y[2]"], 'a'),
+    (["y[1]", "y[2]", "y[3]", "-y[0] + ln(1 + t)"], None),
+    (["2.5", "-y"], None),
+]
+
+
+@pytest.mark.parametrize('raw, param', CASES)
+def test_compiled_rhs_matches_eval(raw, param):
+    exprs = [preprocess_expression(e) for e in raw]
+    f = ExpressionRHS(exprs, param)
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        t, y, p = rng.uniform(0, 2), rng.uniform(-1, 1, len(exprs)), rng.uniform(0, 3)
+        assert np.allclose(f(t, y, p), _eval_reference(exprs, param, t, y, p), rtol=1e-14, atol=0)
+    assert np.allclose(f.with_param(1.5)(0.3, y), _eval_reference(exprs, param, 0.3, y, 1.5))
+
+
+@pytest.mark.parametrize('raw, param', CASES)
+def test_batch_matches_rows(raw, param):
+    exprs = [preprocess_expression(e) for e in raw]
+    f = ExpressionRHS(exprs, param, param_val=0.7)
+    Y = np.random.default_rng(1).uniform(-1, 1, (6, len(exprs)))
+    ts = np.linspace(0, 1, 6)
+    batch = f(ts, Y)
+    assert batch.shape == Y.shape
+    assert np.allclose(batch, [f(t, y) for t, y in zip(ts, Y)], rtol=1e-14, atol=0)
+
+
+def test_pickle_round_trip():
+    f = ExpressionRHS(["y", "-k*np.sin(x)"], 'k', param_val=2.0)
+    g = pickle.loads(pickle.dumps(f))
+    y = np.array([0.4, -0.1])
+    assert g.param_val == 2.0 and np.array_equal(g(0.0, y), f(0.0, y))
@@ -0,0 +1,161 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from RungeKutta import RungeKuttaSolver, time_file
+
+
+def _rk4():
+    solver = RungeKuttaSolver(4)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver.derive_tableau([])
+    return solver
+
+
+def test_derive_tableau_replaces_loaded_tableau():
+    solver = RungeKuttaSolver(3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver.load_tableau('radau5')
+        solver.load_tableau('bs32')
+        solver.derive_tableau([])
+    # Không giữ b_hat / fsal của bs32: RK4 cổ điển không có nghiệm nhúng
+    assert solver.method_name == 'Classic RK4' and solver.order == 4
+    assert solver.b_hat is None and solver.err_order is None and not solver.fsal
+    assert solver.dense is None and solver._newton is None
+    with pytest.raises(ValueError):
+        solver.solve_adaptive(lambda t, y: -y, (0.0, 1.0), [1.0], verbose=False)
+
+
+def test_ensemble_matches_single_solves():
+    f = lambda t, Y: np.stack([Y[..., 1], -np.sin(Y[..., 0]) + 0.1 * np.cos(t)], axis=-1)
+    Y0 = np.array([[0.1, 0.0], [1.0, 0.5], [-2.0, 1.0], [3.0, -0.2]])
+    solver = _rk4()
+    ts, ys = solver.solve_ensemble(f, (0.0, 2.0), Y0, 0.01, save_every=10)
+    assert ys.shape == (len(Y0), len(ts), 2)
+    for m, y0 in enumerate(Y0):
+        ts_m, ys_m = solver.solve(f, (0.0, 2.0), y0, 0.01, save_every=10, verbose=False)
+        assert np.allclose(ts, ts_m) and np.allclose(ys[m], ys_m, rtol=0, atol=1e-12)
+
+
+def test_ensemble_isolates_blowup(capsys):
+    # y' = y^2 nổ tại t = 1/y0: chỉ thành viên y0 = 2 bị gán NaN
+    ts, ys = _rk4().solve_ensemble(lambda t, Y: Y ** 2, (0.0, 1.0), [[2.0], [0.5], [-1.0]], 0.01)
+    assert np.isnan(ys[0, -1, 0])
+    assert np.allclose(ys[1:, -1, 0], [0.5 / (1 - 0.5), -1.0 / (1 + 1.0)], atol=1e-8)
+    assert '1/3' in capsys.readouterr().out
+
+
+def test_out_file_stores_time_grid(tmp_path):
+    path = str(tmp_path / 'traj.npy')
+    f = lambda t, y: np.array([y[1], -y[0]])
+    ts, ys = _rk4().solve(f, (0.0, 1.0), [1.0, 0.0], 0.01, save_every=7, out_file=path, verbose=False)
+    on_disk = np.load(path)
+    assert on_disk.shape == ys.shape == (len(ts), 2)
+    assert np.array_equal(np.load(time_file(path)), ts)
+    assert np.allclose(on_disk[:, 0], np.cos(ts), atol=1e-8)
+
+
+def test_out_file_truncated_on_early_stop(tmp_path):
+    path = str(tmp_path / 'blowup.npy')
+    # y' = y^2, y(0) = 1 nổ tại t = 1: file trên đĩa chỉ giữ các hàng hợp lệ
+    f = lambda t, y: y ** 2
+    ts, ys = _rk4().solve(f, (0.0, 2.0), [1.0], 0.01, out_file=path, verbose=False)
+    assert len(ts) < 201
+    on_disk = np.load(path)
+    assert on_disk.shape == (len(ts), 1)
+    assert np.all(np.isfinite(on_disk)) and np.array_equal(on_disk, np.asarray(ys))
+    assert np.array_equal(np.load(time_file(path)), ts)
+
+
+def test_dense_output_query_shapes():
+    f = lambda t, y: np.array([y[1], -y[0]])
+    solver = _rk4()
+    _, _, herm = solver.solve(f, (0.0, 1.0), [1.0, 0.0], 0.01, dense_output=True, verbose=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver.load_tableau('dp54')
+    _, _, ext = solver.solve_adaptive(f, (0.0, 1.0), [1.0, 0.0], rtol=1e-10, atol=1e-12,
+                                      dense_output=True, verbose=False)
+    tq = np.linspace(0.0, 1.0, 12).reshape(2, 3, 2)
+    for sol in (herm, ext):
+        assert sol(0.5).shape == (2,)
+        assert sol([0.1, 0.2]).shape == (2, 2)
+        val = sol(tq)
+        assert val.shape == (2, 3, 2, 2)
+        assert np.allclose(val[..., 0], np.cos(tq), atol=1e-7)
+
+
+def test_dense_output_zero_length_span():
+    solver = RungeKuttaSolver(1)
+    for name in ('dp54', 'rkf45'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            solver.load_tableau(name)
+        ts, _, sol = solver.solve_adaptive(lambda t, y: -y, (1.0, 1.0), [2.0, 3.0],
+                                           dense_output=True, verbose=False)
+        assert len(ts) == 1
+        assert np.array_equal(sol(1.0), [2.0, 3.0])
+        assert sol([1.0, 1.0]).shape == (2, 2)
+
+
+def _robertson(t, y):
+    return np.array([-0.04 * y[0] + 1e4 * y[1] * y[2],
+                     0.04 * y[0] - 1e4 * y[1] * y[2] - 3e7 * y[1] ** 2,
+                     3e7 * y[1] ** 2])
+
+
+def _radau5():
+    solver = RungeKuttaSolver(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver.load_tableau('radau5')
+    return solver
+
+
+def test_radau_robertson_large_step():
+    # J(y0) không có số hạng 3e7 * y2^2: thử lại với J tại stage mới hội tụ ngay từ t = 0
+    for h in (0.5, 0.1):
+        ts, ys = _radau5().solve_implicit(_robertson, (0.0, 40.0), [1.0, 0.0, 0.0], h, verbose=False)
+        assert abs(ts[-1] - 40.0) < 1e-9
+        assert abs(ys[-1, 0] - 0.7158271) < 1e-4
+        assert abs(ys[-1].sum() - 1.0) < 1e-9
+
+
+def test_radau_failure_reported_when_headless(capsys):
+    f = lambda t, y: np.full_like(y, np.nan)
+    ts, _ = _radau5().solve_implicit(f, (0.0, 1.0), [1.0], 0.1, verbose=False)
+    assert len(ts) == 1
+    assert 'Newton không hội tụ' in capsys.readouterr().out
+
+
+def _dp54():
+    solver = RungeKuttaSolver(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver.load_tableau('dp54')
+    return solver
+
+
+def test_solve_auto_nonstiff_stays_explicit():
+    f = lambda t, y: np.array([y[1], -y[0]])
+    solver = _dp54()
+    ts, ys = solver.solve_auto(f, (0.0, 10.0), [1.0, 0.0], rtol=1e-8, atol=1e-10, verbose=False)
+    assert solver.stats['phases'] == [(0.0, 'rk')] and solver.stats['n_switch'] == 0
+    assert np.abs(ys[-1] - [np.cos(10.0), -np.sin(10.0)]).max() < 1e-6
+
+
+def test_solve_auto_switches_to_bdf_on_stiff_problem():
+    solver = _dp54()
+    ts, ys = solver.solve_auto(_robertson, (0.0, 40.0), [1.0, 0.0, 0.0], rtol=1e-6, atol=1e-10, verbose=False)
+    assert [phase for _, phase in solver.stats['phases']] == ['rk', 'bdf']
+    assert abs(ts[-1] - 40.0) < 1e-9 and abs(ys[-1, 0] - 0.7158271) < 1e-4
+    # Chỉ RK hiện: ~240k lần gọi f do bước bị giới hạn bởi ổn định
+    assert solver.stats['nfev'] < 2000
+
+
+def test_solve_auto_switches_back_when_stiffness_ends():
+    # Van der Pol mu = 100: pha chậm (cứng) xen kẽ các cú nhảy nhanh (không cứng)
+    f = lambda t, y: np.array([y[1], 100 * (1 - y[0] ** 2) * y[1] - y[0]])
+    solver = _dp54()
+    ts, ys = solver.solve_auto(f, (0.0, 300.0), [2.0, 0.0], rtol=1e-6, atol=1e-8, verbose=False)
+    phases = [phase for _, phase in solver.stats['phases']]
+    assert phases[:3] == ['rk', 'bdf', 'rk'] and solver.stats['n_switch'] == len(phases) - 1
+    assert np.abs(ys[-1] - [-1.534872, 0.011319]).max() < 1e-3
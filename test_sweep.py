@@ -0,0 +1,38 @@
+import contextlib
+import io
+
+import numpy as np
+
+from problems import ExpressionRHS
+from RungeKutta import RungeKuttaSolver
+from sweep import sweep_parameter
+
+
+def _rk4():
+    solver = RungeKuttaSolver(4)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver.derive_tableau([])
+    return solver
+
+
+def test_sweep_matches_serial_solves():
+    f = ExpressionRHS(["y[1]", "-a*np.sin(y[0])"], 'a')
+    params = np.linspace(0.5, 2.0, 5)
+    solver = _rk4()
+    p_out, ts, finals = sweep_parameter(solver, f, params, (0.0, 3.0), [1.0, 0.0], 0.01, max_workers=2)
+    _, _, trajs = sweep_parameter(solver, f, params, (0.0, 3.0), [1.0, 0.0], 0.01,
+                                  output='trajectory', max_workers=2)
+    assert np.array_equal(p_out, params) and finals.shape == (5, 2) and trajs.shape == (5, len(ts), 2)
+    for p, y_end, traj in zip(params, finals, trajs):
+        ts_p, ys_p = solver.solve(f.with_param(p), (0.0, 3.0), [1.0, 0.0], 0.01, verbose=False)
+        assert np.allclose(ts, ts_p)
+        assert np.array_equal(traj, ys_p) and np.array_equal(y_end, ys_p[-1])
+
+
+def test_sweep_marks_blowup_as_nan(capsys):
+    # y' = a y^2, y(0) = 1 nổ tại t = 1/a: a = 2 không tới được t = 1
+    f = ExpressionRHS(["a*y[0]**2"], 'a')
+    _, _, finals = sweep_parameter(_rk4(), f, [-1.0, 2.0], (0.0, 1.0), [1.0], 0.01, max_workers=2)
+    assert abs(finals[0, 0] - 0.5) < 1e-8
+    assert np.isnan(finals[1, 0])
+    assert '1/2' in capsys.readouterr().out
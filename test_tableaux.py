@@ -0,0 +1,60 @@
+from functools import lru_cache
+
+import numpy as np
+import pytest
+
+import tableaux
+from tableaux import (MAX_ORDER, TABLEAUX, build_explicit_tableau, get_tableau,
+                      order_conditions, step_kernel)
+
+
+def _pendulum(t, y):
+    return np.array([y[1], -np.sin(y[0])])
+
+
+def _run(tab, h, t_end=4.0):
+    step = step_kernel(tab['A'], tab['b'], tab['c'])
+    k = np.empty((len(tab['b']), 2)); tmp = np.empty((2, 2))
+    t, y = 0.0, np.array([1.0, 0.0])
+    for _ in range(int(round(t_end / h))):
+        y = step(_pendulum, t, y, h, k, tmp, None); t += h
+    return y
+
+
+@lru_cache(maxsize=None)
+def _reference():
+    return _run(get_tableau('dp54'), 1e-3)
+
+
+def _observed_order(tab, steps=(0.4, 0.2, 0.1)):
+    errs = np.array([np.abs(_run(tab, h) - _reference()).max() for h in steps])
+    return np.log2(errs[:-1] / errs[1:])
+
+
+@pytest.mark.parametrize('name', sorted(TABLEAUX))
+def test_registry_order_conditions(name):
+    tab = get_tableau(name)
+    assert np.abs(order_conditions(tab['A'], tab['b'], tab['order'])).max() < 1e-12
+    assert np.abs(order_conditions(tab['A'], tab['b'], tab['order'] + 1)).max() > 1e-8
+    if tab.get('b_hat') is not None:
+        assert np.abs(order_conditions(tab['A'], tab['b_hat'], tab['err_order'])).max() < 1e-12
+
+
+@pytest.mark.parametrize('stages', sorted(s for s in MAX_ORDER if s >= 5))
+def test_built_tableau_order(stages):
+    # Mọi cấp p <= MAX_ORDER[s] mà derive_tableau có thể yêu cầu
+    for order in range(1, MAX_ORDER[stages] + 1):
+        tab = build_explicit_tableau(order, stages)
+        assert tab['A'].shape == (stages, stages) and np.allclose(np.triu(tab['A']), 0)
+        assert np.abs(order_conditions(tab['A'], tab['b'], order)).max() < 1e-12
+        observed = _observed_order(tab)
+        assert abs(observed[-1] - order) < 0.3, (order, observed)
+
+
+def test_built_tableaux_shipped_on_disk(monkeypatch):
+    # s = 7, p = 6 đọc từ explicit_tableaux.json: không giải lại hệ điều kiện cấp
+    monkeypatch.delitem(TABLEAUX, 'erk6_7', raising=False)
+    monkeypatch.setattr(tableaux, 'least_squares', None)
+    tab = build_explicit_tableau(6, 7)
+    assert tab['order'] == 6
+    assert np.abs(order_conditions(tab['A'], tab['b'], 6)).max() < 1e-12